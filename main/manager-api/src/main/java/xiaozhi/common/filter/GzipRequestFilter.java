@@ -0,0 +1,109 @@
+package xiaozhi.common.filter;
+
+import java.io.BufferedReader;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.nio.charset.StandardCharsets;
+import java.util.zip.GZIPInputStream;
+
+import org.springframework.http.HttpHeaders;
+
+import jakarta.servlet.Filter;
+import jakarta.servlet.FilterChain;
+import jakarta.servlet.ReadListener;
+import jakarta.servlet.ServletException;
+import jakarta.servlet.ServletInputStream;
+import jakarta.servlet.ServletRequest;
+import jakarta.servlet.ServletResponse;
+import jakarta.servlet.http.HttpServletRequest;
+import jakarta.servlet.http.HttpServletRequestWrapper;
+
+/**
+ * 解压Content-Encoding为gzip的请求体
+ * <p>
+ * 小智服务批量上报聊天记录时会压缩请求体，需在其他读取请求体的过滤器之前执行。
+ */
+public class GzipRequestFilter implements Filter {
+
+    @Override
+    public void doFilter(ServletRequest request, ServletResponse response, FilterChain chain)
+            throws IOException, ServletException {
+        HttpServletRequest httpServletRequest = (HttpServletRequest) request;
+        String encoding = httpServletRequest.getHeader(HttpHeaders.CONTENT_ENCODING);
+        if (encoding == null || !"gzip".equalsIgnoreCase(encoding.trim())) {
+            chain.doFilter(request, response);
+            return;
+        }
+
+        chain.doFilter(new GzipHttpServletRequestWrapper(httpServletRequest), response);
+    }
+
+    private static class GzipHttpServletRequestWrapper extends HttpServletRequestWrapper {
+
+        GzipHttpServletRequestWrapper(HttpServletRequest request) {
+            super(request);
+        }
+
+        @Override
+        public ServletInputStream getInputStream() throws IOException {
+            final GZIPInputStream gzip = new GZIPInputStream(super.getInputStream());
+            return new ServletInputStream() {
+                private boolean finished = false;
+
+                @Override
+                public boolean isFinished() {
+                    return finished;
+                }
+
+                @Override
+                public boolean isReady() {
+                    return true;
+                }
+
+                @Override
+                public void setReadListener(ReadListener readListener) {
+
+                }
+
+                @Override
+                public int read() throws IOException {
+                    int b = gzip.read();
+                    finished = b == -1;
+                    return b;
+                }
+
+                @Override
+                public int read(byte[] b, int off, int len) throws IOException {
+                    int n = gzip.read(b, off, len);
+                    finished = n == -1;
+                    return n;
+                }
+            };
+        }
+
+        @Override
+        public BufferedReader getReader() throws IOException {
+            return new BufferedReader(new InputStreamReader(getInputStream(), StandardCharsets.UTF_8));
+        }
+
+        @Override
+        public String getHeader(String name) {
+            // 解压后请求体不再是gzip编码，长度也未知
+            if (HttpHeaders.CONTENT_ENCODING.equalsIgnoreCase(name)
+                    || HttpHeaders.CONTENT_LENGTH.equalsIgnoreCase(name)) {
+                return null;
+            }
+            return super.getHeader(name);
+        }
+
+        @Override
+        public int getContentLength() {
+            return -1;
+        }
+
+        @Override
+        public long getContentLengthLong() {
+            return -1L;
+        }
+    }
+}
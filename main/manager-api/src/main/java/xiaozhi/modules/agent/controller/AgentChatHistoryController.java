@@ -1,5 +1,7 @@
 package xiaozhi.modules.agent.controller;
 
+import java.util.List;
+
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
 import org.springframework.web.bind.annotation.RequestMapping;
@@ -33,4 +35,18 @@ public class AgentChatHistoryController {
         Boolean result = agentChatHistoryBizService.report(request);
         return new Result<Boolean>().ok(result);
     }
+
+    /**
+     * 小智服务聊天批量上报请求
+     * <p>
+     * 多条聊天上报合并为一个请求，请求体可使用gzip压缩（Content-Encoding: gzip）。
+     *
+     * @param request 聊天上报列表
+     */
+    @Operation(summary = "小智服务聊天批量上报请求")
+    @PostMapping("/report/batch")
+    public Result<Integer> uploadBatch(@RequestBody List<AgentChatHistoryReportDTO> request) {
+        Integer result = agentChatHistoryBizService.reportBatch(request);
+        return new Result<Integer>().ok(result);
+    }
 }
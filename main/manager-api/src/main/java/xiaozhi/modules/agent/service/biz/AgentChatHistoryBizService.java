@@ -1,5 +1,7 @@
 package xiaozhi.modules.agent.service.biz;
 
+import java.util.List;
+
 import xiaozhi.modules.agent.dto.AgentChatHistoryReportDTO;
 
 /**
@@ -19,4 +21,12 @@ public interface AgentChatHistoryBizService {
      * @return 上传结果，true表示成功，false表示失败
      */
     Boolean report(AgentChatHistoryReportDTO agentChatHistoryReportDTO);
+
+    /**
+     * 批量聊天上报方法
+     *
+     * @param reports 多条聊天上报，可能来自不同设备
+     * @return 上报成功的条数
+     */
+    Integer reportBatch(List<AgentChatHistoryReportDTO> reports);
 }
@@ -2,10 +2,12 @@ package xiaozhi.modules.agent.service.biz.impl;
 
 import java.util.Base64;
 import java.util.Date;
+import java.util.List;
 import java.util.Objects;
 
 import org.springframework.stereotype.Service;
 import org.springframework.transaction.annotation.Transactional;
+import org.springframework.transaction.support.TransactionTemplate;
 
 import lombok.RequiredArgsConstructor;
 import lombok.extern.slf4j.Slf4j;
@@ -38,6 +40,8 @@ public class AgentChatHistoryBizServiceImpl implements AgentChatHistoryBizServic
     private final AgentChatAudioService agentChatAudioService;
     private final RedisUtils redisUtils;
     private final DeviceService deviceService;
+    // 批量上报时每条记录单独开启事务，内部调用report不经过代理，注解事务不生效
+    private final TransactionTemplate transactionTemplate;
 
     /**
      * 处理聊天记录上报，包括文件上传和相关信息记录
@@ -83,6 +87,31 @@ public class AgentChatHistoryBizServiceImpl implements AgentChatHistoryBizServic
         return Boolean.TRUE;
     }
 
+    /**
+     * 逐条处理批量上报，每条记录一个事务，单条失败只回滚该条，不影响其他记录
+     *
+     * @param reports 多条聊天上报
+     * @return 上报成功的条数
+     */
+    @Override
+    public Integer reportBatch(List<AgentChatHistoryReportDTO> reports) {
+        int success = 0;
+        for (AgentChatHistoryReportDTO report : reports) {
+            if (report == null || report.getMacAddress() == null || report.getContent() == null) {
+                continue;
+            }
+            try {
+                if (Boolean.TRUE.equals(transactionTemplate.execute(status -> report(report)))) {
+                    success++;
+                }
+            } catch (Exception e) {
+                log.error("聊天记录批量上报失败: macAddress={}", report.getMacAddress(), e);
+            }
+        }
+        log.info("小智设备聊天批量上报: 共{}条，成功{}条", reports.size(), success);
+        return success;
+    }
+
     /**
      * base64解码report.getOpusDataBase64(),存入ai_agent_chat_audio表
      */
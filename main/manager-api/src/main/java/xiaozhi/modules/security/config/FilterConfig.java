@@ -5,6 +5,8 @@ import org.springframework.context.annotation.Bean;
 import org.springframework.context.annotation.Configuration;
 import org.springframework.web.filter.DelegatingFilterProxy;
 
+import xiaozhi.common.filter.GzipRequestFilter;
+
 /**
  * Filter配置
  * Copyright (c) 人人开源 All rights reserved.
@@ -24,4 +26,15 @@ public class FilterConfig {
         registration.addUrlPatterns("/*");
         return registration;
     }
+
+    @Bean
+    public FilterRegistrationBean<GzipRequestFilter> gzipRequestFilterRegistration() {
+        FilterRegistrationBean<GzipRequestFilter> registration = new FilterRegistrationBean<>();
+        registration.setFilter(new GzipRequestFilter());
+        registration.setEnabled(true);
+        // 需在shiro和xss过滤器读取请求体之前解压
+        registration.setOrder(Integer.MAX_VALUE - 2);
+        registration.addUrlPatterns("/agent/chat-history/report/batch");
+        return registration;
+    }
 }
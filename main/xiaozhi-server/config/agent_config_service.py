@@ -0,0 +1,208 @@
+"""
+智能体私有配置服务
+按设备缓存从manager-api获取的私有配置：
+- 缓存未过期时直接返回，过期后先返回旧配置，同时在后台刷新（stale-while-revalidate）
+- 同一设备并发连接时只请求一次接口（singleflight）
+- 设备未找到、未绑定的结果短时间缓存，避免重连风暴反复请求接口；
+  绑定在控制台完成，服务端收不到通知，未绑定的结果单独使用更短的缓存时长，设备绑定后很快就能拿到配置
+- 接口请求放到线程中执行，不阻塞事件循环
+"""
+
+import copy
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from config.logger import setup_logging
+from config.config_loader import get_private_config_from_api
+from config.manage_api_client import DeviceNotFoundException, DeviceBindException
+from core.utils.cache.manager import cache_manager, CacheType
+
+TAG = __name__
+logger = setup_logging()
+
+# 缓存条目的最长保留时间，超过stale_ttl的配置只在接口不可用时兜底使用
+FALLBACK_TTL = 86400
+
+
+@dataclass
+class AgentConfigEntry:
+    """缓存的私有配置，config与error二选一"""
+
+    config: Optional[Dict[str, Any]]
+    error: Optional[Exception]
+    fetched_at: float
+
+
+class AgentConfigService:
+    """带缓存和请求合并的私有配置获取服务"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "fetches": 0,
+            "fetch_errors": 0,
+            "fallbacks": 0,
+        }
+
+    @staticmethod
+    def _cache_settings(base_config: Dict[str, Any]):
+        """从manager-api配置中读取缓存时长，单位秒"""
+        api_config = base_config.get("manager-api") or {}
+        ttl = float(api_config.get("agent_config_ttl", 60))
+        stale_ttl = float(api_config.get("agent_config_stale_ttl", 3600))
+        negative_ttl = float(api_config.get("agent_config_negative_ttl", 10))
+        bind_ttl = float(api_config.get("agent_config_bind_ttl", 3))
+        return ttl, max(ttl, stale_ttl), negative_ttl, bind_ttl
+
+    async def get_config(
+        self, base_config: Dict[str, Any], device_id: str, client_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        获取设备的私有配置，返回值归调用方所有，可以直接修改
+
+        Raises:
+            DeviceNotFoundException: 设备未找到
+            DeviceBindException: 设备需要绑定
+        """
+        ttl, stale_ttl, negative_ttl, bind_ttl = self._cache_settings(base_config)
+        entry = cache_manager.get(CacheType.AGENT_CONFIG, device_id)
+        if entry is not None:
+            age = time.time() - entry.fetched_at
+            if entry.error is not None:
+                if isinstance(entry.error, DeviceBindException):
+                    error_ttl = bind_ttl
+                else:
+                    error_ttl = negative_ttl
+                if age < error_ttl:
+                    self._stats["negative_hits"] += 1
+                    raise entry.error
+            elif age < ttl:
+                self._stats["hits"] += 1
+                return copy.deepcopy(entry.config)
+            elif age < stale_ttl:
+                # 配置已过期但仍可用：先返回旧配置，后台刷新
+                self._stats["stale_hits"] += 1
+                self._start_fetch(
+                    base_config, device_id, client_id, stale_ttl, negative_ttl, bind_ttl
+                )
+                return copy.deepcopy(entry.config)
+
+        # 没有缓存、配置过期太久或未绑定结果已过期时重新请求，旧配置仍可作为兜底
+        self._stats["misses"] += 1
+        try:
+            config = await asyncio.shield(
+                self._start_fetch(
+                    base_config, device_id, client_id, stale_ttl, negative_ttl, bind_ttl
+                )
+            )
+        except (DeviceNotFoundException, DeviceBindException):
+            raise
+        except Exception as e:
+            fallback = self._get_fallback(entry)
+            if fallback is None:
+                raise
+            logger.bind(tag=TAG).warning(f"获取私有配置失败，使用缓存的配置: {e}")
+            return fallback
+
+        if config is None:
+            # 接口异常时返回空，使用缓存的配置兜底
+            fallback = self._get_fallback(entry)
+            if fallback is not None:
+                logger.bind(tag=TAG).warning("API返回的配置为空，使用缓存的配置")
+                return fallback
+            return None
+        return copy.deepcopy(config)
+
+    def _get_fallback(self, entry: Optional[AgentConfigEntry]):
+        if entry is None or entry.config is None:
+            return None
+        self._stats["fallbacks"] += 1
+        return copy.deepcopy(entry.config)
+
+    def _start_fetch(
+        self,
+        base_config: Dict[str, Any],
+        device_id: str,
+        client_id: str,
+        stale_ttl: float,
+        negative_ttl: float,
+        bind_ttl: float,
+    ) -> asyncio.Future:
+        """发起请求，同一设备已有请求在进行时复用该请求"""
+        future = self._inflight.get(device_id)
+        if future is not None and not future.done():
+            self._stats["coalesced"] += 1
+            return future
+        future = asyncio.ensure_future(
+            self._fetch(
+                base_config, device_id, client_id, stale_ttl, negative_ttl, bind_ttl
+            )
+        )
+        self._inflight[device_id] = future
+
+        def _on_done(done_future):
+            if self._inflight.get(device_id) is done_future:
+                del self._inflight[device_id]
+            # 后台刷新没有等待者时，避免未取回的异常告警
+            if not done_future.cancelled():
+                done_future.exception()
+
+        future.add_done_callback(_on_done)
+        return future
+
+    async def _fetch(
+        self,
+        base_config: Dict[str, Any],
+        device_id: str,
+        client_id: str,
+        stale_ttl: float,
+        negative_ttl: float,
+        bind_ttl: float,
+    ) -> Optional[Dict[str, Any]]:
+        self._stats["fetches"] += 1
+        begin_time = time.time()
+        try:
+            config = await asyncio.to_thread(
+                get_private_config_from_api, base_config, device_id, client_id
+            )
+        except (DeviceNotFoundException, DeviceBindException) as e:
+            # 同时替换之前缓存的配置，设备解绑后不再使用旧配置
+            cache_manager.set(
+                CacheType.AGENT_CONFIG,
+                device_id,
+                AgentConfigEntry(config=None, error=e, fetched_at=time.time()),
+                ttl=bind_ttl if isinstance(e, DeviceBindException) else negative_ttl,
+            )
+            raise
+        except Exception:
+            self._stats["fetch_errors"] += 1
+            raise
+
+        if config:
+            cache_manager.set(
+                CacheType.AGENT_CONFIG,
+                device_id,
+                AgentConfigEntry(config=config, error=None, fetched_at=time.time()),
+                ttl=max(stale_ttl, FALLBACK_TTL),
+            )
+            logger.bind(tag=TAG).debug(
+                f"获取设备{device_id}私有配置耗时{time.time() - begin_time:.3f}秒"
+            )
+        else:
+            self._stats["fetch_errors"] += 1
+        return config
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["inflight"] = len(self._inflight)
+        return stats
+
+
+# 全局私有配置服务实例
+agent_config_service = AgentConfigService()
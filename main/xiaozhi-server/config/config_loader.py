@@ -59,6 +59,16 @@ def get_config_from_api(config):
         "url": config["manager-api"].get("url", ""),
         "secret": config["manager-api"].get("secret", ""),
     }
+    # 私有配置缓存时长以本地为准
+    for key in (
+        "agent_config_ttl",
+        "agent_config_stale_ttl",
+        "agent_config_negative_ttl",
+        "agent_config_bind_ttl",
+        "report",
+    ):
+        if key in config["manager-api"]:
+            config_data["manager-api"][key] = config["manager-api"][key]
     # server的配置以本地为准
     if config.get("server"):
         config_data["server"] = {
@@ -67,6 +77,7 @@ def get_config_from_api(config):
             "http_port": config["server"].get("http_port", ""),
             "vision_explain": config["server"].get("vision_explain", ""),
             "auth_key": config["server"].get("auth_key", ""),
+            "metrics_enabled": config["server"].get("metrics_enabled", True),
         }
     return config_data
 
@@ -0,0 +1,58 @@
+"""
+分层配置
+每个连接的配置 = 服务端基础配置 + 智能体私有配置覆盖 + 连接级覆盖。
+创建时只浅拷贝顶层，嵌套的配置块与服务端基础配置共享；
+修改嵌套值必须通过override，沿途的字典按需复制，只有被覆盖的路径会产生副本
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict
+
+
+class LayeredConfig(dict):
+    """写时复制的连接配置，读取方式与普通dict完全一致"""
+
+    def __init__(self, base: Dict[str, Any]):
+        super().__init__(base)
+        self.base = base
+        # 已经复制过、属于本连接的嵌套路径
+        self._owned_paths = set()
+
+    def __setitem__(self, key, value):
+        # 整块替换顶层配置，新的值归本连接所有
+        super().__setitem__(key, value)
+        self._owned_paths.add((key,))
+
+    def override(self, *path, value):
+        """
+        按路径覆盖配置值，不影响基础配置
+
+        Args:
+            path: 配置路径，如 override("selected_module", "TTS", value="EdgeTTS")
+            value: 新的值
+        """
+        if not path:
+            raise ValueError("配置路径不能为空")
+        node = self
+        for depth, key in enumerate(path[:-1]):
+            prefix = path[: depth + 1]
+            child = node.get(key)
+            if prefix not in self._owned_paths:
+                # 第一次修改这条路径时复制一份，之后直接修改副本
+                child = dict(child) if isinstance(child, Mapping) else {}
+                dict.__setitem__(node, key, child)
+                self._owned_paths.add(prefix)
+            node = child
+        dict.__setitem__(node, path[-1], value)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        from copy import deepcopy
+
+        return {key: deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        # 序列化为普通dict，避免反序列化时依赖基础配置
+        return (dict, (dict(self),))
@@ -46,11 +46,15 @@ def formatter(record):
 
 
 def setup_logging():
-    check_config_file()
     """从配置文件中读取日志配置，并设置日志输出格式和级别"""
+    global _logger_initialized
+    # 每个模块和连接都会调用，已初始化时直接返回，不再重复检查和加载配置文件
+    if _logger_initialized:
+        return logger
+
+    check_config_file()
     config = load_config()
     log_config = config["log"]
-    global _logger_initialized
 
     # 第一次初始化时配置日志
     if not _logger_initialized:
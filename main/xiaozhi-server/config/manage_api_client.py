@@ -12,6 +12,14 @@ class DeviceNotFoundException(Exception):
     pass
 
 
+class ManageApiError(Exception):
+    """manager-api返回的业务错误，code为响应中的错误码"""
+
+    def __init__(self, code, msg):
+        self.code = code
+        super().__init__(f"API返回错误: {msg}")
+
+
 class DeviceBindException(Exception):
     def __init__(self, bind_code):
         self.bind_code = bind_code
@@ -87,7 +95,7 @@ class ManageApiClient:
         elif result.get("code") == 10042:
             raise DeviceBindException(result.get("msg"))
         elif result.get("code") != 0:
-            raise Exception(f"API返回错误: {result.get('msg', '未知错误')}")
+            raise ManageApiError(result.get("code"), result.get("msg", "未知错误"))
 
         # 返回成功数据
         return result.get("data") if result.get("code") == 0 else None
@@ -237,6 +245,40 @@ def report(
         return None
 
 
+def report_batch(body: bytes, compressed: bool) -> Optional[Dict]:
+    """批量上报聊天记录，body为JSON数组，compressed为True时为gzip压缩后的数据
+
+    只请求一次，失败时抛出异常，由调用方决定是否重试
+    """
+    headers = {"Content-Type": "application/json"}
+    if compressed:
+        headers["Content-Encoding"] = "gzip"
+    return ManageApiClient._instance._request(
+        "POST", "/agent/chat-history/report/batch", content=body, headers=headers
+    )
+
+
+def report_record(record: Dict) -> Optional[Dict]:
+    """上报单条聊天记录，record为上报接口的请求体，失败时抛出异常"""
+    return ManageApiClient._instance._request(
+        "POST", "/agent/chat-history/report", json=record
+    )
+
+
+def is_endpoint_unsupported(exception: Exception) -> bool:
+    """请求的接口在manager-api上不存在（HTTP 404或405）"""
+    return isinstance(
+        exception, httpx.HTTPStatusError
+    ) and exception.response.status_code in (404, 405)
+
+
+def should_retry(exception: Exception) -> bool:
+    """请求失败后是否值得稍后重试，认证失败（code 401）可能是暂时的，同样重试"""
+    if isinstance(exception, ManageApiError) and exception.code == 401:
+        return True
+    return ManageApiClient._should_retry(exception)
+
+
 def init_service(config):
     ManageApiClient(config)
 
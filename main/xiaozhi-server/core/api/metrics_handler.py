@@ -0,0 +1,113 @@
+import threading
+from aiohttp import web
+from core.api.base_handler import BaseHandler
+from core.utils.metrics import registry, gauge
+from core.utils.cache.manager import cache_manager
+from core.utils.ws_pool import get_ws_pool_stats
+from core.utils.llm import get_shared_instance_stats
+from core.utils.hot_path_log import get_hot_path_logger
+from core.utils.asr_inference_service import get_asr_inference_stats
+from core.providers.tools.device_mcp.mcp_catalog import catalog_cache
+from core.providers.tools.schema_registry import schema_registry
+from core.utils.report_spooler import get_report_spooler_stats
+
+TAG = __name__
+
+
+def _stats_families(prefix: str, help_text: str, label_name: str, stats_by_label: dict):
+    """把各组件get_stats()中的数值字段转成gauge"""
+    families = {}
+    for label_value, stats in stats_by_label.items():
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{prefix}_{key}"
+            family = families.get(name)
+            if family is None:
+                family = families[name] = (name, "gauge", f"{help_text}：{key}", [])
+            family[3].append(("", {label_name: label_value} if label_name else {}, value))
+    return list(families.values())
+
+
+def collect_runtime_metrics():
+    """进程级的状态指标，抓取时现场计算"""
+    families = [gauge("xiaozhi_threads", "当前线程数", threading.active_count())]
+
+    cache_stats = cache_manager.get_stats()
+    families.append(
+        (
+            "xiaozhi_cache_requests_total",
+            "counter",
+            "全局缓存查询次数",
+            [
+                ("", {"result": "hit"}, cache_stats["hits"]),
+                ("", {"result": "miss"}, cache_stats["misses"]),
+            ],
+        )
+    )
+    families.append(
+        (
+            "xiaozhi_cache_evictions_total",
+            "counter",
+            "全局缓存淘汰次数",
+            [("", {}, cache_stats["evictions"])],
+        )
+    )
+    families.append(
+        (
+            "xiaozhi_cache_entries",
+            "gauge",
+            "各缓存空间的条目数",
+            [("", {"cache": name}, size) for name, size in cache_stats["sizes"].items()],
+        )
+    )
+
+    families += _stats_families(
+        "xiaozhi_ws_pool", "流式服务WebSocket连接池", "pool", get_ws_pool_stats()
+    )
+    families += _stats_families(
+        "xiaozhi_asr_inference",
+        "本地ASR批量推理服务",
+        "service",
+        {stats["name"]: stats for stats in get_asr_inference_stats()},
+    )
+    families += _stats_families(
+        "xiaozhi_shared_llm", "共享LLM实例", None, {"": get_shared_instance_stats()}
+    )
+    families += _stats_families(
+        "xiaozhi_hot_path_log", "热路径日志", None, {"": get_hot_path_logger().get_stats()}
+    )
+    families += _stats_families(
+        "xiaozhi_mcp_catalog", "设备MCP工具目录缓存", None, {"": catalog_cache.get_stats()}
+    )
+    families += _stats_families(
+        "xiaozhi_function_schema", "函数描述注册表", None, {"": schema_registry.get_stats()}
+    )
+    families += _stats_families(
+        "xiaozhi_report", "聊天记录上报", None, {"": get_report_spooler_stats()}
+    )
+
+    # 智控台配置服务只在从API读取配置时使用
+    from config.agent_config_service import agent_config_service
+
+    families += _stats_families(
+        "xiaozhi_agent_config", "智能体配置服务", None, {"": agent_config_service.get_stats()}
+    )
+    return families
+
+
+class MetricsHandler(BaseHandler):
+    def __init__(self, config: dict):
+        super().__init__(config)
+        registry.register_collector(collect_runtime_metrics)
+
+    async def handle_get(self, request):
+        """以Prometheus文本格式返回运行指标"""
+        try:
+            body = registry.render()
+            return web.Response(
+                text=body, content_type="text/plain", charset="utf-8"
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"生成运行指标失败: {e}")
+            return web.Response(status=500, text="生成运行指标失败")
@@ -1,12 +1,20 @@
 import json
-import copy
+import time
+import asyncio
 from aiohttp import web
 from config.logger import setup_logging
 from core.utils.util import get_vision_url, is_valid_image_file
-from core.utils.vllm import create_instance
+from core.utils.vllm import get_shared_instance, config_hash
+from core.utils.vision_image import VisionImageProcessor
+from core.utils.metrics import (
+    registry,
+    gauge,
+    VISION_LATENCY,
+    VISION_REQUESTS,
+    VISION_IMAGE_BYTES,
+)
 from config.config_loader import get_private_config_from_api
 from core.utils.auth import AuthToken
-import base64
 from typing import Tuple, Optional
 from plugins_func.register import Action
 
@@ -22,6 +30,40 @@ class VisionHandler:
         self.logger = setup_logging()
         # 初始化认证工具
         self.auth = AuthToken(config["server"]["auth_key"])
+        # 图片预处理的默认参数，VLLM模型配置中的同名字段优先
+        self.vision_config = vision_config = config.get("vision") or {}
+        # 同时进行的视觉分析请求数，超出的请求排队等待
+        self.max_concurrency = max(1, int(vision_config.get("max_concurrency", 4)))
+        # 排队请求数上限和最长等待时间(秒)，超出时直接返回繁忙
+        self.max_queue = int(vision_config.get("max_queue", 16))
+        self.queue_timeout = float(vision_config.get("queue_timeout", 30))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._running = 0
+        self._waiting = 0
+        registry.register_collector(self._collect_metrics)
+
+    def _collect_metrics(self):
+        return [
+            gauge("xiaozhi_vision_running", "正在进行的视觉分析请求数", self._running),
+            gauge("xiaozhi_vision_waiting", "排队等待的视觉分析请求数", self._waiting),
+        ]
+
+    async def _acquire_slot(self):
+        """获取一个视觉分析并发名额，排队已满或等待超时时抛出ValueError"""
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            raise ValueError("视觉分析请求过多，请稍后再试")
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise ValueError("视觉分析请求过多，请稍后再试")
+        finally:
+            self._waiting -= 1
+        self._running += 1
+
+    def _release_slot(self):
+        self._running -= 1
+        self._semaphore.release()
 
     def _create_error_response(self, message: str) -> dict:
         """创建统一的错误响应格式"""
@@ -39,6 +81,9 @@ class VisionHandler:
     async def handle_post(self, request):
         """处理 MCP Vision POST 请求"""
         response = None  # 初始化response变量
+        request_start = time.monotonic()
+        vllm_type = ""
+        result_label = "error"
         try:
             # 验证token
             is_valid, token_device_id = self._verify_auth_token(request)
@@ -89,14 +134,13 @@ class VisionHandler:
                     "不支持的文件格式，请上传有效的图片文件（支持JPEG、PNG、GIF、BMP、TIFF、WEBP格式）"
                 )
 
-            # 将图片转换为base64编码
-            image_base64 = base64.b64encode(image_data).decode("utf-8")
-
+            # 只读使用，无需复制服务端配置
+            current_config = self.config
             # 如果开启了智控台，则从智控台获取模型配置
-            current_config = copy.deepcopy(self.config)
             read_config_from_api = current_config.get("read_config_from_api", False)
             if read_config_from_api:
-                current_config = get_private_config_from_api(
+                current_config = await asyncio.to_thread(
+                    get_private_config_from_api,
                     current_config,
                     device_id,
                     client_id,
@@ -115,11 +159,47 @@ class VisionHandler:
             if not vllm_type:
                 raise ValueError(f"无法找到VLLM模块对应的供应器{vllm_type}")
 
-            vllm = create_instance(
-                vllm_type, current_config["VLLM"][select_vllm_module]
-            )
+            vllm_config = current_config["VLLM"][select_vllm_module]
+            # 相同配置共享同一个实例，不再每次请求创建客户端
+            vllm = get_shared_instance(vllm_type, vllm_config)
+            model_key = config_hash(vllm_type, vllm_config)
+            processor = VisionImageProcessor.from_config(self.vision_config, vllm_config)
+
+            # 图片预处理同样占用CPU，和模型请求一起受max_concurrency限制
+            queue_start = time.monotonic()
+            result_label = "busy"
+            await self._acquire_slot()
+            result_label = "error"
+            try:
+                stage_start = time.monotonic()
+                VISION_LATENCY.observe(
+                    stage_start - queue_start, stage="queue", provider=vllm_type
+                )
+                # 图片解码、缩放和编码在线程池中进行，不阻塞事件循环
+                processed = await asyncio.to_thread(processor.process, image_data)
+                VISION_LATENCY.observe(
+                    time.monotonic() - stage_start, stage="preprocess", provider=vllm_type
+                )
+                VISION_IMAGE_BYTES.inc(processed.original_size, stage="original")
 
-            result = vllm.response(question, image_base64)
+                result = processor.get_cached_response(
+                    processed, question, model_key, device_id
+                )
+                if result is not None:
+                    result_label = "cached"
+                else:
+                    VISION_IMAGE_BYTES.inc(processed.size, stage="processed")
+                    vllm_start = time.monotonic()
+                    result = await vllm.response_async(question, processed.base64)
+                    VISION_LATENCY.observe(
+                        time.monotonic() - vllm_start, stage="vllm", provider=vllm_type
+                    )
+                    processor.set_cached_response(
+                        processed, question, model_key, device_id, result
+                    )
+                    result_label = "ok"
+            finally:
+                self._release_slot()
 
             return_json = {
                 "success": True,
@@ -146,6 +226,11 @@ class VisionHandler:
                 content_type="application/json",
             )
         finally:
+            VISION_REQUESTS.inc(result=result_label)
+            if result_label in ("ok", "cached"):
+                VISION_LATENCY.observe(
+                    time.monotonic() - request_start, stage="total", provider=vllm_type
+                )
             if response:
                 self._add_cors_headers(response)
             return response
@@ -1,6 +1,5 @@
 import os
 import sys
-import copy
 import json
 import uuid
 import time
@@ -23,23 +22,30 @@ from core.utils.modules_initialize import (
     initialize_tts,
     initialize_asr,
 )
-from core.handle.reportHandle import report
 from core.providers.tts.default import DefaultTTS
 from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
 from core.providers.asr.dto.dto import InterfaceType
 from core.handle.textHandle import handleTextMessage
+from core.handle.receiveAudioHandle import handle_no_voice_timeout
 from core.providers.tools.unified_tool_handler import UnifiedToolHandler
+from core.providers.tools.device_iot import IotStateStore
 from plugins_func.loadplugins import auto_import_modules
 from plugins_func.register import Action, ActionResponse
 from core.auth import AuthMiddleware, AuthenticationError
-from config.config_loader import get_private_config_from_api
+from config.agent_config_service import agent_config_service
+from config.layered_config import LayeredConfig
 from core.providers.tts.dto.dto import ContentType, TTSMessageDTO, SentenceType
 from config.logger import setup_logging, build_module_string, create_connection_logger
 from config.manage_api_client import DeviceNotFoundException, DeviceBindException
 from core.utils.prompt_manager import PromptManager
 from core.utils.voiceprint_provider import VoiceprintProvider
 from core.utils import textUtils
+from core.utils.hot_path_log import hot_event
+from core.utils.tracing import get_turn_trace, provider_name
+from core.utils.timing_wheel import TimingWheel
+from core.utils.downlink_scheduler import DownlinkScheduler
+from core.utils.downlink_controller import DownlinkController
 
 TAG = __name__
 
@@ -62,7 +68,8 @@ class ConnectionHandler:
         server=None,
     ):
         self.common_config = config
-        self.config = copy.deepcopy(config)
+        # 分层配置，只复制被私有配置覆盖的部分
+        self.config = LayeredConfig(config)
         self.session_id = str(uuid.uuid4())
         self.logger = setup_logging()
         self.server = server  # 保存server实例的引用
@@ -92,9 +99,7 @@ class ConnectionHandler:
         self.stop_event = threading.Event()
         self.executor = ThreadPoolExecutor(max_workers=5)
 
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 聊天记录由进程内共享的上报器统一上报
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -115,7 +120,7 @@ class ConnectionHandler:
         # vad相关变量
         self.client_audio_buffer = bytearray()
         self.client_have_voice = False
-        self.last_activity_time = 0.0  # 统一的活动时间戳（毫秒）
+        self.last_activity_time = 0.0  # 最后一次检测到语音的时间戳（毫秒），空闲超时由activity_timers处理
         self.client_voice_stop = False
         self.client_voice_window = deque(maxlen=5)
         self.last_is_voice = False
@@ -136,8 +141,10 @@ class ConnectionHandler:
         self.tts_MessageText = ""
 
         # iot相关变量
-        self.iot_descriptors = {}
+        self.iot_store = IotStateStore()
         self.func_handler = None
+        # 工具处理器初始化完成后置位
+        self.func_handler_ready = asyncio.Event()
 
         self.cmd_exit = self.config["exit_commands"]
         self.max_cmd_length = 0
@@ -153,7 +160,17 @@ class ConnectionHandler:
         self.timeout_seconds = (
             int(self.config.get("close_connection_no_voice_time", 120)) + 60
         )  # 在原来第一道关闭的基础上加60秒，进行二道关闭
-        self.timeout_task = None
+        # 空闲关闭、记忆保存、结束语定时器挂在server共享的时间轮上，有活动时推迟
+        self.timing_wheel = server.timing_wheel if server else TimingWheel()
+        self.activity_timers = []
+        # 下行音频帧由server共享的调度器统一按实时速率发送
+        self.downlink_scheduler = (
+            server.downlink_scheduler
+            if server
+            else DownlinkScheduler.from_config(self.config)
+        )
+        # 按链路状况调整突发帧数和发送提前量
+        self.downlink_controller = DownlinkController.from_config(self, self.config)
         
         # 记忆保存相关
         self.memory_save_timeout = 10  # 10秒无活动时保存记忆
@@ -221,14 +238,14 @@ class ConnectionHandler:
             # 初始化活动时间戳
             self.last_activity_time = time.time() * 1000
 
-            # 启动超时检查任务
-            self.timeout_task = asyncio.create_task(self._check_timeout())
-
-            self.welcome_msg = self.config["xiaozhi"]
+            # 欢迎消息会按连接写入session_id等字段，复制一份避免修改共享的基础配置
+            self.welcome_msg = dict(self.config["xiaozhi"])
             self.welcome_msg["session_id"] = self.session_id
 
             # 获取差异化配置
-            self._initialize_private_config()
+            await self._initialize_private_config()
+            # 启动空闲定时器，时长以差异化配置为准
+            self._start_activity_timers()
             # 异步初始化
             self.executor.submit(self._initialize_components)
 
@@ -399,8 +416,6 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
             """更新系统提示词"""
             self._init_prompt_enhancement()
 
@@ -417,19 +432,6 @@ class ConnectionHandler:
             self.change_system_prompt(enhanced_prompt)
             self.logger.bind(tag=TAG).info("系统提示词已增强更新")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
-        if not self.read_config_from_api or self.need_bind:
-            return
-        if self.chat_history_conf == 0:
-            return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
-            )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
-
     def _initialize_tts(self):
         """初始化TTS"""
         tts = None
@@ -466,7 +468,7 @@ class ConnectionHandler:
         except Exception as e:
             self.logger.bind(tag=TAG).warning(f"声纹识别初始化失败: {str(e)}")
 
-    def _initialize_private_config(self):
+    async def _initialize_private_config(self):
         """如果是从配置文件获取，则进行二次实例化"""
         self.logger.bind(tag=TAG).info(f"配置初始化检查 - read_config_from_api: {self.read_config_from_api}")
         if not self.read_config_from_api:
@@ -481,7 +483,8 @@ class ConnectionHandler:
             self.logger.bind(tag=TAG).info(f"开始从API获取配置 - 设备ID: {device_id}, 客户端ID: {client_id}")
             self.logger.bind(tag=TAG).info(f"当前基础配置selected_module: {self.config.get('selected_module', {})}")
             
-            private_config = get_private_config_from_api(
+            # 带缓存的配置服务：并发连接合并请求，过期配置后台刷新，接口失败时使用缓存兜底
+            private_config = await agent_config_service.get_config(
                 self.config,
                 device_id,
                 client_id,
@@ -492,9 +495,6 @@ class ConnectionHandler:
                 self.logger.bind(tag=TAG).info(
                     f"{time.time() - begin_time} 秒，获取差异化配置成功: {json.dumps(filter_sensitive_info(private_config), ensure_ascii=False)}"
                 )
-                # 缓存配置以备网络错误时使用
-                from core.utils.cache.manager import cache_manager, CacheType
-                cache_manager.set(CacheType.CONFIG, f"agent_config_{device_id}", private_config, ttl=3600)
             else:
                 self.logger.bind(tag=TAG).warning("API返回的配置为空")
                 private_config = {}
@@ -511,20 +511,19 @@ class ConnectionHandler:
             self.logger.bind(tag=TAG).error(f"获取差异化配置失败: {e}")
             # 如果是网络错误，不应该设置need_bind
             if "[Errno 35]" in str(e) or "write could not complete without blocking" in str(e) or "ConnectError" in str(e) or "TimeoutException" in str(e):
-                self.logger.bind(tag=TAG).warning("网络错误，不设置need_bind，尝试使用缓存配置")
-                # 尝试使用缓存的配置
-                from core.utils.cache.manager import cache_manager, CacheType
-                cached_config = cache_manager.get(CacheType.CONFIG, f"agent_config_{device_id}")
-                if cached_config:
-                    self.logger.bind(tag=TAG).info("使用缓存的私有配置")
-                    private_config = cached_config
-                else:
-                    self.logger.bind(tag=TAG).warning("无缓存配置可用，使用基础配置继续运行")
-                    private_config = {}
+                self.logger.bind(tag=TAG).warning("网络错误，不设置need_bind，无缓存配置可用，使用基础配置继续运行")
+                private_config = {}
             else:
                 self.need_bind = True
                 private_config = {}
 
+        # 模块实例化可能加载本地模型，放到线程池中执行，不阻塞其他连接
+        await self.loop.run_in_executor(
+            self.executor, self._apply_private_config, private_config
+        )
+
+    def _apply_private_config(self, private_config: Dict[str, Any]):
+        """用差异化配置覆盖连接配置，并重新实例化变化的模块"""
         init_llm, init_tts, init_memory, init_intent = (
             False,
             False,
@@ -537,51 +536,54 @@ class ConnectionHandler:
 
         if init_vad:
             self.config["VAD"] = private_config["VAD"]
-            self.config["selected_module"]["VAD"] = private_config["selected_module"][
-                "VAD"
-            ]
+            self.config.override(
+                "selected_module", "VAD", value=private_config["selected_module"]["VAD"]
+            )
         if init_asr:
             self.config["ASR"] = private_config["ASR"]
-            self.config["selected_module"]["ASR"] = private_config["selected_module"][
-                "ASR"
-            ]
+            self.config.override(
+                "selected_module", "ASR", value=private_config["selected_module"]["ASR"]
+            )
         if private_config.get("TTS", None) is not None:
             init_tts = True
             self.config["TTS"] = private_config["TTS"]
-            self.config["selected_module"]["TTS"] = private_config["selected_module"][
-                "TTS"
-            ]
+            self.config.override(
+                "selected_module", "TTS", value=private_config["selected_module"]["TTS"]
+            )
         if private_config.get("LLM", None) is not None:
             init_llm = True
             self.config["LLM"] = private_config["LLM"]
-            self.config["selected_module"]["LLM"] = private_config["selected_module"][
-                "LLM"
-            ]
+            self.config.override(
+                "selected_module", "LLM", value=private_config["selected_module"]["LLM"]
+            )
         if private_config.get("VLLM", None) is not None:
             self.config["VLLM"] = private_config["VLLM"]
-            self.config["selected_module"]["VLLM"] = private_config["selected_module"][
-                "VLLM"
-            ]
+            self.config.override(
+                "selected_module", "VLLM", value=private_config["selected_module"]["VLLM"]
+            )
         if private_config.get("Memory", None) is not None:
             init_memory = True
             self.config["Memory"] = private_config["Memory"]
-            self.config["selected_module"]["Memory"] = private_config[
-                "selected_module"
-            ]["Memory"]
+            self.config.override(
+                "selected_module", "Memory", value=private_config["selected_module"]["Memory"]
+            )
         if private_config.get("Intent", None) is not None:
             init_intent = True
             self.config["Intent"] = private_config["Intent"]
             model_intent = private_config.get("selected_module", {}).get("Intent", {})
-            self.config["selected_module"]["Intent"] = model_intent
+            self.config.override("selected_module", "Intent", value=model_intent)
             # 加载插件配置
             if model_intent != "Intent_nointent":
                 plugin_from_server = private_config.get("plugins", {})
                 for plugin, config_str in plugin_from_server.items():
                     plugin_from_server[plugin] = json.loads(config_str)
                 self.config["plugins"] = plugin_from_server
-                self.config["Intent"][self.config["selected_module"]["Intent"]][
-                    "functions"
-                ] = plugin_from_server.keys()
+                self.config.override(
+                    "Intent",
+                    self.config["selected_module"]["Intent"],
+                    "functions",
+                    value=plugin_from_server.keys(),
+                )
         if private_config.get("prompt", None) is not None:
             self.config["prompt"] = private_config["prompt"]
         # 获取声纹信息
@@ -647,12 +649,12 @@ class ConnectionHandler:
                 "llm"
             ]
             if memory_llm_name and memory_llm_name in self.config["LLM"]:
-                # 如果配置了专用LLM，则创建独立的LLM实例
+                # 如果配置了专用LLM，则使用该配置对应的共享LLM实例
                 from core.utils import llm as llm_utils
 
                 memory_llm_config = self.config["LLM"][memory_llm_name]
                 memory_llm_type = memory_llm_config.get("type", memory_llm_name)
-                memory_llm = llm_utils.create_instance(
+                memory_llm = llm_utils.get_shared_instance(
                     memory_llm_type, memory_llm_config
                 )
                 self.logger.bind(tag=TAG).info(
@@ -689,12 +691,12 @@ class ConnectionHandler:
             ]
 
             if intent_llm_name and intent_llm_name in self.config["LLM"]:
-                # 如果配置了专用LLM，则创建独立的LLM实例
+                # 如果配置了专用LLM，则使用该配置对应的共享LLM实例
                 from core.utils import llm as llm_utils
 
                 intent_llm_config = self.config["LLM"][intent_llm_name]
                 intent_llm_type = intent_llm_config.get("type", intent_llm_name)
-                intent_llm = llm_utils.create_instance(
+                intent_llm = llm_utils.get_shared_instance(
                     intent_llm_type, intent_llm_config
                 )
                 self.logger.bind(tag=TAG).info(
@@ -718,14 +720,25 @@ class ConnectionHandler:
         # 更新系统prompt至上下文
         self.dialogue.update_system_message(self.prompt)
 
+    @staticmethod
+    def _format_dialogue(dialogue):
+        """格式化对话内容用于调试日志，过长的消息截取前500字符"""
+        lines = []
+        for i, msg in enumerate(dialogue):
+            content = str(msg.get("content") or "")
+            if len(content) > 500:
+                content = content[:500] + "...[截断]"
+            lines.append(f"消息 {i+1} [{msg.get('role', 'unknown')}]: {content}")
+        return "\n".join(lines)
+
     def chat(self, query, tool_call=False, depth=0):
         self.logger.bind(tag=TAG).info(f"大模型收到用户消息: {query}")
         llm_start_time = time.time()  # 记录LLM开始时间
         
         # 记录LLM开始处理时间（全链路统计）
-        if hasattr(self, 'voice_pipeline_start_time'):
-            llm_pipeline_duration = time.monotonic() - self.voice_pipeline_start_time
-            self.logger.bind(tag=TAG).info(f"🧠 LLM开始处理 - 从语音开始: {llm_pipeline_duration:.3f}s")
+        trace = get_turn_trace(self)
+        if not trace.finished:
+            self.logger.bind(tag=TAG).info(f"🧠 LLM开始处理 - 从语音开始: {trace.elapsed():.3f}s")
         
         self.llm_finish_task = False
 
@@ -753,32 +766,28 @@ class ConnectionHandler:
             # 使用带记忆的对话
             memory_str = None
             if self.memory is not None:
-                future = asyncio.run_coroutine_threadsafe(
-                    self.memory.query_memory(query), self.loop
-                )
-                memory_str = future.result()
+                with trace.span("memory_query", provider_name(self, "Memory")):
+                    future = asyncio.run_coroutine_threadsafe(
+                        self.memory.query_memory(query), self.loop
+                    )
+                    memory_str = future.result()
 
             # 获取完整对话内容（包含记忆）
             dialogue_with_memory = self.dialogue.get_llm_dialogue_with_memory(
                 memory_str, self.config.get("voiceprint", {})
             )
             
-            # 打印LLM请求参数
-            self.logger.bind(tag=TAG).info("=== LLM 请求参数 ===")
-            self.logger.bind(tag=TAG).info(f"Session ID: {self.session_id}")
-            self.logger.bind(tag=TAG).info(f"记忆数据: {memory_str if memory_str else '无'}")
-            self.logger.bind(tag=TAG).info(f"对话消息数量: {len(dialogue_with_memory)}")
-            
-            # 详细打印每条消息
-            for i, msg in enumerate(dialogue_with_memory):
-                role = msg.get('role', 'unknown')
-                content = msg.get('content', '')
-                # 如果内容过长，截取前500字符
-                if len(content) > 500:
-                    content_preview = content[:500] + "...[截断]"
-                else:
-                    content_preview = content
-                self.logger.bind(tag=TAG).info(f"消息 {i+1} [{role}]: {content_preview}")
+            # 每轮只记录摘要，完整对话内容仅在DEBUG级别按需格式化
+            hot_event(
+                "llm_request",
+                self.device_id,
+                session_id=self.session_id,
+                messages=len(dialogue_with_memory),
+                has_memory=bool(memory_str),
+            )
+            self.logger.bind(tag=TAG).opt(lazy=True).debug(
+                "LLM请求消息: {}", lambda: self._format_dialogue(dialogue_with_memory)
+            )
             
             if self.intent_type == "function_call" and functions is not None:
                 self.logger.bind(tag=TAG).info(f"Function Call 模式，可用函数数量: {len(functions) if functions else 0}")
@@ -806,9 +815,16 @@ class ConnectionHandler:
         content_arguments = ""
         self.client_abort = False
         emotion_flag = True
+        # LLM首字耗时与输出速率，请求在第一次迭代时才真正发出
+        llm_request_time = time.monotonic()
+        llm_first_token_time = None
+        llm_chunks = 0
         for response in llm_responses:
             if self.client_abort:
                 break
+            llm_chunks += 1
+            if llm_first_token_time is None:
+                llm_first_token_time = time.monotonic()
             if self.intent_type == "function_call" and functions is not None:
                 content, tools_call = response
                 if "content" in response:
@@ -851,6 +867,23 @@ class ConnectionHandler:
                             content_detail=content,
                         )
                     )
+        llm_end_time = time.monotonic()
+        llm_attrs = {"chunks": llm_chunks, "depth": depth}
+        if llm_first_token_time is not None:
+            llm_attrs["ttft_ms"] = round((llm_first_token_time - llm_request_time) * 1000, 1)
+            generate_time = llm_end_time - llm_first_token_time
+            if generate_time > 0:
+                llm_attrs["chunks_per_s"] = round(llm_chunks / generate_time, 1)
+            trace.add_span(
+                "llm_first_token",
+                llm_request_time,
+                llm_first_token_time,
+                provider_name(self, "LLM"),
+            )
+        trace.add_span(
+            "llm", llm_request_time, llm_end_time, provider_name(self, "LLM"), **llm_attrs
+        )
+
         # 处理function call
         if tool_call_flag:
             bHasError = False
@@ -971,40 +1004,6 @@ class ConnectionHandler:
         else:
             pass
 
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
-                if item is None:  # 检测毒丸对象
-                    break
-                try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
-
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
-
-    def _process_report(self, type, text, audio_data, report_time):
-        """处理上报任务"""
-        try:
-            # 执行上报（传入二进制数据）
-            report(self, type, text, audio_data, report_time)
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
-
     def clearSpeakStatus(self):
         self.client_is_speaking = False
         self.logger.bind(tag=TAG).debug(f"清除服务端讲话状态")
@@ -1012,14 +1011,10 @@ class ConnectionHandler:
     async def close(self, ws=None):
         """资源清理方法"""
         try:
-            # 取消超时任务
-            if self.timeout_task and not self.timeout_task.done():
-                self.timeout_task.cancel()
-                try:
-                    await self.timeout_task
-                except asyncio.CancelledError:
-                    pass
-                self.timeout_task = None
+            # 取消空闲定时器
+            for timer, _ in self.activity_timers:
+                timer.cancel()
+            self.activity_timers = []
 
             # 清理工具处理器资源
             if hasattr(self, "func_handler") and self.func_handler:
@@ -1030,6 +1025,18 @@ class ConnectionHandler:
                         f"清理工具处理器时出错: {cleanup_error}"
                     )
 
+            # 结束未完成的对话追踪
+            get_turn_trace(self).finish()
+
+            # LLM实例可能被多个连接共享，只释放本会话的状态
+            if self.llm:
+                try:
+                    self.llm.release_session(self.session_id)
+                except Exception as release_error:
+                    self.logger.bind(tag=TAG).error(
+                        f"释放LLM会话状态时出错: {release_error}"
+                    )
+
             # 触发停止事件
             if self.stop_event:
                 self.stop_event.set()
@@ -1096,16 +1103,19 @@ class ConnectionHandler:
 
     def clear_queues(self):
         """清空所有任务队列"""
+        # 取消正在播放和排队的音频流
+        self.downlink_scheduler.cancel(self)
         if self.tts:
             self.logger.bind(tag=TAG).debug(
                 f"开始清理: TTS队列大小={self.tts.tts_text_queue.qsize()}, 音频队列大小={self.tts.tts_audio_queue.qsize()}"
             )
+            # 先作废合成中的句子，避免清空后又有结果放入音频队列
+            self.tts.cancel_synthesis()
 
             # 使用非阻塞方式清空队列
             for q in [
                 self.tts.tts_text_queue,
                 self.tts.tts_audio_queue,
-                self.report_queue,
             ]:
                 if not q:
                     continue
@@ -1148,43 +1158,52 @@ class ConnectionHandler:
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"Chat and close error: {str(e)}")
 
-    async def _check_timeout(self):
-        """检查连接超时"""
+    def _start_activity_timers(self):
+        """注册空闲相关的定时器，均以最后一次活动为起点"""
+        self.timing_wheel.start()
+        close_connection_no_voice_time = int(
+            self.config.get("close_connection_no_voice_time", 120)
+        )
+        for delay, callback in (
+            (self.memory_save_timeout, self._on_memory_save_timeout),
+            (close_connection_no_voice_time, self._on_no_voice_timeout),
+            (self.timeout_seconds, self._on_idle_timeout),
+        ):
+            self.activity_timers.append(
+                (self.timing_wheel.schedule(delay, callback), delay)
+            )
+
+    def touch_activity(self):
+        """记录一次活动，推迟所有空闲定时器，只修改截止时间，可在热路径上调用"""
+        for timer, delay in self.activity_timers:
+            timer.reschedule(delay)
+
+    async def _on_memory_save_timeout(self):
+        """一段时间无活动时保存当前对话到记忆系统"""
+        if (
+            not self.memory_saved_for_session
+            and self.memory
+            and len(self.dialogue.dialogue) > 0
+        ):
+            self.logger.bind(tag=TAG).info(f"{self.memory_save_timeout}秒无语音活动，保存当前对话到记忆系统")
+            self.memory_saved_for_session = True
+            await self.save_memory_async()
+
+    async def _on_no_voice_timeout(self):
+        """长时间无语音时发送结束语或直接关闭"""
+        if self.stop_event.is_set():
+            return
+        await handle_no_voice_timeout(self)
+
+    async def _on_idle_timeout(self):
+        """结束语之后仍无活动，强制关闭连接"""
+        if self.stop_event.is_set():
+            return
+        self.logger.bind(tag=TAG).info("连接超时，准备关闭")
+        # 设置停止事件，防止重复处理
+        self.stop_event.set()
+        # 使用 try-except 包装关闭操作，确保不会因为异常而阻塞
         try:
-            while not self.stop_event.is_set():
-                # 检查是否超时（只有在时间戳已初始化的情况下）
-                if self.last_activity_time > 0.0:
-                    current_time = time.time() * 1000
-                    time_since_last_activity = current_time - self.last_activity_time
-                    
-                    # 检查是否需要保存记忆（1分钟无活动）
-                    if (
-                        not self.memory_saved_for_session 
-                        and time_since_last_activity > self.memory_save_timeout * 1000
-                        and self.memory 
-                        and len(self.dialogue.dialogue) > 0
-                    ):
-                        self.logger.bind(tag=TAG).info(f"{self.memory_save_timeout}秒无语音活动，保存当前对话到记忆系统")
-                        await self.save_memory_async()
-                        self.memory_saved_for_session = True
-                    
-                    # 检查是否需要断开连接
-                    if time_since_last_activity > self.timeout_seconds * 1000:
-                        if not self.stop_event.is_set():
-                            self.logger.bind(tag=TAG).info("连接超时，准备关闭")
-                            # 设置停止事件，防止重复处理
-                            self.stop_event.set()
-                            # 使用 try-except 包装关闭操作，确保不会因为异常而阻塞
-                            try:
-                                await self.close(self.websocket)
-                            except Exception as close_error:
-                                self.logger.bind(tag=TAG).error(
-                                    f"超时关闭连接时出错: {close_error}"
-                                )
-                        break
-                # 每10秒检查一次，避免过于频繁
-                await asyncio.sleep(10)
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"超时检查任务出错: {e}")
-        finally:
-            self.logger.bind(tag=TAG).info("超时检查任务已退出")
+            await self.close(self.websocket)
+        except Exception as close_error:
+            self.logger.bind(tag=TAG).error(f"超时关闭连接时出错: {close_error}")
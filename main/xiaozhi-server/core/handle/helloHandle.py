@@ -3,21 +3,20 @@ import json
 import random
 import asyncio
 from core.utils.dialogue import Message
-from core.utils.util import audio_to_data
 from core.handle.sendAudioHandle import sendAudioMessage, send_stt_message
-from core.utils.util import remove_punctuation_and_length, opus_datas_to_wav_bytes
+from core.utils.util import remove_punctuation_and_length
 from core.providers.tts.dto.dto import ContentType, SentenceType
 from core.providers.tools.device_mcp import (
     MCPClient,
     send_mcp_initialize_message,
-    send_mcp_tools_list_request,
 )
 from core.utils.wakeup_word import WakeupWordsConfig
 
 TAG = __name__
 
 WAKEUP_CONFIG = {
-    "refresh_time": 5,
+    # 同一音色的唤醒词回复重新生成的间隔（秒），可通过wakeup_words_refresh_time配置
+    "refresh_time": 3600,
     "words": ["你好", "你好啊", "嘿，你好", "嗨"],
 }
 
@@ -43,10 +42,8 @@ async def handleHelloMessage(conn, msg_json):
         if features.get("mcp"):
             conn.logger.bind(tag=TAG).info("客户端支持MCP")
             conn.mcp_client = MCPClient()
-            # 发送初始化
+            # 发送初始化，收到响应后按固件查找工具目录缓存，未命中时再获取tools列表
             asyncio.create_task(send_mcp_initialize_message(conn))
-            # 发送mcp消息，获取tools列表
-            asyncio.create_task(send_mcp_tools_list_request(conn))
 
     await conn.websocket.send(json.dumps(conn.welcome_msg))
 
@@ -71,20 +68,14 @@ async def checkWakeupWords(conn, text):
     if not voice:
         voice = "default"
 
-    # 获取唤醒词回复配置
-    response = wakeup_words_config.get_wakeup_response(voice)
-    if not response or not response.get("file_path"):
-        response = {
-            "voice": "default",
-            "file_path": "config/assets/wakeup_words.wav",
-            "time": 0,
-            "text": "哈啰啊，我是小智啦，声音好听的台湾女孩一枚，超开心认识你耶，最近在忙啥，别忘了给我来点有趣的料哦，我超爱听八卦的啦",
-        }
+    # 获取唤醒词回复，音频以Opus帧缓存在内存中，播放时无需转码；
+    # 首次使用或文件更新后需要读取配置并解码音频，放到线程中执行，不阻塞事件循环
+    response, opus_packets = await asyncio.to_thread(
+        wakeup_words_config.get_wakeup_audio, voice
+    )
 
     # 播放唤醒词回复
     conn.client_abort = False
-    opus_packets, _ = audio_to_data(response.get("file_path"))
-
     conn.logger.bind(tag=TAG).info(f"播放唤醒词回复: {response.get('text')}")
     await sendAudioMessage(conn, SentenceType.FIRST, opus_packets, response.get("text"))
     await sendAudioMessage(conn, SentenceType.LAST, [], None)
@@ -93,7 +84,10 @@ async def checkWakeupWords(conn, text):
     conn.dialogue.put(Message(role="assistant", content=response.get("text")))
 
     # 检查是否需要更新唤醒词回复
-    if time.time() - response.get("time", 0) > WAKEUP_CONFIG["refresh_time"]:
+    refresh_time = conn.config.get(
+        "wakeup_words_refresh_time", WAKEUP_CONFIG["refresh_time"]
+    )
+    if time.time() - response.get("time", 0) > refresh_time:
         if not _wakeup_response_lock.locked():
             asyncio.create_task(wakeupWordsResponse(conn))
     return True
@@ -117,7 +111,10 @@ async def wakeupWordsResponse(conn):
             + "请勿对这条内容本身进行任何解释和回应，请勿返回表情符号，仅返回对用户的内容的回复。"
         )
 
-        result = conn.llm.response_no_stream(conn.config["prompt"], question)
+        # LLM和TTS都是阻塞调用，放到线程中执行，不占用事件循环
+        result = await asyncio.to_thread(
+            conn.llm.response_no_stream, conn.config["prompt"], question
+        )
         if not result or len(result) == 0:
             return
 
@@ -126,15 +123,21 @@ async def wakeupWordsResponse(conn):
         if not tts_result:
             return
 
+        # 不删除音频文件时to_tts返回的是文件路径
+        if isinstance(tts_result, str):
+            tts_result, _ = await asyncio.to_thread(
+                conn.tts.audio_to_opus_data, tts_result
+            )
+
         # 获取当前音色
         voice = getattr(conn.tts, "voice", "default")
+        if not voice:
+            voice = "default"
 
-        wav_bytes = opus_datas_to_wav_bytes(tts_result, sample_rate=16000)
-        file_path = wakeup_words_config.generate_file_path(voice)
-        with open(file_path, "wb") as f:
-            f.write(wav_bytes)
-        # 更新配置
-        wakeup_words_config.update_wakeup_response(voice, file_path, result)
+        # 以p3格式保存Opus帧并更新配置
+        await asyncio.to_thread(
+            wakeup_words_config.save_wakeup_audio, voice, tts_result, result
+        )
     finally:
         # 确保在任何情况下都释放锁
         if _wakeup_response_lock.locked():
@@ -7,6 +7,7 @@ import asyncio
 import json
 from core.handle.sendAudioHandle import SentenceType
 from core.utils.util import audio_to_data
+from core.utils.tracing import get_turn_trace, provider_name
 
 TAG = __name__
 
@@ -16,7 +17,7 @@ async def handleAudioMessage(conn, audio):
     start_time = time.time()
     
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, audio)
+    have_voice = await conn.vad.is_vad_async(conn, audio)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if have_voice and hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -27,6 +28,9 @@ async def handleAudioMessage(conn, audio):
         return
 
     if have_voice:
+        # 用户开始说话时提前预热TTS连接，回复时省去握手
+        if conn.tts:
+            conn.tts.prewarm_connection()
         if conn.client_is_speaking:
             await handleAbortMessage(conn)
     # 设备长时间空闲检测，用于say goodbye
@@ -86,7 +90,9 @@ async def startToChat(conn, text):
         await handleAbortMessage(conn)
 
     # 首先进行意图分析，使用实际文本内容
-    intent_handled = await handle_user_intent(conn, actual_text)
+    with get_turn_trace(conn).span("intent", provider_name(conn, "Intent")) as attrs:
+        intent_handled = await handle_user_intent(conn, actual_text)
+        attrs["handled"] = bool(intent_handled)
 
     if intent_handled:
         # 如果意图已被处理，不再进行聊天
@@ -102,30 +108,27 @@ async def no_voice_close_connect(conn, have_voice):
         conn.last_activity_time = time.time() * 1000
         # 重置记忆保存标记，因为有新的语音活动
         conn.memory_saved_for_session = False
+        # 推迟空闲定时器，超时由连接的定时器处理，不再逐帧计算无语音时长
+        conn.touch_activity()
+
+
+async def handle_no_voice_timeout(conn):
+    """设备长时间没有语音时，发送结束语或直接结束对话"""
+    if conn.close_after_chat:
         return
-    # 只有在已经初始化过时间戳的情况下才进行超时检查
-    if conn.last_activity_time > 0.0:
-        no_voice_time = time.time() * 1000 - conn.last_activity_time
-        close_connection_no_voice_time = int(
-            conn.config.get("close_connection_no_voice_time", 120)
-        )
-        if (
-            not conn.close_after_chat
-            and no_voice_time > 1000 * close_connection_no_voice_time
-        ):
-            conn.close_after_chat = True
-            conn.client_abort = False
-            end_prompt = conn.config.get("end_prompt", {})
-            # 检查是否启用结束语
-            enable_end_prompt = end_prompt.get("enable", False) if end_prompt else False
-            if not enable_end_prompt:
-                conn.logger.bind(tag=TAG).info("结束对话，无需发送结束提示语")
-                await conn.close()
-                return
-            prompt = end_prompt.get("prompt")
-            if not prompt:
-                prompt = "请你以```时间过得真快```未来头，用富有感情、依依不舍的话来结束这场对话吧。！"
-            await startToChat(conn, prompt)
+    conn.close_after_chat = True
+    conn.client_abort = False
+    end_prompt = conn.config.get("end_prompt", {})
+    # 检查是否启用结束语
+    enable_end_prompt = end_prompt.get("enable", False) if end_prompt else False
+    if not enable_end_prompt:
+        conn.logger.bind(tag=TAG).info("结束对话，无需发送结束提示语")
+        await conn.close()
+        return
+    prompt = end_prompt.get("prompt")
+    if not prompt:
+        prompt = "请你以```时间过得真快```未来头，用富有感情、依依不舍的话来结束这场对话吧。！"
+    await startToChat(conn, prompt)
 
 
 async def max_out_size(conn):
@@ -1,25 +1,24 @@
 """
-TTS上报功能已集成到ConnectionHandler类中。
+聊天记录上报
 
 上报功能包括：
-1. 每个连接对象拥有自己的上报队列和处理线程
-2. 上报线程的生命周期与连接对象绑定
-3. 使用ConnectionHandler.enqueue_tts_report方法进行上报
-
-具体实现请参考core/connection.py中的相关代码。
+1. ASR和TTS的聊天记录交给进程内共享的上报器（core/utils/report_spooler.py），不阻塞调用方
+2. 音频在上报器的编码线程池中由Opus转成WAV
+3. 上报器把多个设备的记录攒批、压缩后上报，失败时写入磁盘重试
 """
 
 import time
+from functools import partial
 
 import opuslib_next
 
-from config.manage_api_client import report as manage_report
+from core.utils.report_spooler import get_report_spooler
 
 TAG = __name__
 
 
 def report(conn, type, text, opus_data, report_time):
-    """执行聊天记录上报操作
+    """提交聊天记录上报
 
     Args:
         conn: 连接对象
@@ -28,20 +27,19 @@ def report(conn, type, text, opus_data, report_time):
         opus_data: opus音频数据
         report_time: 上报时间
     """
+    if not text:
+        return
     try:
-        if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
-        else:
-            audio_data = None
-        # 执行上报
-        manage_report(
-            mac_address=conn.device_id,
-            session_id=conn.session_id,
-            chat_type=type,
-            content=text,
-            audio=audio_data,
-            report_time=report_time,
-        )
+        record = {
+            "macAddress": conn.device_id,
+            "sessionId": conn.session_id,
+            "chatType": type,
+            "content": text,
+            "reportTime": report_time,
+            "audioBase64": None,
+        }
+        audio_encoder = partial(opus_to_wav, conn, opus_data) if opus_data else None
+        get_report_spooler(conn.config).submit(record, audio_encoder)
     except Exception as e:
         conn.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
 
@@ -111,14 +109,14 @@ def enqueue_tts_report(conn, text, opus_data):
         opus_data: opus音频数据
     """
     try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
+        # 传入文本和二进制数据而非文件路径，音频由上报器在编码线程池中转换
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((2, text, opus_data, int(time.time())))
+            report(conn, 2, text, opus_data, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((2, text, None, int(time.time())))
+            report(conn, 2, text, None, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
@@ -144,14 +142,14 @@ def enqueue_asr_report(conn, text, opus_data):
         opus_data: opus音频数据
     """
     try:
-        # 使用连接对象的队列，传入文本和二进制数据而非文件路径
+        # 传入文本和二进制数据而非文件路径，音频由上报器在编码线程池中转换
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time())))
+            report(conn, 1, text, opus_data, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((1, text, None, int(time.time())))
+            report(conn, 1, text, None, int(time.time()))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
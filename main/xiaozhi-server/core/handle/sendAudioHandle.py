@@ -1,47 +1,37 @@
 import json
-import asyncio
-import time
 from core.providers.tts.dto.dto import SentenceType
 from core.utils import textUtils
+from core.utils.hot_path_log import hot_event
+from core.utils.tracing import get_turn_trace
 
 TAG = __name__
 
 
 async def sendAudioMessage(conn, sentenceType, audios, text):
     # 发送句子开始消息
-    conn.logger.bind(tag=TAG).info(f"发送音频消息: {sentenceType}, {text}")
+    hot_event("send_audio", conn.device_id, sentence_type=sentenceType, text=text)
 
     pre_buffer = False
-    
-    # 检查是否是本次对话的第一段音频（基于voice_pipeline_start_time存在且未记录过）
-    is_first_audio_of_conversation = (
-        hasattr(conn, 'voice_pipeline_start_time') and 
-        conn.voice_pipeline_start_time and
-        not hasattr(conn, 'first_audio_recorded')
+    trace = get_turn_trace(conn)
+
+    # 本轮对话的第一段音频：首句或者追踪中还没有记录过首包
+    is_first_audio_of_conversation = not trace.finished and not trace.has_mark(
+        "first_audio_sent"
     )
-    
+
     if conn.tts.tts_audio_first_sentence or is_first_audio_of_conversation:
         conn.logger.bind(tag=TAG).info(f"发送第一段语音: {text}")
-        
-        # 记录全链路完成时间
-        if hasattr(conn, 'voice_pipeline_start_time') and conn.voice_pipeline_start_time:
-            first_audio_time = time.monotonic()
-            total_pipeline_duration = first_audio_time - conn.voice_pipeline_start_time
-            conn.logger.bind(tag=TAG).info(f"🔊 第一段音频发送 - 全链路耗时: {total_pipeline_duration:.3f}s")
-            conn.logger.bind(tag=TAG).info(f"📊 【语音反馈链路】🎤接收 → 🗣️识别 → 🧠思考 → 🔊输出: {total_pipeline_duration:.3f}秒")
-            
-            # 标记已记录，避免同一对话重复记录
-            conn.first_audio_recorded = True
-        
         conn.tts.tts_audio_first_sentence = False
         pre_buffer = True
 
     await send_tts_message(conn, "sentence_start", text)
 
-    await sendAudio(conn, audios, pre_buffer)
+    await sendAudio(conn, audios, pre_buffer, trace)
 
     # 发送结束消息（如果是最后一个文本）
     if conn.llm_finish_task and sentenceType == SentenceType.LAST:
+        # 本轮对话结束，导出追踪记录
+        trace.finish()
         await send_tts_message(conn, "stop", None)
         conn.client_is_speaking = False
         if conn.close_after_chat:
@@ -49,41 +39,19 @@ async def sendAudioMessage(conn, sentenceType, audios, text):
 
 
 # 播放音频
-async def sendAudio(conn, audios, pre_buffer=True):
+async def sendAudio(conn, audios, pre_buffer=True, trace=None):
     if audios is None or len(audios) == 0:
         return
-    # 流控参数优化
-    frame_duration = 60  # 帧时长（毫秒），匹配 Opus 编码
-    start_time = time.perf_counter()
-    play_position = 0
-
-    # 仅当第一句话时执行预缓冲
-    if pre_buffer:
-        pre_buffer_frames = min(3, len(audios))
-        for i in range(pre_buffer_frames):
-            await conn.websocket.send(audios[i])
-        remaining_audios = audios[pre_buffer_frames:]
-    else:
-        remaining_audios = audios
-
-    # 播放剩余音频帧
-    for opus_packet in remaining_audios:
-        if conn.client_abort:
-            break
-
-        # 重置没有声音的状态
-        conn.last_activity_time = time.time() * 1000
-
-        # 计算预期发送时间
-        expected_time = start_time + (play_position / 1000)
-        current_time = time.perf_counter()
-        delay = expected_time - current_time
-        if delay > 0:
-            await asyncio.sleep(delay)
-
-        await conn.websocket.send(opus_packet)
-
-        play_position += frame_duration
+    if conn.client_abort:
+        return
+
+    # 由共享的下行调度器按实时速率发送，仅当第一句话时预缓冲；打断时音频流被取消
+    stream = await conn.downlink_scheduler.play(conn, audios, pre_buffer)
+    if pre_buffer and trace is not None and trace.mark("first_audio_sent"):
+        total_pipeline_duration = trace.elapsed()
+        conn.logger.bind(tag=TAG).info(f"🔊 第一段音频发送 - 全链路耗时: {total_pipeline_duration:.3f}s")
+        conn.logger.bind(tag=TAG).info(f"📊 【语音反馈链路】🎤接收 → 🗣️识别 → 🧠思考 → 🔊输出: {total_pipeline_duration:.3f}秒")
+    await stream.wait()
 
 
 async def send_tts_message(conn, state, text=None):
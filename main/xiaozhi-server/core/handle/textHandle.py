@@ -8,6 +8,8 @@ from core.handle.receiveAudioHandle import startToChat, handleAudioMessage
 from core.handle.sendAudioHandle import send_stt_message, send_tts_message
 from core.providers.tools.device_iot import handleIotDescriptors, handleIotStatus
 from core.handle.reportHandle import enqueue_asr_report
+from core.utils.hot_path_log import hot_event
+from core.utils.tracing import start_turn_trace
 import asyncio
 
 TAG = __name__
@@ -18,7 +20,7 @@ async def handleTextMessage(conn, message):
     try:
         msg_json = json.loads(message)
         if isinstance(msg_json, int):
-            conn.logger.bind(tag=TAG).info(f"收到文本消息：{message}")
+            hot_event("text_message", conn.device_id, message=message)
             await conn.websocket.send(message)
             return
         if msg_json["type"] == "hello":
@@ -28,7 +30,8 @@ async def handleTextMessage(conn, message):
             conn.logger.bind(tag=TAG).info(f"收到abort消息：{message}")
             await handleAbortMessage(conn)
         elif msg_json["type"] == "listen":
-            conn.logger.bind(tag=TAG).info(f"收到listen消息：{message}")
+            hot_event("listen_message", conn.device_id, message=message)
+            conn.downlink_controller.on_client_feedback(msg_json)
             if "mode" in msg_json:
                 conn.client_listen_mode = msg_json["mode"]
                 conn.logger.bind(tag=TAG).debug(
@@ -37,16 +40,23 @@ async def handleTextMessage(conn, message):
             if msg_json["state"] == "start":
                 conn.client_have_voice = True
                 conn.client_voice_stop = False
+                # 提前建立识别连接，用户开口时可直接开始流式识别
+                if conn.asr:
+                    conn.asr.prewarm_connection()
             elif msg_json["state"] == "stop":
                 conn.client_have_voice = True
                 conn.client_voice_stop = True
+                # 用户说完话，趁识别和思考的时间测量一次往返时延
+                conn.downlink_controller.probe()
                 if len(conn.asr_audio) > 0:
                     await handleAudioMessage(conn, b"")
             elif msg_json["state"] == "detect":
                 conn.client_have_voice = False
                 conn.asr_audio.clear()
                 if "text" in msg_json:
+                    conn.downlink_controller.probe()
                     conn.last_activity_time = time.time() * 1000
+                    conn.touch_activity()
                     original_text = msg_json["text"]  # 保留原始文本
                     filtered_len, filtered_text = remove_punctuation_and_length(
                         original_text
@@ -63,6 +73,7 @@ async def handleTextMessage(conn, message):
                         await send_tts_message(conn, "stop", None)
                         conn.client_is_speaking = False
                     elif is_wakeup_words:
+                        start_turn_trace(conn)
                         conn.just_woken_up = True
                         # 上报纯文字数据（复用ASR上报功能，但不提供音频数据）
                         enqueue_asr_report(conn, "嘿，你好呀", [])
@@ -70,8 +81,12 @@ async def handleTextMessage(conn, message):
                     else:
                         # 上报纯文字数据（复用ASR上报功能，但不提供音频数据）
                         enqueue_asr_report(conn, original_text, [])
+                        start_turn_trace(conn)
                         # 否则需要LLM对文字内容进行答复
                         await startToChat(conn, original_text)
+        elif msg_json["type"] == "tts":
+            # 设备上报的播放反馈
+            conn.downlink_controller.on_client_feedback(msg_json)
         elif msg_json["type"] == "iot":
             conn.logger.bind(tag=TAG).info(f"收到iot消息：{message}")
             if "descriptors" in msg_json:
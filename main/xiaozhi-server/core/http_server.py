@@ -3,6 +3,7 @@ from aiohttp import web
 from config.logger import setup_logging
 from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
+from core.api.metrics_handler import MetricsHandler
 
 TAG = __name__
 
@@ -13,6 +14,7 @@ class SimpleHttpServer:
         self.logger = setup_logging()
         self.ota_handler = OTAHandler(config)
         self.vision_handler = VisionHandler(config)
+        self.metrics_handler = MetricsHandler(config)
 
     def _get_websocket_url(self, local_ip: str, port: int) -> str:
         """获取websocket地址
@@ -60,6 +62,10 @@ class SimpleHttpServer:
                 ]
             )
 
+            # 运行指标，供Prometheus抓取
+            if server_config.get("metrics_enabled", True):
+                app.add_routes([web.get("/metrics", self.metrics_handler.handle_get)])
+
             # 运行服务
             runner = web.AppRunner(app)
             await runner.setup()
@@ -9,16 +9,25 @@ import requests
 import websockets
 import opuslib_next
 import random
+import threading
 from typing import Optional, Tuple, List
 from urllib import parse
 from datetime import datetime
 from config.logger import setup_logging
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
+from core.utils.ws_pool import get_ws_pool
 
 TAG = __name__
 logger = setup_logging()
 
+# Token在过期前多少秒开始后台刷新
+TOKEN_REFRESH_AHEAD = 300
+
+# 同一AccessKey的所有连接共享Token，避免每个设备连接都请求一次
+_token_cache = {}
+_token_lock = threading.Lock()
+
 
 class AccessToken:
     @staticmethod
@@ -95,6 +104,7 @@ class ASRProvider(ASRProviderBase):
         self.output_dir = config.get("output_dir", "./audio_output")
         self.delete_audio_file = delete_audio_file
         self.expire_time = None
+        self.token_refresh_task = None
 
         # Token管理
         if self.access_key_id and self.access_key_secret:
@@ -102,28 +112,81 @@ class ASRProvider(ASRProviderBase):
         elif not self.token:
             raise ValueError("必须提供access_key_id+access_key_secret或者直接提供token")
 
-    def _refresh_token(self):
-        """刷新Token"""
-        self.token, expire_time_str = AccessToken.create_token(self.access_key_id, self.access_key_secret)
-        if not self.token:
-            raise ValueError("无法获取有效的访问Token")
-        
-        try:
-            expire_str = str(expire_time_str).strip()
-            if expire_str.isdigit():
-                expire_time = datetime.fromtimestamp(int(expire_str))
-            else:
-                expire_time = datetime.strptime(expire_str, "%Y-%m-%dT%H:%M:%SZ")
-            self.expire_time = expire_time.timestamp() - 60
-        except:
-            self.expire_time = None
+        # 预热连接池：设备开始拾音时提前完成握手，识别开始时直接发送StartTranscription
+        pool_max_idle = config.get("pool_max_idle", "1")
+        pool_idle_timeout = config.get("pool_idle_timeout", "8")
+        self.ws_pool = get_ws_pool(
+            "aliyun_stream_asr",
+            self.ws_url,
+            self.appkey,
+            self.access_key_id or self.token,
+            max_idle=int(pool_max_idle) if pool_max_idle not in ("", None) else 1,
+            idle_timeout=float(pool_idle_timeout) if pool_idle_timeout else 8,
+        )
+
+    def _refresh_token(self, force=False):
+        """刷新Token，优先使用其他连接已获取且未临近过期的Token"""
+        with _token_lock:
+            cached = _token_cache.get(self.access_key_id)
+            if cached and not force:
+                token, expire_time = cached
+                if expire_time is None or time.time() < expire_time - TOKEN_REFRESH_AHEAD:
+                    self.token, self.expire_time = token, expire_time
+                    return
+
+            token, expire_time_str = AccessToken.create_token(self.access_key_id, self.access_key_secret)
+            if not token:
+                raise ValueError("无法获取有效的访问Token")
+            self.token = token
+
+            try:
+                expire_str = str(expire_time_str).strip()
+                if expire_str.isdigit():
+                    expire_time = datetime.fromtimestamp(int(expire_str))
+                else:
+                    expire_time = datetime.strptime(expire_str, "%Y-%m-%dT%H:%M:%SZ")
+                self.expire_time = expire_time.timestamp() - 60
+            except:
+                self.expire_time = None
+            _token_cache[self.access_key_id] = (self.token, self.expire_time)
 
     def _is_token_expired(self):
         """检查Token是否过期"""
         return self.expire_time and time.time() > self.expire_time
 
+    async def _token_refresh_loop(self, conn):
+        """在Token过期前后台刷新，识别开始时无需再同步请求Token"""
+        while not conn.stop_event.is_set():
+            if self.expire_time and time.time() > self.expire_time - TOKEN_REFRESH_AHEAD:
+                try:
+                    await asyncio.to_thread(self._refresh_token)
+                    logger.bind(tag=TAG).info("Token已在后台刷新")
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"后台刷新Token失败: {e}")
+            await asyncio.sleep(30)
+
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
+        if self.access_key_id and self.access_key_secret:
+            self.token_refresh_task = asyncio.create_task(self._token_refresh_loop(conn))
+
+    def prewarm_connection(self):
+        """设备开始拾音时预热一条识别连接"""
+        if not self.is_processing:
+            self.ws_pool.prewarm(self._connect)
+
+    async def _connect(self):
+        """完成一次新的TLS+WebSocket握手"""
+        if self._is_token_expired():
+            await asyncio.to_thread(self._refresh_token)
+        return await websockets.connect(
+            self.ws_url,
+            additional_headers={"X-NLS-Token": self.token},
+            max_size=1000000000,
+            ping_interval=None,
+            ping_timeout=None,
+            close_timeout=5,
+        )
 
     async def receive_audio(self, conn, audio, audio_have_voice):
         # 初始化音频缓存
@@ -156,19 +219,8 @@ class ASRProvider(ASRProviderBase):
 
     async def _start_recognition(self, conn):
         """开始识别会话"""
-        if self._is_token_expired():
-            self._refresh_token()
-        
-        # 建立连接
-        headers = {"X-NLS-Token": self.token}
-        self.asr_ws = await websockets.connect(
-            self.ws_url,
-            additional_headers=headers,
-            max_size=1000000000,
-            ping_interval=None,
-            ping_timeout=None,
-            close_timeout=5,
-        )
+        # 优先取用预热好的连接
+        self.asr_ws = await self.ws_pool.acquire(self._connect)
         
         self.is_processing = True
         self.server_ready = False  # 重置服务器准备状态
@@ -340,4 +392,7 @@ class ASRProvider(ASRProviderBase):
 
     async def close(self):
         """关闭资源"""
-        await self._cleanup()
+        if self.token_refresh_task:
+            self.token_refresh_task.cancel()
+            self.token_refresh_task = None
+        await self._cleanup(None)
@@ -16,6 +16,7 @@ from typing import Optional, Tuple, List, Dict, Any
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
+from core.utils.tracing import start_turn_trace, provider_name
 from core.handle.receiveAudioHandle import handleAudioMessage
 
 TAG = __name__
@@ -33,6 +34,10 @@ class ASRProviderBase(ABC):
         )
         conn.asr_priority_thread.start()
 
+    # 设备开始拾音时预热到识别服务的连接，需在事件循环中调用，默认不做处理
+    def prewarm_connection(self):
+        pass
+
     # 有序处理ASR音频
     def asr_text_priority_thread(self, conn):
         while not conn.stop_event.is_set():
@@ -88,12 +93,18 @@ class ASRProviderBase(ABC):
     async def handle_voice_stop(self, conn, asr_audio_task: List[bytes]):
         """并行处理ASR和声纹识别"""
         try:
-            total_start_time = time.monotonic()
-            # 记录全链路开始时间
-            conn.voice_pipeline_start_time = total_start_time
-            # 重置记录标志，确保每次新的语音输入都能记录全链路时间
-            if hasattr(conn, 'first_audio_recorded'):
-                delattr(conn, 'first_audio_recorded')
+            # 开始本轮对话的链路追踪，以用户说完话为起点
+            trace = start_turn_trace(conn)
+            total_start_time = trace.start_time
+            # VAD从最后一次检测到声音到判定说完话的等待时间
+            if conn.last_activity_time > 0:
+                vad_wait = max(0.0, trace.start_wall_time - conn.last_activity_time / 1000)
+                trace.add_span(
+                    "vad_end_of_speech",
+                    total_start_time - vad_wait,
+                    total_start_time,
+                    provider_name(conn, "VAD"),
+                )
             logger.bind(tag=TAG).info(f"🎤 语音处理开始 - 开始时间: {total_start_time:.3f}")
             
             # 准备音频数据
@@ -123,12 +134,22 @@ class ASRProviderBase(ABC):
                         )
                         end_time = time.monotonic()
                         logger.bind(tag=TAG).info(f"ASR耗时: {end_time - start_time:.3f}s")
+                        trace.add_span(
+                            "asr",
+                            start_time,
+                            end_time,
+                            provider_name(conn, "ASR"),
+                            text_len=len(result[0] or ""),
+                        )
                         return result
                     finally:
                         loop.close()
                 except Exception as e:
                     end_time = time.monotonic()
                     logger.bind(tag=TAG).error(f"ASR失败: {e}")
+                    trace.add_span(
+                        "asr", start_time, end_time, provider_name(conn, "ASR"), error=True
+                    )
                     return ("", None)
             
             # 定义声纹识别任务
@@ -140,9 +161,10 @@ class ASRProviderBase(ABC):
                     asyncio.set_event_loop(loop)
                     try:
                         # 使用连接的声纹识别提供者
-                        result = loop.run_until_complete(
-                            conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id)
-                        )
+                        with trace.span("voiceprint"):
+                            result = loop.run_until_complete(
+                                conn.voiceprint_provider.identify_speaker(wav_data, conn.session_id)
+                            )
                         return result
                     finally:
                         loop.close()
@@ -178,9 +200,8 @@ class ASRProviderBase(ABC):
                 logger.bind(tag=TAG).info(f"识别文本: {raw_text}")
                 # 记录ASR完成时间
                 asr_complete_time = time.monotonic()
-                conn.asr_complete_time = asr_complete_time
                 asr_duration = asr_complete_time - total_start_time
-                pipeline_duration = asr_complete_time - conn.voice_pipeline_start_time
+                pipeline_duration = trace.elapsed()
                 logger.bind(tag=TAG).info(f"🗣️ ASR识别完成 - 耗时: {asr_duration:.3f}s, 从语音开始: {pipeline_duration:.3f}s")
             if speaker_name:
                 logger.bind(tag=TAG).info(f"识别说话人: {speaker_name}")
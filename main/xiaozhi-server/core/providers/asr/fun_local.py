@@ -10,6 +10,7 @@ from funasr import AutoModel
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
 import shutil
 from core.providers.asr.dto.dto import InterfaceType
+from core.utils.asr_inference_service import ASRInferenceService
 
 TAG = __name__
 logger = setup_logging()
@@ -52,6 +53,14 @@ class ASRProvider(ASRProviderBase):
 
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
+
+        # 固定推理线程数，避免多个连接的推理互相抢占CPU
+        num_threads = config.get("num_threads")
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(int(num_threads))
+
         with CaptureOutput():
             self.model = AutoModel(
                 model=self.model_dir,
@@ -61,6 +70,27 @@ class ASRProvider(ASRProviderBase):
                 # device="cuda:0",  # 启用GPU加速
             )
 
+        # 所有连接共享的批量推理服务
+        self.inference_service = ASRInferenceService(
+            "fun_local",
+            self._batch_generate,
+            batch_window_ms=config.get("batch_window_ms", 20),
+            max_batch_size=config.get("max_batch_size", 8),
+            num_workers=config.get("inference_workers", 1),
+        )
+
+    def _batch_generate(self, pcm_batch: List[bytes]) -> List[str]:
+        """一次推理处理多条语音"""
+        result = self.model.generate(
+            input=pcm_batch,
+            cache={},
+            language="auto",
+            use_itn=True,
+            batch_size=len(pcm_batch),
+            batch_size_s=60,
+        )
+        return [rich_transcription_postprocess(item["text"]) for item in result]
+
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, audio_format="opus"
     ) -> Tuple[Optional[str], Optional[str]]:
@@ -92,14 +122,7 @@ class ASRProvider(ASRProviderBase):
 
                 # 语音识别
                 start_time = time.time()
-                result = self.model.generate(
-                    input=combined_pcm_data,
-                    cache={},
-                    language="auto",
-                    use_itn=True,
-                    batch_size_s=60,
-                )
-                text = rich_transcription_postprocess(result[0]["text"])
+                text = await self.inference_service.infer(combined_pcm_data)
                 logger.bind(tag=TAG).debug(
                     f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
                 )
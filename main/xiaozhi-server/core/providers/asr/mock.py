@@ -0,0 +1,50 @@
+"""
+模拟语音识别，用于离线性能测试
+不调用任何模型或网络服务，按配置的延迟返回固定文本，
+同一段录音总是得到同一条识别结果，便于压测结果之间对比
+"""
+
+import asyncio
+from typing import Optional, Tuple, List
+from config.logger import setup_logging
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+
+TAG = __name__
+logger = setup_logging()
+
+# 每个Opus包的时长（秒）
+FRAME_DURATION = 0.06
+
+
+class ASRProvider(ASRProviderBase):
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        # 不保存任何连接状态，所有连接共享一个实例
+        self.interface_type = InterfaceType.LOCAL
+        self.delete_audio_file = delete_audio_file
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.transcripts = config.get("transcripts") or ["你好，今天天气怎么样"]
+        self.delay_ms = float(config.get("delay_ms", 200))
+        # 每秒音频额外增加的识别耗时，模拟识别耗时随音频长度增长
+        self.delay_per_second_ms = float(config.get("delay_per_second_ms", 20))
+        # 是否像真实识别一样解码Opus，计入解码的CPU开销
+        self.decode_audio = str(config.get("decode_audio", False)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if self.decode_audio and audio_format != "pcm":
+            self.decode_opus(opus_data)
+        audio_seconds = len(opus_data) * FRAME_DURATION
+        await asyncio.sleep(
+            (self.delay_ms + self.delay_per_second_ms * audio_seconds) / 1000
+        )
+        # 按音频包数选择识别结果，同一段录音的结果固定
+        text = self.transcripts[len(opus_data) % len(self.transcripts)]
+        logger.bind(tag=TAG).debug(f"模拟识别结果: {text}")
+        return text, None
@@ -7,6 +7,7 @@ from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
 from core.providers.asr.base import ASRProviderBase
+from core.utils.asr_inference_service import ASRInferenceService
 
 import numpy as np
 import sherpa_onnx
@@ -42,6 +43,8 @@ class ASRProvider(ASRProviderBase):
         self.output_dir = config.get("output_dir")
         self.model_type = config.get("model_type", "sense_voice")  # 支持 paraformer
         self.delete_audio_file = delete_audio_file
+        # 模型内部计算线程数
+        self.num_threads = int(config.get("num_threads", 2))
 
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
@@ -78,7 +81,7 @@ class ASRProvider(ASRProviderBase):
                 self.model = sherpa_onnx.OfflineRecognizer.from_paraformer(
                     paraformer=self.model_path,
                     tokens=self.tokens_path,
-                    num_threads=2,
+                    num_threads=self.num_threads,
                     sample_rate=16000,
                     feature_dim=80,
                     decoding_method="greedy_search",
@@ -88,7 +91,7 @@ class ASRProvider(ASRProviderBase):
                 self.model = sherpa_onnx.OfflineRecognizer.from_sense_voice(
                     model=self.model_path,
                     tokens=self.tokens_path,
-                    num_threads=2,
+                    num_threads=self.num_threads,
                     sample_rate=16000,
                     feature_dim=80,
                     decoding_method="greedy_search",
@@ -96,6 +99,26 @@ class ASRProvider(ASRProviderBase):
                     use_itn=True,
                 )
 
+        # 所有连接共享的批量推理服务
+        self.inference_service = ASRInferenceService(
+            "sherpa_onnx_local",
+            self._batch_decode,
+            batch_window_ms=config.get("batch_window_ms", 20),
+            max_batch_size=config.get("max_batch_size", 8),
+            num_workers=config.get("inference_workers", 1),
+        )
+
+    def _batch_decode(self, pcm_batch: List[bytes]) -> List[str]:
+        """一次decode_streams处理多条语音"""
+        streams = []
+        for pcm in pcm_batch:
+            samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+            stream = self.model.create_stream()
+            stream.accept_waveform(16000, samples)
+            streams.append(stream)
+        self.model.decode_streams(streams)
+        return [stream.result.text for stream in streams]
+
     def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
         """
         Args:
@@ -126,24 +149,22 @@ class ASRProvider(ASRProviderBase):
         """语音转文本主处理逻辑"""
         file_path = None
         try:
-            # 保存音频文件
-            start_time = time.time()
             if audio_format == "pcm":
                 pcm_data = opus_data
             else:
                 pcm_data = self.decode_opus(opus_data)
-            file_path = self.save_audio_to_file(pcm_data, session_id)
-            logger.bind(tag=TAG).debug(
-                f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
-            )
+
+            # 需要保留音频时才落盘，识别直接使用内存中的PCM
+            if not self.delete_audio_file:
+                start_time = time.time()
+                file_path = self.save_audio_to_file(pcm_data, session_id)
+                logger.bind(tag=TAG).debug(
+                    f"音频文件保存耗时: {time.time() - start_time:.3f}s | 路径: {file_path}"
+                )
 
             # 语音识别
             start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            text = await self.inference_service.infer(b"".join(pcm_data))
             logger.bind(tag=TAG).debug(
                 f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
             )
@@ -0,0 +1,51 @@
+import time
+import asyncio
+from config.logger import setup_logging
+from typing import Optional, Tuple, List
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+from core.utils.model_worker import get_model_worker_client
+
+TAG = __name__
+logger = setup_logging()
+
+
+class ASRProvider(ASRProviderBase):
+    """把识别请求转发给本地模型工作进程"""
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        # 与本地模型一样，一个实例被所有连接共享
+        self.interface_type = InterfaceType.LOCAL
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.delete_audio_file = delete_audio_file
+        self.client = get_model_worker_client()
+        if self.client is None:
+            raise RuntimeError("本地模型多进程服务未启用")
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, audio_format="opus"
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """语音转文本主处理逻辑"""
+        file_path = None
+        try:
+            if audio_format == "pcm":
+                pcm_data = opus_data
+            else:
+                pcm_data = self.decode_opus(opus_data)
+
+            if not self.delete_audio_file:
+                file_path = self.save_audio_to_file(pcm_data, session_id)
+
+            start_time = time.time()
+            text = await asyncio.wait_for(
+                asyncio.wrap_future(self.client.infer_asr(b"".join(pcm_data))),
+                timeout=self.client.timeout,
+            )
+            logger.bind(tag=TAG).debug(
+                f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
+            )
+            return text, file_path
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"模型进程语音识别失败: {e}")
+            return "", file_path
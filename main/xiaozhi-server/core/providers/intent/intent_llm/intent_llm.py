@@ -137,12 +137,11 @@ class IntentProvider(IntentProviderBase):
             return cached_intent
 
         if self.promot == "":
-            functions = conn.func_handler.get_functions()
+            # 函数列表由多个连接共享，复制后再追加
+            functions = list(conn.func_handler.get_functions() or [])
             if hasattr(conn, "mcp_client"):
                 mcp_tools = conn.mcp_client.get_available_tools()
                 if mcp_tools is not None and len(mcp_tools) > 0:
-                    if functions is None:
-                        functions = []
                     functions.extend(mcp_tools)
 
             self.promot = self.get_intent_system_prompt(functions)
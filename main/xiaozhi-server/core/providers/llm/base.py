@@ -26,6 +26,13 @@ class LLMProviderBase(ABC):
             logger.bind(tag=TAG).error(f"Error in Ollama response generation: {e}")
             return "【LLM服务响应异常】"
     
+    def release_session(self, session_id):
+        """
+        连接关闭时释放会话级状态
+        同一实例会被相同配置的多个连接共享，保存了按session_id划分的状态的提供者需要重写此方法
+        """
+        pass
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
@@ -19,6 +19,9 @@ class LLMProvider(LLMProviderBase):
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
 
+    def release_session(self, session_id):
+        self.session_conversation_map.pop(session_id, None)
+
     def response(self, session_id, dialogue, **kwargs):
         try:
             # 取最后一条用户消息
@@ -95,7 +98,10 @@ class LLMProvider(LLMProviderBase):
         if len(dialogue) == 2 and functions is not None and len(functions) > 0:
             # 第一次调用llm， 取最后一条用户消息，附加tool提示词
             last_msg = dialogue[-1]["content"]
-            function_str = json.dumps(functions, ensure_ascii=False)
+            # 共享的函数列表带有预先序列化的JSON
+            function_str = getattr(functions, "json", None) or json.dumps(
+                functions, ensure_ascii=False
+            )
             modify_msg = get_system_prompt_for_function(function_str) + last_msg
             dialogue[-1]["content"] = modify_msg
 
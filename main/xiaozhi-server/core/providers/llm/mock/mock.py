@@ -0,0 +1,79 @@
+"""
+模拟大语言模型，用于离线性能测试
+按配置的首字延迟和输出速率流式返回固定回复；
+用户消息命中关键词且该函数可用时返回工具调用，工具结果返回后再给出固定回复
+"""
+
+import json
+import time
+import uuid
+from types import SimpleNamespace
+from config.logger import setup_logging
+from core.providers.llm.base import LLMProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+
+class LLMProvider(LLMProviderBase):
+    def __init__(self, config):
+        self.reply = config.get(
+            "reply", "好的，这是一条用于性能测试的模拟回复。内容固定，便于对比不同版本的服务端开销。"
+        )
+        self.tool_reply = config.get("tool_reply", "已经帮你处理好了。")
+        self.first_token_ms = float(config.get("first_token_ms", 300))
+        self.tokens_per_second = float(config.get("tokens_per_second", 30))
+        self.chars_per_token = max(1, int(config.get("chars_per_token", 2)))
+        # [{keyword: 关键词, name: 函数名, arguments: {参数}}]
+        self.tool_calls = config.get("tool_calls") or []
+
+    def _stream(self, text):
+        """按首字延迟和输出速率切分文本"""
+        start = time.monotonic() + self.first_token_ms / 1000
+        interval = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+        for i, pos in enumerate(range(0, len(text), self.chars_per_token)):
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            yield text[pos : pos + self.chars_per_token]
+
+    def _match_tool_call(self, dialogue, functions):
+        if not functions or not dialogue or dialogue[-1].get("role") != "user":
+            return None
+        available = {
+            function.get("function", {}).get("name") for function in functions
+        }
+        content = str(dialogue[-1].get("content") or "")
+        for tool_call in self.tool_calls:
+            keyword = tool_call.get("keyword")
+            if keyword and keyword in content and tool_call.get("name") in available:
+                return tool_call
+        return None
+
+    def response(self, session_id, dialogue, **kwargs):
+        text = self.reply
+        if dialogue and dialogue[-1].get("role") == "tool":
+            text = self.tool_reply
+        yield from self._stream(text)
+
+    def response_with_functions(self, session_id, dialogue, functions=None):
+        tool_call = self._match_tool_call(dialogue, functions)
+        if tool_call is None:
+            for token in self.response(session_id, dialogue):
+                yield token, None
+            return
+
+        time.sleep(self.first_token_ms / 1000)
+        logger.bind(tag=TAG).debug(f"模拟工具调用: {tool_call.get('name')}")
+        yield None, [
+            SimpleNamespace(
+                id=uuid.uuid4().hex,
+                type="function",
+                function=SimpleNamespace(
+                    name=tool_call["name"],
+                    arguments=json.dumps(
+                        tool_call.get("arguments") or {}, ensure_ascii=False
+                    ),
+                ),
+            )
+        ]
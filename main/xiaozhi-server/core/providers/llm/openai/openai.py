@@ -112,7 +112,7 @@ class LLMProvider(LLMProviderBase):
             if hasattr(self.client._client, '_mounts'):
                 logger.bind(tag=TAG).info(f"HTTPx客户端配置: {self.client._client._mounts}")
             
-            logger.bind(tag=TAG).debug(f"LLM完整请求参数: {request_params}")
+            logger.bind(tag=TAG).debug("LLM完整请求参数: {}", request_params)
             
             # 记录请求开始时间
             import time
@@ -129,6 +129,7 @@ class LLMProvider(LLMProviderBase):
             full_response = ""  # 收集完整响应
             chunk_count = 0
             first_content_time = None
+            chunk_logger = logger.bind(tag=TAG)
             
             for chunk in responses:
                 chunk_count += 1
@@ -136,7 +137,13 @@ class LLMProvider(LLMProviderBase):
                 
                 try:
                     # 记录原始chunk数据
-                    logger.bind(tag=TAG).debug(f"LLM响应chunk #{chunk_count} - 时间: {chunk_time - request_start:.3f}s: {chunk}")
+                    # 参数延迟格式化，日志级别高于DEBUG时不会把chunk转成字符串
+                    chunk_logger.debug(
+                        "LLM响应chunk #{} - 时间: {:.3f}s: {}",
+                        chunk_count,
+                        chunk_time - request_start,
+                        chunk,
+                    )
                     
                     # 检查是否存在有效的choice且content不为空
                     delta = (
@@ -199,7 +206,7 @@ class LLMProvider(LLMProviderBase):
             logger.bind(tag=TAG).info(f"LLM函数调用请求参数: model={request_params['model']}, "
                                     f"messages_count={len(request_params['messages'])}, "
                                     f"tools_count={len(functions) if functions else 0}")
-            logger.bind(tag=TAG).debug(f"LLM函数调用完整请求参数: {request_params}")
+            logger.bind(tag=TAG).debug("LLM函数调用完整请求参数: {}", request_params)
             
             # 记录函数调用请求开始时间
             import time
@@ -215,12 +222,13 @@ class LLMProvider(LLMProviderBase):
             full_response = ""  # 收集完整响应
             function_calls = []  # 收集函数调用
             chunk_count = 0
+            chunk_logger = logger.bind(tag=TAG)
             for chunk in stream:
                 chunk_count += 1
                 chunk_time = time.time()
                 
                 # 只记录有内容的chunk
-                logger.bind(tag=TAG).debug(f"LLM函数调用响应chunk #{chunk_count}: {chunk}")
+                chunk_logger.debug("LLM函数调用响应chunk #{}: {}", chunk_count, chunk)
                 
                 # 检查是否存在有效的choice且content不为空
                 if getattr(chunk, "choices", None):
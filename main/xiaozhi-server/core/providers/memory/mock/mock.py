@@ -0,0 +1,26 @@
+"""
+模拟记忆服务，用于离线性能测试
+按配置的延迟返回固定记忆，不保存任何数据
+"""
+
+import asyncio
+from ..base import MemoryProviderBase, logger
+
+TAG = __name__
+
+
+class MemoryProvider(MemoryProviderBase):
+    def __init__(self, config, summary_memory=None):
+        super().__init__(config)
+        self.memory = config.get("memory", "")
+        self.query_delay_ms = float(config.get("query_delay_ms", 50))
+        self.save_delay_ms = float(config.get("save_delay_ms", 200))
+
+    async def save_memory(self, msgs):
+        await asyncio.sleep(self.save_delay_ms / 1000)
+        logger.bind(tag=TAG).debug(f"mock mode: skip saving {len(msgs)} messages.")
+        return None
+
+    async def query_memory(self, query: str) -> str:
+        await asyncio.sleep(self.query_delay_ms / 1000)
+        return self.memory
@@ -1,11 +1,13 @@
 """设备端IoT工具模块"""
 
 from .iot_descriptor import IotDescriptor
+from .iot_state import IotStateStore
 from .iot_handler import handleIotDescriptors, handleIotStatus
 from .iot_executor import DeviceIoTExecutor
 
 __all__ = [
     "IotDescriptor",
+    "IotStateStore",
     "handleIotDescriptors",
     "handleIotStatus",
     "DeviceIoTExecutor",
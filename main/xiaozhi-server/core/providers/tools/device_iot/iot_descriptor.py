@@ -5,15 +5,27 @@ from config.logger import setup_logging
 TAG = __name__
 logger = setup_logging()
 
+# 描述中的属性类型对应的Python类型，bool是int的子类，数值类型需单独排除
+_VALUE_TYPES = {
+    "number": (int, float),
+    "boolean": (bool,),
+    "string": (str,),
+}
+
 
 class IotDescriptor:
     """IoT设备描述符"""
 
-    def __init__(self, name, description, properties, methods):
+    def __init__(self, name, description, properties, methods, type_id=None):
         self.name = name
         self.description = description
+        # 设备能力签名，属性和方法不变时复用同一描述符，保留已上报的状态
+        self.type_id = type_id
         self.properties = []
         self.methods = []
+        # 属性名 -> 属性，方法名 -> 方法
+        self.property_index = {}
+        self.method_index = {}
 
         # 根据描述创建属性
         if properties is not None:
@@ -21,6 +33,7 @@ class IotDescriptor:
                 property_item = {}
                 property_item["name"] = key
                 property_item["description"] = value["description"]
+                property_item["type"] = value["type"]
                 if value["type"] == "number":
                     property_item["value"] = 0
                 elif value["type"] == "boolean":
@@ -28,6 +41,7 @@ class IotDescriptor:
                 else:
                     property_item["value"] = ""
                 self.properties.append(property_item)
+                self.property_index[key] = property_item
 
         # 根据描述创建方法
         if methods is not None:
@@ -44,3 +58,25 @@ class IotDescriptor:
                             "type": v["type"],
                         }
                 self.methods.append(method)
+                self.method_index[key] = method
+
+    def get_value(self, property_name):
+        property_item = self.property_index.get(property_name)
+        return None if property_item is None else property_item["value"]
+
+    def set_value(self, property_name, value) -> bool:
+        """按属性类型更新状态，属性不存在或类型不匹配时返回False"""
+        property_item = self.property_index.get(property_name)
+        if property_item is None:
+            return False
+        expected = _VALUE_TYPES.get(property_item["type"])
+        if expected is None:
+            # 未知类型沿用初始值的类型
+            expected = (type(property_item["value"]),)
+        if not isinstance(value, expected) or (
+            isinstance(value, bool) and bool not in expected
+        ):
+            logger.bind(tag=TAG).error(f"属性{property_name}的值类型不匹配")
+            return False
+        property_item["value"] = value
+        return True
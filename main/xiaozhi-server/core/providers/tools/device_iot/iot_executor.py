@@ -2,9 +2,11 @@
 
 import json
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from ..base import ToolType, ToolDefinition, ToolExecutor
 from plugins_func.register import Action, ActionResponse
+from ..schema_registry import schema_registry
+from .iot_state import generate_device_type_id
 
 
 class DeviceIoTExecutor(ToolExecutor):
@@ -13,6 +15,11 @@ class DeviceIoTExecutor(ToolExecutor):
     def __init__(self, conn):
         self.conn = conn
         self.iot_tools: Dict[str, ToolDefinition] = {}
+        # 工具名 -> (设备名, 属性名或方法名)，执行时不必从工具名中解析
+        self.tool_targets: Dict[str, Tuple[str, str]] = {}
+        # 设备名 -> 已注册的能力签名和工具名
+        self.device_type_ids: Dict[str, str] = {}
+        self.device_tools: Dict[str, List[str]] = {}
 
     async def execute(
         self, conn, tool_name: str, arguments: Dict[str, Any]
@@ -24,119 +31,101 @@ class DeviceIoTExecutor(ToolExecutor):
             )
 
         try:
-            # 解析工具名称，获取设备名和操作类型
+            device_name, member_name = self.tool_targets[tool_name]
             if tool_name.startswith("get_"):
                 # 查询操作：get_devicename_property
-                parts = tool_name.split("_", 2)
-                if len(parts) >= 3:
-                    device_name = parts[1]
-                    property_name = parts[2]
-
-                    value = await self._get_iot_status(device_name, property_name)
-                    if value is not None:
-                        # 处理响应模板
-                        response_success = arguments.get(
-                            "response_success", "查询成功：{value}"
-                        )
-                        response = response_success.replace("{value}", str(value))
-
-                        return ActionResponse(
-                            action=Action.RESPONSE,
-                            response=response,
-                        )
-                    else:
-                        response_failure = arguments.get(
-                            "response_failure", f"无法获取{device_name}的状态"
-                        )
-                        return ActionResponse(
-                            action=Action.ERROR, response=response_failure
-                        )
-            else:
-                # 控制操作：devicename_method
-                parts = tool_name.split("_", 1)
-                if len(parts) >= 2:
-                    device_name = parts[0]
-                    method_name = parts[1]
-
-                    # 提取控制参数（排除响应参数）
-                    control_params = {
-                        k: v
-                        for k, v in arguments.items()
-                        if k not in ["response_success", "response_failure"]
-                    }
-
-                    # 发送IoT控制命令
-                    await self._send_iot_command(
-                        device_name, method_name, control_params
+                value = self.conn.iot_store.get_value(device_name, member_name)
+                if value is not None:
+                    # 处理响应模板
+                    response_success = arguments.get(
+                        "response_success", "查询成功：{value}"
                     )
-
-                    # 等待状态更新
-                    await asyncio.sleep(0.1)
-
-                    response_success = arguments.get("response_success", "操作成功")
-
-                    # 处理响应中的占位符
-                    for param_name, param_value in control_params.items():
-                        placeholder = "{" + param_name + "}"
-                        if placeholder in response_success:
-                            response_success = response_success.replace(
-                                placeholder, str(param_value)
-                            )
-                        if "{value}" in response_success:
-                            response_success = response_success.replace(
-                                "{value}", str(param_value)
-                            )
-                            break
+                    response = response_success.replace("{value}", str(value))
 
                     return ActionResponse(
-                        action=Action.REQLLM,
-                        result=response_success,
+                        action=Action.RESPONSE,
+                        response=response,
                     )
+                else:
+                    response_failure = arguments.get(
+                        "response_failure", f"无法获取{device_name}的状态"
+                    )
+                    return ActionResponse(action=Action.ERROR, response=response_failure)
+            else:
+                # 控制操作：devicename_method
+                # 提取控制参数（排除响应参数）
+                control_params = {
+                    k: v
+                    for k, v in arguments.items()
+                    if k not in ["response_success", "response_failure"]
+                }
+
+                # 发送IoT控制命令
+                await self._send_iot_command(device_name, member_name, control_params)
+
+                # 等待状态更新
+                await asyncio.sleep(0.1)
+
+                response_success = arguments.get("response_success", "操作成功")
+
+                # 处理响应中的占位符
+                for param_name, param_value in control_params.items():
+                    placeholder = "{" + param_name + "}"
+                    if placeholder in response_success:
+                        response_success = response_success.replace(
+                            placeholder, str(param_value)
+                        )
+                    if "{value}" in response_success:
+                        response_success = response_success.replace(
+                            "{value}", str(param_value)
+                        )
+                        break
 
-            return ActionResponse(action=Action.ERROR, response="无法解析IoT工具名称")
+                return ActionResponse(
+                    action=Action.REQLLM,
+                    result=response_success,
+                )
 
         except Exception as e:
             response_failure = arguments.get("response_failure", "操作失败")
             return ActionResponse(action=Action.ERROR, response=response_failure)
 
-    async def _get_iot_status(self, device_name: str, property_name: str):
-        """获取IoT设备状态"""
-        for key, value in self.conn.iot_descriptors.items():
-            if key.lower() == device_name.lower():
-                for property_item in value.properties:
-                    if property_item["name"].lower() == property_name.lower():
-                        return property_item["value"]
-        return None
-
     async def _send_iot_command(
         self, device_name: str, method_name: str, parameters: Dict[str, Any]
     ):
         """发送IoT控制命令"""
-        for key, value in self.conn.iot_descriptors.items():
-            if key.lower() == device_name.lower():
-                for method in value.methods:
-                    if method["name"].lower() == method_name.lower():
-                        command = {
-                            "name": key,
-                            "method": method["name"],
-                        }
-
-                        if parameters:
-                            command["parameters"] = parameters
-
-                        send_message = json.dumps(
-                            {"type": "iot", "commands": [command]}
-                        )
-                        await self.conn.websocket.send(send_message)
-                        return
-
-        raise Exception(f"未找到设备{device_name}的方法{method_name}")
-
-    def register_iot_tools(self, descriptors: list):
-        """注册IoT工具"""
+        device = self.conn.iot_store.get_device(device_name)
+        if device is None or method_name not in device.method_index:
+            raise Exception(f"未找到设备{device_name}的方法{method_name}")
+
+        command = {
+            "name": device_name,
+            "method": method_name,
+        }
+
+        if parameters:
+            command["parameters"] = parameters
+
+        send_message = json.dumps({"type": "iot", "commands": [command]})
+        await self.conn.websocket.send(send_message)
+
+    def register_iot_tools(self, descriptors: list) -> int:
+        """
+        注册IoT工具，能力签名未变化的设备跳过
+        Returns:
+            int: 重新注册了工具的设备数
+        """
+        changed = 0
         for descriptor in descriptors:
             device_name = descriptor["name"]
             device_desc = descriptor["description"]
+            type_id = generate_device_type_id(descriptor)
+            if self.device_type_ids.get(device_name) == type_id:
+                continue
+            self._unregister_device(device_name)
+            self.device_type_ids[device_name] = type_id
+            device_tools = self.device_tools[device_name] = []
+            changed += 1
 
             # 注册查询工具
             if "properties" in descriptor:
@@ -167,9 +156,11 @@ class DeviceIoTExecutor(ToolExecutor):
 
                     self.iot_tools[tool_name] = ToolDefinition(
                         name=tool_name,
-                        description=tool_desc,
+                        description=schema_registry.intern(tool_desc),
                         tool_type=ToolType.DEVICE_IOT,
                     )
+                    self.tool_targets[tool_name] = (device_name, prop_name)
+                    device_tools.append(tool_name)
 
             # 注册控制工具
             if "methods" in descriptor:
@@ -225,9 +216,19 @@ class DeviceIoTExecutor(ToolExecutor):
 
                     self.iot_tools[tool_name] = ToolDefinition(
                         name=tool_name,
-                        description=tool_desc,
+                        description=schema_registry.intern(tool_desc),
                         tool_type=ToolType.DEVICE_IOT,
                     )
+                    self.tool_targets[tool_name] = (device_name, method_name)
+                    device_tools.append(tool_name)
+        return changed
+
+    def _unregister_device(self, device_name: str):
+        """移除设备此前注册的工具"""
+        for tool_name in self.device_tools.pop(device_name, []):
+            self.iot_tools.pop(tool_name, None)
+            self.tool_targets.pop(tool_name, None)
+        self.device_type_ids.pop(device_name, None)
 
     def get_tools(self) -> Dict[str, ToolDefinition]:
         """获取所有设备端IoT工具"""
@@ -0,0 +1,89 @@
+"""IoT设备状态存储，按设备名和属性名索引，状态消息只做字典查找"""
+
+from typing import Any, Dict, List, Optional
+from config.logger import setup_logging
+from plugins_func.register import DeviceTypeRegistry
+from .iot_descriptor import IotDescriptor
+
+TAG = __name__
+logger = setup_logging()
+
+_device_type_registry = DeviceTypeRegistry()
+
+
+def generate_device_type_id(descriptor: Dict[str, Any]) -> str:
+    """设备能力签名：设备名、属性名和方法名，描述文字变化不影响签名"""
+    return _device_type_registry.generate_device_type_id(descriptor)
+
+
+def normalize_descriptor(descriptor: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """补全缺失的properties和methods，没有任何能力的描述返回None"""
+    # 如果descriptor没有properties和methods，则直接跳过
+    if "properties" not in descriptor and "methods" not in descriptor:
+        return None
+
+    # 处理缺失properties的情况
+    if "properties" not in descriptor:
+        descriptor["properties"] = {}
+        # 从methods中提取所有参数作为properties
+        for method_info in descriptor["methods"].values():
+            for param_name, param_info in method_info.get("parameters", {}).items():
+                # 将参数信息转换为属性信息
+                descriptor["properties"][param_name] = {
+                    "description": param_info["description"],
+                    "type": param_info["type"],
+                }
+    descriptor.setdefault("methods", {})
+    return descriptor
+
+
+class IotStateStore:
+    """连接上所有IoT设备的描述符和状态"""
+
+    def __init__(self):
+        self.devices: Dict[str, IotDescriptor] = {}
+
+    def update_descriptors(self, descriptors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        更新设备描述，能力签名不变的设备保留原描述符和已上报的状态
+        Returns:
+            list: 补全后的有效描述
+        """
+        valid = []
+        for descriptor in descriptors:
+            descriptor = normalize_descriptor(descriptor)
+            if descriptor is None:
+                continue
+            valid.append(descriptor)
+            type_id = generate_device_type_id(descriptor)
+            existing = self.devices.get(descriptor["name"])
+            if existing is not None and existing.type_id == type_id:
+                continue
+            # 创建IOT设备描述符
+            self.devices[descriptor["name"]] = IotDescriptor(
+                descriptor["name"],
+                descriptor["description"],
+                descriptor["properties"],
+                descriptor["methods"],
+                type_id,
+            )
+        return valid
+
+    def update_states(self, states: List[Dict[str, Any]]):
+        """应用设备上报的状态，未知设备和属性忽略"""
+        for state in states:
+            device = self.devices.get(state.get("name"))
+            if device is None:
+                continue
+            for key, value in state.get("state", {}).items():
+                if device.set_value(key, value):
+                    logger.bind(tag=TAG).info(
+                        f"物联网状态更新: {device.name} , {key} = {value}"
+                    )
+
+    def get_device(self, device_name: str) -> Optional[IotDescriptor]:
+        return self.devices.get(device_name)
+
+    def get_value(self, device_name: str, property_name: str):
+        device = self.devices.get(device_name)
+        return None if device is None else device.get_value(property_name)
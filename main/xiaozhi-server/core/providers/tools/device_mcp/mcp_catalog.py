@@ -0,0 +1,172 @@
+"""设备端MCP工具目录缓存
+
+同一固件的设备上报的工具列表完全相同。处理后的工具定义和函数描述按
+(serverInfo名称, 版本, 工具列表哈希) 缓存，所有连接共享，相同的工具列表不再重复规范化；
+固件(名称+版本)只对应过一份工具列表时，新连接在initialize响应后先使用缓存的目录，
+tools/list的结果到达后如有不同再替换。
+"""
+
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from core.utils.util import sanitize_tool_name
+from ..schema_registry import schema_registry
+
+
+@dataclass(frozen=True)
+class ToolCatalog:
+    """处理后的工具目录，所有连接只读共享"""
+
+    fingerprint: Tuple[str, str, str]
+    tools: Dict[str, dict]  # sanitized_name -> tool_data
+    name_mapping: Dict[str, str]  # sanitized_name -> original_name
+    functions: List[dict]  # OpenAI函数描述
+
+
+def _normalize_tool(tool: dict) -> dict:
+    input_schema = {"type": "object", "properties": {}, "required": []}
+    if isinstance(tool.get("inputSchema"), dict):
+        schema = tool["inputSchema"]
+        input_schema["type"] = schema.get("type", "object")
+        input_schema["properties"] = schema.get("properties", {})
+        input_schema["required"] = [
+            s for s in schema.get("required", []) if isinstance(s, str)
+        ]
+    return {
+        "name": tool.get("name", ""),
+        "description": tool.get("description", ""),
+        "inputSchema": input_schema,
+    }
+
+
+def _raw_hash(tools_data: List[dict]) -> str:
+    """设备上报的原始工具列表的哈希，用于在规范化之前查找缓存"""
+    content = json.dumps(tools_data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def build_catalog(name: str, version: str, tools_data: List[dict]) -> ToolCatalog:
+    """规范化工具定义，并把描述中引用的工具原名替换为函数名"""
+    normalized = [_normalize_tool(tool) for tool in tools_data if isinstance(tool, dict)]
+    content = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    tools_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    tools = {}
+    name_mapping = {}
+    for tool in normalized:
+        sanitized_name = sanitize_tool_name(tool["name"])
+        tools[sanitized_name] = tool
+        name_mapping[sanitized_name] = tool["name"]
+
+    # 只有名称被改写的工具需要替换，一次正则扫描完成，长名称优先匹配
+    renamed = {
+        original: sanitized
+        for sanitized, original in name_mapping.items()
+        if original and original != sanitized
+    }
+    if renamed:
+        pattern = re.compile(
+            "|".join(re.escape(n) for n in sorted(renamed, key=len, reverse=True))
+        )
+        for tool in tools.values():
+            tool["description"] = pattern.sub(
+                lambda m: renamed[m.group(0)], tool["description"]
+            )
+
+    functions = [
+        schema_registry.intern(
+            {
+                "type": "function",
+                "function": {
+                    "name": tool_name,
+                    "description": tool["description"],
+                    "parameters": tool["inputSchema"],
+                },
+            }
+        )
+        for tool_name, tool in tools.items()
+    ]
+    return ToolCatalog((name or "", version or "", tools_hash), tools, name_mapping, functions)
+
+
+class MCPCatalogCache:
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._catalogs: "OrderedDict[Tuple[str, str, str], ToolCatalog]" = OrderedDict()
+        # (名称, 版本) -> 出现过的工具列表哈希
+        self._firmwares: Dict[Tuple[str, str], set] = {}
+        # (名称, 版本, 原始工具列表哈希) -> 目录指纹
+        self._raw_index: Dict[Tuple[str, str, str], Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "reused": 0, "replaced": 0}
+
+    def get_or_build(self, name: str, version: str, tools_data: List[dict]) -> ToolCatalog:
+        """按完整工具列表获取目录，相同的原始工具列表直接返回已处理好的目录"""
+        raw_key = (name or "", version or "", _raw_hash(tools_data))
+        with self._lock:
+            fingerprint = self._raw_index.get(raw_key)
+            existing = self._catalogs.get(fingerprint) if fingerprint else None
+            if existing is not None:
+                self._catalogs.move_to_end(fingerprint)
+                self._stats["hits"] += 1
+                return existing
+
+        catalog = build_catalog(name, version, tools_data)
+        with self._lock:
+            self._raw_index[raw_key] = catalog.fingerprint
+            existing = self._catalogs.get(catalog.fingerprint)
+            if existing is not None:
+                # 原始列表不同但规范化后相同，例如字段顺序不同
+                self._catalogs.move_to_end(catalog.fingerprint)
+                self._stats["hits"] += 1
+                return existing
+            self._stats["misses"] += 1
+            self._catalogs[catalog.fingerprint] = catalog
+            self._firmwares.setdefault(catalog.fingerprint[:2], set()).add(
+                catalog.fingerprint[2]
+            )
+            while len(self._catalogs) > self.max_size:
+                evicted, _ = self._catalogs.popitem(last=False)
+                hashes = self._firmwares.get(evicted[:2])
+                if hashes is not None:
+                    hashes.discard(evicted[2])
+                    if not hashes:
+                        del self._firmwares[evicted[:2]]
+                self._raw_index = {
+                    key: value
+                    for key, value in self._raw_index.items()
+                    if value != evicted
+                }
+        return catalog
+
+    def lookup_firmware(self, name: str, version: str) -> Optional[ToolCatalog]:
+        """固件只对应过一份工具列表时返回该目录，未知或同一版本出现过不同列表时返回None"""
+        if not name or not version:
+            return None
+        with self._lock:
+            hashes = self._firmwares.get((name, version))
+            if not hashes or len(hashes) != 1:
+                return None
+            fingerprint = (name, version, next(iter(hashes)))
+            catalog = self._catalogs.get(fingerprint)
+            if catalog is not None:
+                self._catalogs.move_to_end(fingerprint)
+                self._stats["reused"] += 1
+            return catalog
+
+    def record_replaced(self):
+        """先使用的缓存目录与设备实际上报的工具列表不同"""
+        with self._lock:
+            self._stats["replaced"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"catalogs": len(self._catalogs), **self._stats}
+
+
+# 全局工具目录缓存
+catalog_cache = MCPCatalogCache()
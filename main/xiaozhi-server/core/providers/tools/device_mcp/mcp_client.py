@@ -20,6 +20,13 @@ class MCPClient:
         self.next_id = 1
         self.lock = asyncio.Lock()
         self._cached_available_tools = None  # Cache for get_available_tools
+        # initialize响应中的serverInfo，用于查找工具目录缓存
+        self.server_name = ""
+        self.server_version = ""
+        # 分页获取中的原始工具列表
+        self.pending_tools = []
+        # 当前使用的工具目录
+        self.catalog = None
 
     def has_tool(self, name: str) -> bool:
         return name in self.tools
@@ -63,6 +70,15 @@ class MCPClient:
                 None  # Invalidate the cache when a tool is added
             )
 
+    async def apply_catalog(self, catalog):
+        """使用共享的工具目录，目录只读，工具表复制一份供本连接使用"""
+        async with self.lock:
+            self.tools = dict(catalog.tools)
+            self.name_mapping = dict(catalog.name_mapping)
+            self._cached_available_tools = catalog.functions
+            self.catalog = catalog
+            self.pending_tools = []
+
     async def get_next_id(self) -> int:
         async with self.lock:
             current_id = self.next_id
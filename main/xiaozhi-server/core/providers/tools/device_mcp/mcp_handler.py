@@ -3,99 +3,17 @@
 import json
 import asyncio
 import re
-from concurrent.futures import Future
-from core.utils.util import get_vision_url, sanitize_tool_name
+from core.utils.util import get_vision_url
 from core.utils.auth import AuthToken
 from config.logger import setup_logging
+from ..base import ToolType
+from .mcp_client import MCPClient
+from .mcp_catalog import catalog_cache
 
 TAG = __name__
 logger = setup_logging()
 
 
-class MCPClient:
-    """设备端MCP客户端，用于管理MCP状态和工具"""
-
-    def __init__(self):
-        self.tools = {}  # sanitized_name -> tool_data
-        self.name_mapping = {}
-        self.ready = False
-        self.call_results = {}  # To store Futures for tool call responses
-        self.next_id = 1
-        self.lock = asyncio.Lock()
-        self._cached_available_tools = None  # Cache for get_available_tools
-
-    def has_tool(self, name: str) -> bool:
-        return name in self.tools
-
-    def get_available_tools(self) -> list:
-        # Check if the cache is valid
-        if self._cached_available_tools is not None:
-            return self._cached_available_tools
-
-        # If cache is not valid, regenerate the list
-        result = []
-        for tool_name, tool_data in self.tools.items():
-            function_def = {
-                "name": tool_name,
-                "description": tool_data["description"],
-                "parameters": {
-                    "type": tool_data["inputSchema"].get("type", "object"),
-                    "properties": tool_data["inputSchema"].get("properties", {}),
-                    "required": tool_data["inputSchema"].get("required", []),
-                },
-            }
-            result.append({"type": "function", "function": function_def})
-
-        self._cached_available_tools = result  # Store the generated list in cache
-        return result
-
-    async def is_ready(self) -> bool:
-        async with self.lock:
-            return self.ready
-
-    async def set_ready(self, status: bool):
-        async with self.lock:
-            self.ready = status
-
-    async def add_tool(self, tool_data: dict):
-        async with self.lock:
-            sanitized_name = sanitize_tool_name(tool_data["name"])
-            self.tools[sanitized_name] = tool_data
-            self.name_mapping[sanitized_name] = tool_data["name"]
-            self._cached_available_tools = (
-                None  # Invalidate the cache when a tool is added
-            )
-
-    async def get_next_id(self) -> int:
-        async with self.lock:
-            current_id = self.next_id
-            self.next_id += 1
-            return current_id
-
-    async def register_call_result_future(self, id: int, future: Future):
-        async with self.lock:
-            self.call_results[id] = future
-
-    async def resolve_call_result(self, id: int, result: any):
-        async with self.lock:
-            if id in self.call_results:
-                future = self.call_results.pop(id)
-                if not future.done():
-                    future.set_result(result)
-
-    async def reject_call_result(self, id: int, exception: Exception):
-        async with self.lock:
-            if id in self.call_results:
-                future = self.call_results.pop(id)
-                if not future.done():
-                    future.set_exception(exception)
-
-    async def cleanup_call_result(self, id: int):
-        async with self.lock:
-            if id in self.call_results:
-                self.call_results.pop(id)
-
-
 async def send_mcp_message(conn, payload: dict):
     """Helper to send MCP messages, encapsulating common logic."""
     if not conn.features.get("mcp"):
@@ -138,9 +56,23 @@ async def handle_mcp_message(conn, mcp_client: MCPClient, payload: dict):
             if isinstance(server_info, dict):
                 name = server_info.get("name")
                 version = server_info.get("version")
+                mcp_client.server_name = str(name or "")
+                mcp_client.server_version = str(version or "")
                 logger.bind(tag=TAG).info(
                     f"客户端MCP服务器信息: name={name}, version={version}"
                 )
+            # 相同固件的工具目录已知时先使用，tools/list的结果到达后再核对
+            catalog = catalog_cache.lookup_firmware(
+                mcp_client.server_name, mcp_client.server_version
+            )
+            if catalog is not None:
+                logger.bind(tag=TAG).info(
+                    f"复用已缓存的MCP工具目录，工具数量: {len(catalog.tools)}"
+                )
+                await _finish_tools_list(conn, mcp_client, catalog)
+                if conn.config.get("mcp_catalog_skip_tools_list", False):
+                    return
+            await send_mcp_tools_list_request(conn)
             return
 
         elif msg_id == 2:  # mcpToolsListID
@@ -154,57 +86,29 @@ async def handle_mcp_message(conn, mcp_client: MCPClient, payload: dict):
                 logger.bind(tag=TAG).info(
                     f"客户端设备支持的工具数量: {len(tools_data)}"
                 )
-
-                for i, tool in enumerate(tools_data):
-                    if not isinstance(tool, dict):
-                        continue
-
-                    name = tool.get("name", "")
-                    description = tool.get("description", "")
-                    input_schema = {"type": "object", "properties": {}, "required": []}
-
-                    if "inputSchema" in tool and isinstance(tool["inputSchema"], dict):
-                        schema = tool["inputSchema"]
-                        input_schema["type"] = schema.get("type", "object")
-                        input_schema["properties"] = schema.get("properties", {})
-                        input_schema["required"] = [
-                            s for s in schema.get("required", []) if isinstance(s, str)
-                        ]
-
-                    new_tool = {
-                        "name": name,
-                        "description": description,
-                        "inputSchema": input_schema,
-                    }
-                    await mcp_client.add_tool(new_tool)
-                    logger.bind(tag=TAG).debug(f"客户端工具 #{i+1}: {name}")
-
-                # 替换所有工具描述中的工具名称
-                for tool_data in mcp_client.tools.values():
-                    if "description" in tool_data:
-                        description = tool_data["description"]
-                        # 遍历所有工具名称进行替换
-                        for (
-                            sanitized_name,
-                            original_name,
-                        ) in mcp_client.name_mapping.items():
-                            description = description.replace(
-                                original_name, sanitized_name
-                            )
-                        tool_data["description"] = description
+                mcp_client.pending_tools.extend(tools_data)
 
                 next_cursor = result.get("nextCursor", "")
                 if next_cursor:
                     logger.bind(tag=TAG).info(f"有更多工具，nextCursor: {next_cursor}")
                     await send_mcp_tools_list_continue_request(conn, next_cursor)
                 else:
-                    await mcp_client.set_ready(True)
-                    logger.bind(tag=TAG).info("所有工具已获取，MCP客户端准备就绪")
-
-                    # 刷新工具缓存，确保MCP工具被包含在函数列表中
-                    if hasattr(conn, "func_handler") and conn.func_handler:
-                        conn.func_handler.tool_manager.refresh_tools()
-                        conn.func_handler.current_support_functions()
+                    # 工具定义的规范化和描述替换按固件缓存，相同工具列表只处理一次
+                    catalog = catalog_cache.get_or_build(
+                        mcp_client.server_name,
+                        mcp_client.server_version,
+                        mcp_client.pending_tools,
+                    )
+                    if catalog is mcp_client.catalog:
+                        # 与先使用的缓存目录一致，无需刷新
+                        mcp_client.pending_tools = []
+                        return
+                    if mcp_client.catalog is not None:
+                        catalog_cache.record_replaced()
+                        logger.bind(tag=TAG).warning(
+                            "设备上报的工具列表与缓存的目录不同，已替换为设备上报的工具列表"
+                        )
+                    await _finish_tools_list(conn, mcp_client, catalog)
             return
 
     # Handle method calls (requests from the client)
@@ -222,6 +126,21 @@ async def handle_mcp_message(conn, mcp_client: MCPClient, payload: dict):
             await mcp_client.reject_call_result(
                 msg_id, Exception(f"MCP错误: {error_msg}")
             )
+        elif msg_id == 1:
+            # 初始化失败时仍尝试获取工具列表
+            await send_mcp_tools_list_request(conn)
+
+
+async def _finish_tools_list(conn, mcp_client: MCPClient, catalog):
+    """使用工具目录，标记MCP客户端就绪并刷新函数列表"""
+    await mcp_client.apply_catalog(catalog)
+    await mcp_client.set_ready(True)
+    logger.bind(tag=TAG).info("所有工具已获取，MCP客户端准备就绪")
+
+    # 刷新工具缓存，确保MCP工具被包含在函数列表中
+    if hasattr(conn, "func_handler") and conn.func_handler:
+        conn.func_handler.tool_manager.refresh_tools(ToolType.DEVICE_MCP)
+        conn.func_handler.current_support_functions()
 
 
 async def send_mcp_initialize_message(conn):
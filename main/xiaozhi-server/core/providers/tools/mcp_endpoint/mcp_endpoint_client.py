@@ -4,6 +4,7 @@ import asyncio
 from concurrent.futures import Future
 from core.utils.util import sanitize_tool_name
 from config.logger import setup_logging
+from ..schema_registry import schema_registry
 
 TAG = __name__
 logger = setup_logging()
@@ -43,7 +44,9 @@ class MCPEndpointClient:
                     "required": tool_data["inputSchema"].get("required", []),
                 },
             }
-            result.append({"type": "function", "function": function_def})
+            result.append(
+                schema_registry.intern({"type": "function", "function": function_def})
+            )
 
         self._cached_available_tools = result  # Store the generated list in cache
         return result
@@ -5,6 +5,7 @@ import asyncio
 import re
 import websockets
 from config.logger import setup_logging
+from ..base import ToolType
 from .mcp_endpoint_client import MCPEndpointClient
 
 TAG = __name__
@@ -181,7 +182,9 @@ async def handle_mcp_endpoint_message(mcp_client: MCPEndpointClient, message: st
                             and hasattr(mcp_client.conn, "func_handler")
                             and mcp_client.conn.func_handler
                         ):
-                            mcp_client.conn.func_handler.tool_manager.refresh_tools()
+                            mcp_client.conn.func_handler.tool_manager.refresh_tools(
+                                ToolType.MCP_ENDPOINT
+                            )
                             mcp_client.conn.func_handler.current_support_functions()
 
                         logger.bind(tag=TAG).info(
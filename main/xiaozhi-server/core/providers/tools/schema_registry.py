@@ -0,0 +1,104 @@
+"""
+全局函数描述注册表
+内容相同的工具描述（OpenAI函数调用格式）在所有连接间只保留一份，按内容哈希驻留；
+一组工具描述合并成的函数列表同样按成员哈希共享，并附带预先序列化好的JSON，
+需要把函数列表写进提示词的LLM不必每次请求都重新序列化。
+
+注册表返回的描述和函数列表由多个连接共享，只读使用，需要修改时先复制。
+"""
+
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# 驻留的描述数和函数列表数上限，超出时淘汰最久未使用的
+MAX_SCHEMAS = 4096
+MAX_TOOL_SETS = 256
+
+
+class FunctionList(list):
+    """共享的函数列表，只读使用"""
+
+    def __init__(self, functions: List[Dict[str, Any]], key: Tuple[str, ...]):
+        super().__init__(functions)
+        self.key = key
+        self._json: Optional[str] = None
+
+    @property
+    def json(self) -> str:
+        """函数列表序列化后的JSON，首次使用时生成"""
+        if self._json is None:
+            self._json = json.dumps(list(self), ensure_ascii=False)
+        return self._json
+
+
+class FunctionSchemaRegistry:
+    def __init__(self, max_schemas: int = MAX_SCHEMAS, max_tool_sets: int = MAX_TOOL_SETS):
+        self.max_schemas = max_schemas
+        self.max_tool_sets = max_tool_sets
+        # 内容哈希 -> 驻留的描述
+        self._schemas: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 驻留描述的id -> 内容哈希，驻留的描述由注册表持有，id不会被复用
+        self._hash_by_id: Dict[int, str] = {}
+        self._tool_sets: "OrderedDict[Tuple[str, ...], FunctionList]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"schema_hits": 0, "schema_misses": 0, "set_hits": 0, "set_misses": 0}
+
+    def intern(self, description: Dict[str, Any]) -> Dict[str, Any]:
+        """返回与description内容相同的驻留描述"""
+        return self._intern(description)[1]
+
+    def get_function_list(self, descriptions: List[Dict[str, Any]]) -> FunctionList:
+        """按描述内容获取共享的函数列表，顺序不同视为不同的列表"""
+        members = [self._intern(description) for description in descriptions]
+        key = tuple(schema_hash for schema_hash, _ in members)
+        with self._lock:
+            function_list = self._tool_sets.get(key)
+            if function_list is not None:
+                self._tool_sets.move_to_end(key)
+                self._stats["set_hits"] += 1
+                return function_list
+            self._stats["set_misses"] += 1
+            function_list = FunctionList([schema for _, schema in members], key)
+            self._tool_sets[key] = function_list
+            while len(self._tool_sets) > self.max_tool_sets:
+                self._tool_sets.popitem(last=False)
+        return function_list
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "schemas": len(self._schemas),
+                "tool_sets": len(self._tool_sets),
+                **self._stats,
+            }
+
+    def _intern(self, description: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        with self._lock:
+            schema_hash = self._hash_by_id.get(id(description))
+            if schema_hash is not None:
+                self._schemas.move_to_end(schema_hash)
+                return schema_hash, description
+
+        # 未驻留的描述需要序列化计算哈希，不持有锁
+        content = json.dumps(description, sort_keys=True, ensure_ascii=False, default=str)
+        schema_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self._lock:
+            schema = self._schemas.get(schema_hash)
+            if schema is not None:
+                self._schemas.move_to_end(schema_hash)
+                self._stats["schema_hits"] += 1
+                return schema_hash, schema
+            self._stats["schema_misses"] += 1
+            self._schemas[schema_hash] = description
+            self._hash_by_id[id(description)] = schema_hash
+            while len(self._schemas) > self.max_schemas:
+                _, evicted = self._schemas.popitem(last=False)
+                self._hash_by_id.pop(id(evicted), None)
+        return schema_hash, description
+
+
+# 全局函数描述注册表
+schema_registry = FunctionSchemaRegistry()
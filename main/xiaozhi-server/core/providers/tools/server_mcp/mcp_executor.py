@@ -2,6 +2,7 @@
 
 from typing import Dict, Any, Optional
 from ..base import ToolType, ToolDefinition, ToolExecutor
+from ..schema_registry import schema_registry
 from plugins_func.register import Action, ActionResponse
 from .mcp_manager import ServerMCPManager
 
@@ -66,7 +67,9 @@ class ServerMCPExecutor(ToolExecutor):
             if tool_name == "":
                 continue
             tools[tool_name] = ToolDefinition(
-                name=tool_name, description=tool, tool_type=ToolType.SERVER_MCP
+                name=tool_name,
+                description=schema_registry.intern(tool),
+                tool_type=ToolType.SERVER_MCP,
             )
 
         return tools
@@ -1,9 +1,15 @@
 """服务端插件工具执行器"""
 
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional, Tuple
 from ..base import ToolType, ToolDefinition, ToolExecutor
+from ..schema_registry import schema_registry
 from plugins_func.register import all_function_registry, Action, ActionResponse
 
+# 插件函数组合 -> 工具定义，配置相同的连接共享同一份
+_shared_plugin_tools: Dict[Tuple, Dict[str, ToolDefinition]] = {}
+_shared_plugin_tools_lock = threading.Lock()
+
 
 class ServerPluginExecutor(ToolExecutor):
     """服务端插件工具执行器"""
@@ -11,6 +17,7 @@ class ServerPluginExecutor(ToolExecutor):
     def __init__(self, conn):
         self.conn = conn
         self.config = conn.config
+        self._required_functions: Optional[Tuple[str, ...]] = None
 
     async def execute(
         self, conn, tool_name: str, arguments: Dict[str, Any]
@@ -47,9 +54,32 @@ class ServerPluginExecutor(ToolExecutor):
             )
 
     def get_tools(self) -> Dict[str, ToolDefinition]:
-        """获取所有注册的服务端插件工具"""
+        """获取所有注册的服务端插件工具，返回的字典由配置相同的连接共享，只读使用"""
+        if self._required_functions is None:
+            self._required_functions = self._get_required_functions()
+        func_items = tuple(
+            all_function_registry.get(func_name) for func_name in self._required_functions
+        )
+        # 插件模块加载后函数对象才会出现在注册表中，函数对象变化时重新生成
+        key = (self._required_functions, func_items)
+        with _shared_plugin_tools_lock:
+            tools = _shared_plugin_tools.get(key)
+        if tools is not None:
+            return tools
+
         tools = {}
+        for func_name, func_item in zip(self._required_functions, func_items):
+            if func_item:
+                tools[func_name] = ToolDefinition(
+                    name=func_name,
+                    description=schema_registry.intern(func_item.description),
+                    tool_type=ToolType.SERVER_PLUGIN,
+                )
+
+        with _shared_plugin_tools_lock:
+            return _shared_plugin_tools.setdefault(key, tools)
 
+    def _get_required_functions(self) -> Tuple[str, ...]:
         # 获取必要的函数
         necessary_functions = ["handle_exit_intent", "get_lunar"]
 
@@ -65,19 +95,8 @@ class ServerPluginExecutor(ToolExecutor):
             except TypeError:
                 config_functions = []
 
-        # 合并所有需要的函数
-        all_required_functions = list(set(necessary_functions + config_functions))
-
-        for func_name in all_required_functions:
-            func_item = all_function_registry.get(func_name)
-            if func_item:
-                tools[func_name] = ToolDefinition(
-                    name=func_name,
-                    description=func_item.description,
-                    tool_type=ToolType.SERVER_PLUGIN,
-                )
-
-        return tools
+        # 合并所有需要的函数，去重并保持顺序
+        return tuple(dict.fromkeys(necessary_functions + config_functions))
 
     def has_tool(self, tool_name: str) -> bool:
         """检查是否有指定的服务端插件工具"""
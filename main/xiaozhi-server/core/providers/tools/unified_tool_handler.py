@@ -68,7 +68,11 @@ class UnifiedToolHandler:
             # 初始化Home Assistant（如果需要）
             self._initialize_home_assistant()
 
+            # 插件模块和MCP工具在初始化过程中才加载完成
+            self.tool_manager.refresh_tools()
             self.finish_init = True
+            # 唤醒等待注册设备端工具的协程
+            self.conn.func_handler_ready.set()
             self.logger.info("统一工具处理器初始化完成")
 
             # 输出当前支持的所有工具列表
@@ -208,11 +212,13 @@ class UnifiedToolHandler:
             response="; ".join(responses_text) if responses_text else None,
         )
 
-    async def register_iot_tools(self, descriptors: List[Dict[str, Any]]):
-        """注册IoT设备工具"""
-        self.device_iot_executor.register_iot_tools(descriptors)
-        self.tool_manager.refresh_tools()
-        self.logger.info(f"注册了{len(descriptors)}个IoT设备的工具")
+    async def register_iot_tools(self, descriptors: List[Dict[str, Any]]) -> int:
+        """注册IoT设备工具，返回能力有变化、重新注册了工具的设备数"""
+        changed = self.device_iot_executor.register_iot_tools(descriptors)
+        if changed:
+            self.tool_manager.refresh_tools(ToolType.DEVICE_IOT)
+            self.logger.info(f"注册了{changed}个IoT设备的工具")
+        return changed
 
     def get_tool_statistics(self) -> Dict[str, int]:
         """获取工具统计信息"""
@@ -4,6 +4,7 @@ from typing import Dict, List, Optional, Any
 from config.logger import setup_logging
 from plugins_func.register import Action, ActionResponse
 from .base import ToolType, ToolDefinition, ToolExecutor
+from .schema_registry import schema_registry
 
 
 class ToolManager:
@@ -13,20 +14,37 @@ class ToolManager:
         self.conn = conn
         self.logger = setup_logging()
         self.executors: Dict[ToolType, ToolExecutor] = {}
+        # 按工具类型分别缓存，某一类工具变化时只重新获取该类
+        self._cached_type_tools: Dict[ToolType, Dict[str, ToolDefinition]] = {}
         self._cached_tools: Optional[Dict[str, ToolDefinition]] = None
         self._cached_function_descriptions: Optional[List[Dict[str, Any]]] = None
 
     def register_executor(self, tool_type: ToolType, executor: ToolExecutor):
         """注册工具执行器"""
         self.executors[tool_type] = executor
-        self._invalidate_cache()
+        self._invalidate_cache(tool_type)
         self.logger.info(f"注册工具执行器: {tool_type.value}")
 
-    def _invalidate_cache(self):
-        """使缓存失效"""
+    def _invalidate_cache(self, tool_type: Optional[ToolType] = None):
+        """使缓存失效，指定tool_type时只使该类工具的缓存失效"""
+        if tool_type is None:
+            self._cached_type_tools.clear()
+        else:
+            self._cached_type_tools.pop(tool_type, None)
         self._cached_tools = None
         self._cached_function_descriptions = None
 
+    def _get_type_tools(self, tool_type: ToolType, executor: ToolExecutor):
+        tools = self._cached_type_tools.get(tool_type)
+        if tools is None:
+            try:
+                tools = executor.get_tools()
+            except Exception as e:
+                self.logger.error(f"获取{tool_type.value}工具时出错: {e}")
+                return {}
+            self._cached_type_tools[tool_type] = tools
+        return tools
+
     def get_all_tools(self) -> Dict[str, ToolDefinition]:
         """获取所有工具定义"""
         if self._cached_tools is not None:
@@ -34,27 +52,26 @@ class ToolManager:
 
         all_tools = {}
         for tool_type, executor in self.executors.items():
-            try:
-                tools = executor.get_tools()
-                for name, definition in tools.items():
-                    if name in all_tools:
-                        self.logger.warning(f"工具名称冲突: {name}")
-                    all_tools[name] = definition
-            except Exception as e:
-                self.logger.error(f"获取{tool_type.value}工具时出错: {e}")
+            for name, definition in self._get_type_tools(tool_type, executor).items():
+                if name in all_tools:
+                    self.logger.warning(f"工具名称冲突: {name}")
+                all_tools[name] = definition
 
         self._cached_tools = all_tools
         return all_tools
 
     def get_function_descriptions(self) -> List[Dict[str, Any]]:
-        """获取所有工具的函数描述（OpenAI格式）"""
+        """
+        获取所有工具的函数描述（OpenAI格式）
+        返回的列表由工具相同的连接共享，只读使用
+        """
         if self._cached_function_descriptions is not None:
             return self._cached_function_descriptions
 
-        descriptions = []
         tools = self.get_all_tools()
-        for tool_definition in tools.values():
-            descriptions.append(tool_definition.description)
+        descriptions = schema_registry.get_function_list(
+            [tool_definition.description for tool_definition in tools.values()]
+        )
 
         self._cached_function_descriptions = descriptions
         return descriptions
@@ -106,19 +123,14 @@ class ToolManager:
         tools = self.get_all_tools()
         return list(tools.keys())
 
-    def refresh_tools(self):
-        """刷新工具缓存"""
-        self._invalidate_cache()
+    def refresh_tools(self, tool_type: Optional[ToolType] = None):
+        """刷新工具缓存，指定tool_type时只刷新该类工具"""
+        self._invalidate_cache(tool_type)
         self.logger.info("工具缓存已刷新")
 
     def get_tool_statistics(self) -> Dict[str, int]:
         """获取工具统计信息"""
         stats = {}
         for tool_type, executor in self.executors.items():
-            try:
-                tools = executor.get_tools()
-                stats[tool_type.value] = len(tools)
-            except Exception as e:
-                self.logger.error(f"获取{tool_type.value}工具统计时出错: {e}")
-                stats[tool_type.value] = 0
+            stats[tool_type.value] = len(self._get_type_tools(tool_type, executor))
         return stats
@@ -16,6 +16,7 @@ from core.providers.tts.base import TTSProviderBase
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 from core.utils.tts import MarkdownCleaner
 from core.utils import opus_encoder_utils, textUtils
+from core.utils.ws_pool import get_ws_pool, is_ws_open
 from config.logger import setup_logging
 
 TAG = __name__
@@ -145,6 +146,18 @@ class TTSProvider(TTSProviderBase):
             self.token = config.get("token")
             self.expire_time = None
 
+        # 同一套凭证的所有连接共享预热连接池，服务端约10秒后回收空闲连接
+        pool_max_idle = config.get("pool_max_idle", "2")
+        pool_idle_timeout = config.get("pool_idle_timeout", "10")
+        self.ws_pool = get_ws_pool(
+            "aliyun_stream",
+            self.ws_url,
+            self.appkey,
+            self.access_key_id or self.token,
+            max_idle=int(pool_max_idle) if pool_max_idle not in ("", None) else 2,
+            idle_timeout=float(pool_idle_timeout) if pool_idle_timeout else 10,
+        )
+
     def _refresh_token(self):
         """刷新Token并记录过期时间"""
         if self.access_key_id and self.access_key_secret:
@@ -176,26 +189,37 @@ class TTSProvider(TTSProviderBase):
             return False
         return time.time() > self.expire_time
 
+    async def _connect(self):
+        """完成一次新的TLS+WebSocket握手"""
+        if self._is_token_expired():
+            logger.bind(tag=TAG).warning("Token已过期，正在自动刷新...")
+            self._refresh_token()
+        return await websockets.connect(
+            self.ws_url,
+            additional_headers={"X-NLS-Token": self.token},
+            ping_interval=30,
+            ping_timeout=10,
+            close_timeout=10,
+        )
+
     async def _ensure_connection(self):
         """确保WebSocket连接可用"""
         try:
-            if self._is_token_expired():
-                logger.bind(tag=TAG).warning("Token已过期，正在自动刷新...")
-                self._refresh_token()
             current_time = time.time()
-            if self.ws and current_time - self.last_active_time < 10:
+            if (
+                self.ws
+                and is_ws_open(self.ws)
+                and current_time - self.last_active_time < 10
+            ):
                 # 10秒内才可以复用链接进行连续对话
                 logger.bind(tag=TAG).info(f"使用已有链接...")
                 return self.ws
-            logger.bind(tag=TAG).info("开始建立新连接...")
-
-            self.ws = await websockets.connect(
-                self.ws_url,
-                additional_headers={"X-NLS-Token": self.token},
-                ping_interval=30,
-                ping_timeout=10,
-                close_timeout=10,
-            )
+            if self.ws:
+                await self.ws_pool.discard(self.ws)
+                self.ws = None
+            logger.bind(tag=TAG).info("从连接池获取连接...")
+
+            self.ws = await self.ws_pool.acquire(self._connect)
             logger.bind(tag=TAG).info("WebSocket连接建立成功")
             self.last_active_time = time.time()
             return self.ws
@@ -205,6 +229,16 @@ class TTSProvider(TTSProviderBase):
             self.last_active_time = None
             raise
 
+    def prewarm_connection(self):
+        """用户开始说话时，若自己没有可复用的连接，则在连接池中预热一条"""
+        if (
+            self.ws
+            and is_ws_open(self.ws)
+            and time.time() - self.last_active_time < 10
+        ):
+            return
+        self.ws_pool.prewarm(self._connect)
+
     def tts_text_priority_thread(self):
         """流式文本处理线程"""
         while not self.conn.stop_event.is_set():
@@ -315,10 +349,7 @@ class TTSProvider(TTSProviderBase):
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
             if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
+                await self.ws_pool.discard(self.ws)
                 self.ws = None
             raise
 
@@ -402,6 +433,8 @@ class TTSProvider(TTSProviderBase):
 
     async def close(self):
         """资源清理"""
+        # 会话仍在进行时连接状态不确定，不能归还连接池
+        session_active = self._monitor_task is not None and not self._monitor_task.done()
         if self._monitor_task:
             try:
                 self._monitor_task.cancel()
@@ -413,13 +446,18 @@ class TTSProvider(TTSProviderBase):
             self._monitor_task = None
 
         if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
+            if session_active:
+                await self.ws_pool.discard(self.ws)
+            else:
+                await self.ws_pool.release(
+                    self.ws, idle_for=time.time() - (self.last_active_time or 0)
+                )
             self.ws = None
             self.last_active_time = None
 
+        # 归还Opus编码器，下次会话时重新获取
+        self.opus_encoder.close()
+
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
         opus_datas_cache = []
@@ -503,10 +541,7 @@ class TTSProvider(TTSProviderBase):
                     break
             # 仅在连接异常时才关闭
             if not session_finished and self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
+                await self.ws_pool.discard(self.ws)
                 self.ws = None
         # 监听任务退出时清理引用
         finally:
@@ -10,14 +10,18 @@ from datetime import datetime
 from core.utils import textUtils
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
-from core.utils.util import audio_to_data, audio_bytes_to_data
+from core.utils.util import audio_to_data, audio_bytes_to_data, decode_audio_stream
+from core.utils.opus_encoder_utils import OpusEncoderUtils
+from core.utils.tts_pipeline import SynthesisPipeline, run_coroutine
 from core.utils.tts import MarkdownCleaner
 from core.utils.output_counter import add_device_output
 from core.handle.reportHandle import enqueue_tts_report
-from core.handle.sendAudioHandle import sendAudioMessage
+from core.handle.sendAudioHandle import sendAudioMessage, sendAudio
+from core.utils.tracing import get_turn_trace, provider_name
 from core.providers.tts.dto.dto import (
     TTSMessageDTO,
     SentenceType,
+    StreamPart,
     ContentType,
     InterfaceType,
 )
@@ -27,8 +31,15 @@ import traceback
 TAG = __name__
 logger = setup_logging()
 
+# 分块流式合成时，首批音频立即推送，之后攒够该帧数再推送（60ms一帧）
+STREAM_PUSH_FRAMES = 10
+
 
 class TTSProviderBase(ABC):
+    # 厂商接口能边合成边返回音频的提供者设为True，并实现异步生成器text_to_speak_chunks(text)，
+    # 按到达顺序产出格式为chunk_format的音频分块，首包音频不必等整句合成完成
+    supports_chunk_streaming = False
+
     def __init__(self, config, delete_audio_file):
         self.interface_type = InterfaceType.NON_STREAM
         self.conn = None
@@ -40,6 +51,8 @@ class TTSProviderBase(ABC):
         self.tts_audio_queue = queue.Queue()
         self.tts_audio_first_sentence = True
         self.before_stop_play_files = []
+        # 非流式合成的流水线，打开音频通道时按tts_pipeline_depth创建
+        self.synthesis_pipeline = None
 
         self.tts_text_buff = []
         self.punctuations = (
@@ -72,20 +85,34 @@ class TTSProviderBase(ABC):
         self.processed_chars = 0
         self.is_first_sentence = True
 
+        # 分块流式合成：支持的提供者默认开启，可通过chunk_streaming关闭
+        self.chunk_streaming = str(config.get("chunk_streaming", True)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+        # 分块音频的格式和采样率，pcm需要指定采样率
+        self.chunk_format = "mp3"
+        self.chunk_sample_rate = None
+        # 播放线程中正在流式播放的句子：文本和已发送的音频，整句结束后一起上报
+        self._streaming_report = None
+
     def generate_filename(self, extension=".wav"):
         return os.path.join(
             self.output_file,
             f"tts-{datetime.now().date()}@{uuid.uuid4().hex}{extension}",
         )
 
-    def to_tts(self, text):
+    def to_tts(self, text, is_cancelled=None):
         text = MarkdownCleaner.clean_markdown(text)
         max_repeat_time = 5
         if self.delete_audio_file:
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
+                if is_cancelled and is_cancelled():
+                    return None
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = run_coroutine(self.text_to_speak(text, None))
                     if audio_bytes:
                         audio_datas, _ = audio_bytes_to_data(
                             audio_bytes, file_type=self.audio_file_type, is_opus=True
@@ -111,8 +138,10 @@ class TTSProviderBase(ABC):
             tmp_file = self.generate_filename()
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
+                    if is_cancelled and is_cancelled():
+                        break
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        run_coroutine(self.text_to_speak(text, tmp_file))
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {text}，错误: {e}"
@@ -140,6 +169,77 @@ class TTSProviderBase(ABC):
     async def text_to_speak(self, text, output_file):
         pass
 
+    def use_chunk_streaming(self):
+        return self.supports_chunk_streaming and self.chunk_streaming
+
+    def to_tts_stream(self, text):
+        """
+        分块流式合成一句话，音频边到达边编码并推送到播放队列
+        Returns:
+            bool: 是否推送了音频，未推送任何音频时调用方可回退到整句合成
+        """
+        text = MarkdownCleaner.clean_markdown(text)
+        pushed = [0]
+        try:
+            run_coroutine(self._stream_to_audio_queue(text, pushed))
+        except Exception as e:
+            logger.bind(tag=TAG).warning(
+                f"流式语音生成失败: {text}，已推送{pushed[0]}帧，错误: {e}"
+            )
+        if pushed[0] > 0:
+            # 整句结束，播放线程按完整的文本和音频上报
+            self.tts_audio_queue.put((SentenceType.MIDDLE, [], text, StreamPart.END))
+        return pushed[0] > 0
+
+    async def _stream_to_audio_queue(self, text, pushed):
+        is_opus = self.conn.audio_format != "pcm"
+        encoder = OpusEncoderUtils(16000, 1, 60) if is_opus else None
+        pcm_frame_bytes = 960 * 2
+        pcm_pending = bytearray()
+        batch = []
+
+        def flush(frames):
+            # 第一批发送sentence_start消息，之后的批次只发送音频
+            part = StreamPart.START if pushed[0] == 0 else StreamPart.CONTINUE
+            self.tts_audio_queue.put((SentenceType.MIDDLE, frames, text, part))
+            pushed[0] += len(frames)
+
+        pcm_stream = decode_audio_stream(
+            self.text_to_speak_chunks(text), self.chunk_format, self.chunk_sample_rate
+        )
+        try:
+            async for pcm in pcm_stream:
+                if self.conn.client_abort:
+                    break
+                if encoder is not None:
+                    batch.extend(encoder.encode_pcm_to_opus(pcm, False))
+                else:
+                    pcm_pending.extend(pcm)
+                    usable = len(pcm_pending) // pcm_frame_bytes * pcm_frame_bytes
+                    batch.extend(
+                        bytes(pcm_pending[i : i + pcm_frame_bytes])
+                        for i in range(0, usable, pcm_frame_bytes)
+                    )
+                    del pcm_pending[:usable]
+                if batch and (pushed[0] == 0 or len(batch) >= STREAM_PUSH_FRAMES):
+                    flush(batch)
+                    batch = []
+
+            if not self.conn.client_abort:
+                if encoder is not None:
+                    batch.extend(encoder.encode_pcm_to_opus(b"", True))
+                elif pcm_pending:
+                    batch.append(
+                        bytes(pcm_pending) + bytes(pcm_frame_bytes - len(pcm_pending))
+                    )
+                if batch:
+                    flush(batch)
+        finally:
+            # 打断时及时结束下载和解码进程
+            await pcm_stream.aclose()
+            if encoder is not None:
+                encoder.close()
+
     def audio_to_pcm_data(self, audio_file_path):
         """音频文件转换为PCM编码"""
         return audio_to_data(audio_file_path, is_opus=False)
@@ -179,6 +279,9 @@ class TTSProviderBase(ABC):
     async def open_audio_channels(self, conn):
         self.conn = conn
         self.tts_timeout = conn.config.get("tts_timeout", 10)
+        self.synthesis_pipeline = SynthesisPipeline(
+            self.tts_audio_queue.put, conn.config.get("tts_pipeline_depth", 3)
+        )
         # tts 消化线程
         self.tts_priority_thread = threading.Thread(
             target=self.tts_text_priority_thread, daemon=True
@@ -215,41 +318,26 @@ class TTSProviderBase(ABC):
                     if segment_text:
                         # 记录TTS处理开始时间
                         tts_start_time = time.monotonic()
-                        if hasattr(self.conn, 'voice_pipeline_start_time'):
-                            pipeline_duration = tts_start_time - self.conn.voice_pipeline_start_time
+                        trace = get_turn_trace(self.conn)
+                        if not trace.finished:
+                            pipeline_duration = tts_start_time - trace.start_time
                             logger.bind(tag=TAG).info(f"🎵 TTS开始处理文本: '{segment_text}' - 从语音开始: {pipeline_duration:.3f}s")
                         
-                        if self.delete_audio_file:
-                            audio_datas = self.to_tts(segment_text)
-                            if audio_datas:
-                                tts_end_time = time.monotonic()
-                                tts_duration = tts_end_time - tts_start_time
-                                logger.bind(tag=TAG).info(f"🎵 TTS音频生成完成 - 耗时: {tts_duration:.3f}s")
-                                self.tts_audio_queue.put(
-                                    (message.sentence_type, audio_datas, segment_text)
-                                )
-                        else:
-                            tts_file = self.to_tts(segment_text)
-                            if tts_file:
-                                tts_end_time = time.monotonic()
-                                tts_duration = tts_end_time - tts_start_time
-                                logger.bind(tag=TAG).info(f"🎵 TTS音频生成完成 - 耗时: {tts_duration:.3f}s")
-                                audio_datas = self._process_audio_file(tts_file)
-                                self.tts_audio_queue.put(
-                                    (message.sentence_type, audio_datas, segment_text)
-                                )
+                        self._synthesize_segment(
+                            segment_text, message.sentence_type, tts_start_time
+                        )
                 elif ContentType.FILE == message.content_type:
                     self._process_remaining_text()
                     tts_file = message.content_file
                     if tts_file and os.path.exists(tts_file):
                         audio_datas = self._process_audio_file(tts_file)
-                        self.tts_audio_queue.put(
+                        self.synthesis_pipeline.put(
                             (message.sentence_type, audio_datas, message.content_detail)
                         )
 
                 if message.sentence_type == SentenceType.LAST:
                     self._process_remaining_text()
-                    self.tts_audio_queue.put(
+                    self.synthesis_pipeline.put(
                         (message.sentence_type, [], message.content_detail)
                     )
 
@@ -261,18 +349,66 @@ class TTSProviderBase(ABC):
                 )
                 continue
 
+    def _synthesize_segment(self, segment_text, sentence_type, tts_start_time):
+        """合成一句话：支持分块流式的直接推送，其余提交到合成流水线并发合成"""
+        if self.use_chunk_streaming():
+            # 流式推送直接写入播放队列，先等之前提交的句子全部交出以保证顺序
+            self.synthesis_pipeline.wait_idle()
+            if self.to_tts_stream(segment_text):
+                tts_duration = time.monotonic() - tts_start_time
+                logger.bind(tag=TAG).info(f"🎵 TTS流式音频推送完成 - 耗时: {tts_duration:.3f}s")
+                return
+        self.synthesis_pipeline.submit(
+            self._synthesis_job, segment_text, sentence_type, tts_start_time
+        )
+
+    def _synthesis_job(self, is_cancelled, segment_text, sentence_type, tts_start_time):
+        """在合成线程中执行，返回放入播放队列的条目，失败或已打断时返回None"""
+        if is_cancelled():
+            return None
+        tts_result = self.to_tts(segment_text, is_cancelled)
+        if not tts_result or is_cancelled():
+            return None
+        if self.delete_audio_file:
+            audio_datas = tts_result
+        elif os.path.exists(tts_result):
+            audio_datas = self._process_audio_file(tts_result)
+        else:
+            return None
+        tts_duration = time.monotonic() - tts_start_time
+        logger.bind(tag=TAG).info(f"🎵 TTS音频生成完成: '{segment_text}' - 耗时: {tts_duration:.3f}s")
+        return (sentence_type, audio_datas, segment_text)
+
+    def cancel_synthesis(self):
+        """打断时取消合成中的句子"""
+        if self.synthesis_pipeline is not None:
+            self.synthesis_pipeline.cancel()
+
     def _audio_play_priority_thread(self):
         while not self.conn.stop_event.is_set():
             text = None
             try:
                 try:
-                    sentence_type, audio_datas, text = self.tts_audio_queue.get(
-                        timeout=1
-                    )
+                    item = self.tts_audio_queue.get(timeout=1)
                 except queue.Empty:
                     if self.conn.stop_event.is_set():
                         break
                     continue
+                sentence_type, audio_datas, text = item[:3]
+                # 分块流式合成的条目带有第四项，标明在句子中的位置
+                stream_part = item[3] if len(item) > 3 else None
+                if stream_part is not None and stream_part != StreamPart.START:
+                    self._play_stream_part(stream_part, audio_datas)
+                    continue
+                # 打断清空队列时可能丢失了上一句的结束条目，先上报已播放的部分
+                self._flush_streaming_report()
+                if stream_part == StreamPart.START:
+                    self._streaming_report = (text, list(audio_datas))
+                if audio_datas:
+                    # 本轮第一段合成好的音频
+                    get_turn_trace(self.conn).mark(
+                        "tts_first_chunk", provider_name(self.conn, "TTS")
+                    )
                 future = asyncio.run_coroutine_threadsafe(
                     sendAudioMessage(self.conn, sentence_type, audio_datas, text),
                     self.conn.loop,
@@ -280,20 +416,47 @@ class TTSProviderBase(ABC):
                 future.result()
                 if self.conn.max_output_size > 0 and text:
                     add_device_output(self.conn.headers.get("device-id"), len(text))
-                enqueue_tts_report(self.conn, text, audio_datas)
+                if stream_part is None:
+                    enqueue_tts_report(self.conn, text, audio_datas)
             except Exception as e:
                 logger.bind(tag=TAG).error(
                     f"audio_play_priority priority_thread: {text} {e}"
                 )
 
+    def _play_stream_part(self, stream_part, audio_datas):
+        """播放流式句子的后续音频，整句结束时上报完整的文本和音频"""
+        if self._streaming_report is None:
+            return
+        if stream_part == StreamPart.END:
+            self._flush_streaming_report()
+            return
+        self._streaming_report[1].extend(audio_datas)
+        # 后续音频接在同一句后面播放，不再发送sentence_start
+        future = asyncio.run_coroutine_threadsafe(
+            sendAudio(self.conn, audio_datas, False), self.conn.loop
+        )
+        future.result()
+
+    def _flush_streaming_report(self):
+        if self._streaming_report is not None:
+            text, sentence_audio = self._streaming_report
+            self._streaming_report = None
+            enqueue_tts_report(self.conn, text, sentence_audio)
+
     async def start_session(self, session_id):
         pass
 
     async def finish_session(self, session_id):
         pass
 
+    def prewarm_connection(self):
+        """用户开始说话时提前建立到TTS服务的连接，需在事件循环中调用，默认不做处理"""
+        pass
+
     async def close(self):
         """资源清理方法"""
+        if self.synthesis_pipeline is not None:
+            self.synthesis_pipeline.shutdown()
         if hasattr(self, "ws") and self.ws:
             await self.ws.close()
 
@@ -381,29 +544,14 @@ class TTSProviderBase(ABC):
             if segment_text:
                 # 记录剩余文本TTS处理开始时间
                 tts_start_time = time.monotonic()
-                if hasattr(self.conn, 'voice_pipeline_start_time'):
-                    pipeline_duration = tts_start_time - self.conn.voice_pipeline_start_time
+                trace = get_turn_trace(self.conn)
+                if not trace.finished:
+                    pipeline_duration = tts_start_time - trace.start_time
                     logger.bind(tag=TAG).info(f"🎵 TTS处理剩余文本: '{segment_text}' - 从语音开始: {pipeline_duration:.3f}s")
                 
-                if self.delete_audio_file:
-                    audio_datas = self.to_tts(segment_text)
-                    if audio_datas:
-                        tts_end_time = time.monotonic()
-                        tts_duration = tts_end_time - tts_start_time
-                        logger.bind(tag=TAG).info(f"🎵 TTS剩余文本处理完成 - 耗时: {tts_duration:.3f}s")
-                        self.tts_audio_queue.put(
-                            (SentenceType.MIDDLE, audio_datas, segment_text)
-                        )
-                else:
-                    tts_file = self.to_tts(segment_text)
-                    if tts_file:
-                        tts_end_time = time.monotonic()
-                        tts_duration = tts_end_time - tts_start_time
-                        logger.bind(tag=TAG).info(f"🎵 TTS剩余文本处理完成 - 耗时: {tts_duration:.3f}s")
-                        audio_datas = self._process_audio_file(tts_file)
-                        self.tts_audio_queue.put(
-                            (SentenceType.MIDDLE, audio_datas, segment_text)
-                        )
+                self._synthesize_segment(
+                    segment_text, SentenceType.MIDDLE, tts_start_time
+                )
                 self.processed_chars += len(full_text)
                 return True
         return False
@@ -9,6 +9,13 @@ class SentenceType(Enum):
     LAST = "LAST"  # 最后一句
 
 
+class StreamPart(Enum):
+    # 分块流式合成时一句话拆成的播放条目
+    START = "START"  # 首段音频，发送sentence_start
+    CONTINUE = "CONTINUE"  # 后续音频，只发送音频
+    END = "END"  # 整句结束，上报完整的文本和音频
+
+
 class ContentType(Enum):
     # 内容类型
     TEXT = "TEXT"  # 文本内容
@@ -9,6 +9,7 @@ from core.utils.tts import MarkdownCleaner
 from config.logger import setup_logging
 from core.utils import opus_encoder_utils
 from core.utils.util import check_model_key
+from core.utils.ws_pool import get_ws_pool, is_ws_open
 from core.providers.tts.base import TTSProviderBase
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 from asyncio import Task
@@ -169,6 +170,18 @@ class TTSProvider(TTSProviderBase):
         model_key_msg = check_model_key("TTS", self.access_token)
         if model_key_msg:
             logger.bind(tag=TAG).error(model_key_msg)
+        # 同一套凭证的所有连接共享预热连接池
+        pool_max_idle = config.get("pool_max_idle", "2")
+        pool_idle_timeout = config.get("pool_idle_timeout", "30")
+        self.ws_pool = get_ws_pool(
+            "huoshan_double_stream",
+            self.ws_url,
+            self.appId,
+            self.access_token,
+            self.resource_id,
+            max_idle=int(pool_max_idle) if pool_max_idle not in ("", None) else 2,
+            idle_timeout=float(pool_idle_timeout) if pool_idle_timeout else 30,
+        )
 
     async def open_audio_channels(self, conn):
         try:
@@ -178,22 +191,29 @@ class TTSProvider(TTSProviderBase):
             self.ws = None
             raise
 
+    async def _connect(self):
+        """完成一次新的TLS+WebSocket握手"""
+        ws_header = {
+            "X-Api-App-Key": self.appId,
+            "X-Api-Access-Key": self.access_token,
+            "X-Api-Resource-Id": self.resource_id,
+            "X-Api-Connect-Id": uuid.uuid4(),
+        }
+        return await websockets.connect(
+            self.ws_url, additional_headers=ws_header, max_size=1000000000
+        )
+
     async def _ensure_connection(self):
-        """建立新的WebSocket连接"""
+        """获取可用的WebSocket连接，优先使用自己的连接，其次是连接池中的预热连接"""
         try:
-            if self.ws:
+            if self.ws and is_ws_open(self.ws):
                 logger.bind(tag=TAG).info(f"使用已有链接...")
                 return self.ws
-            logger.bind(tag=TAG).info("开始建立新连接...")
-            ws_header = {
-                "X-Api-App-Key": self.appId,
-                "X-Api-Access-Key": self.access_token,
-                "X-Api-Resource-Id": self.resource_id,
-                "X-Api-Connect-Id": uuid.uuid4(),
-            }
-            self.ws = await websockets.connect(
-                self.ws_url, additional_headers=ws_header, max_size=1000000000
-            )
+            if self.ws:
+                await self.ws_pool.discard(self.ws)
+                self.ws = None
+            logger.bind(tag=TAG).info("从连接池获取连接...")
+            self.ws = await self.ws_pool.acquire(self._connect)
             logger.bind(tag=TAG).info("WebSocket连接建立成功")
             return self.ws
         except Exception as e:
@@ -201,6 +221,12 @@ class TTSProvider(TTSProviderBase):
             self.ws = None
             raise
 
+    def prewarm_connection(self):
+        """用户开始说话时，若自己没有可用连接，则在连接池中预热一条"""
+        if self.ws and is_ws_open(self.ws):
+            return
+        self.ws_pool.prewarm(self._connect)
+
     def tts_text_priority_thread(self):
         """火山引擎双流式TTS的文本处理线程"""
         while not self.conn.stop_event.is_set():
@@ -308,10 +334,7 @@ class TTSProvider(TTSProviderBase):
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
             if self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
+                await self.ws_pool.discard(self.ws)
                 self.ws = None
             raise
 
@@ -408,6 +431,8 @@ class TTSProvider(TTSProviderBase):
 
     async def close(self):
         """资源清理方法"""
+        # 会话仍在进行时连接状态不确定，不能归还连接池
+        session_active = self._monitor_task is not None and not self._monitor_task.done()
         # 取消监听任务
         if self._monitor_task:
             try:
@@ -420,12 +445,15 @@ class TTSProvider(TTSProviderBase):
             self._monitor_task = None
 
         if self.ws:
-            try:
-                await self.ws.close()
-            except:
-                pass
+            if session_active:
+                await self.ws_pool.discard(self.ws)
+            else:
+                await self.ws_pool.release(self.ws)
             self.ws = None
 
+        # 归还Opus编码器，下次会话时重新获取
+        self.opus_encoder.close()
+
     async def _start_monitor_tts_response(self):
         """监听TTS响应"""
         opus_datas_cache = []
@@ -498,10 +526,7 @@ class TTSProvider(TTSProviderBase):
                     break
             # 仅在连接异常时才关闭
             if not session_finished and self.ws:
-                try:
-                    await self.ws.close()
-                except:
-                    pass
+                await self.ws_pool.discard(self.ws)
                 self.ws = None
         # 监听任务退出时清理引用
         finally:
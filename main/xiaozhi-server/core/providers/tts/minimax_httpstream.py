@@ -1,6 +1,7 @@
 import os
 import uuid
 import json
+import aiohttp
 import requests
 from datetime import datetime
 from typing import Iterator, Optional, Union
@@ -9,6 +10,8 @@ from core.utils.util import parse_string_to_list
 
 
 class TTSProvider(TTSProviderBase):
+    supports_chunk_streaming = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.group_id = config.get("group_id")
@@ -54,6 +57,8 @@ class TTSProvider(TTSProviderBase):
             "Authorization": f"Bearer {self.api_key}",
         }
         self.audio_file_type = defult_audio_setting.get("format", "mp3")
+        self.chunk_format = self.audio_setting.get("format", "mp3")
+        self.chunk_sample_rate = int(self.audio_setting.get("sample_rate", 32000))
 
     def generate_filename(self, extension=".mp3"):
         return os.path.join(
@@ -168,6 +173,50 @@ class TTSProvider(TTSProviderBase):
         except Exception as e:
             raise Exception(f"{__name__} stream error: {e}")
 
+    async def text_to_speak_chunks(self, text):
+        """异步分块流式合成，供播放队列边到达边编码"""
+        request_json = {
+            "model": self.model,
+            "text": text,
+            "stream": True,
+            "voice_setting": dict(self.voice_setting),
+            "pronunciation_dict": self.pronunciation_dict,
+            "audio_setting": self.audio_setting,
+        }
+
+        if isinstance(self.timber_weights, list) and len(self.timber_weights) > 0:
+            request_json["timber_weights"] = self.timber_weights
+            request_json["voice_setting"]["voice_id"] = ""
+
+        # 单行的十六进制音频可能超过默认的64KB行长度限制
+        async with aiohttp.ClientSession(read_bufsize=4 * 1024 * 1024) as session:
+            async with session.post(
+                self.api_url, data=json.dumps(request_json), headers=self.header
+            ) as response:
+                if response.status != 200:
+                    raise Exception(
+                        f"HTTP error: {response.status}, response: {await response.text()}"
+                    )
+                # SSE格式，每行一个data事件
+                async for line in response.content:
+                    line = line.strip()
+                    if not line.startswith(b"data:"):
+                        continue
+                    try:
+                        data = json.loads(line[5:].strip())
+                    except json.JSONDecodeError:
+                        continue
+                    if data.get("base_resp", {}).get("status_code", -1) != 0:
+                        raise Exception(
+                            f"API error: {data.get('base_resp', {}).get('status_msg')}"
+                        )
+                    # 最后一条带extra_info的消息是完整音频，跳过
+                    if "extra_info" in data:
+                        continue
+                    audio_hex = data.get("data", {}).get("audio")
+                    if audio_hex:
+                        yield bytes.fromhex(audio_hex)
+
     def save_stream_to_file(
         self, 
         text: str, 
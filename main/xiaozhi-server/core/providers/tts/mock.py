@@ -0,0 +1,77 @@
+"""
+模拟语音合成，用于离线性能测试
+按文字数生成对应时长的提示音，合成耗时按实时率计算，不调用任何模型或网络服务
+"""
+
+import io
+import math
+import wave
+import asyncio
+from array import array
+from core.providers.tts.base import TTSProviderBase
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+SAMPLE_RATE = 16000
+
+
+class TTSProvider(TTSProviderBase):
+    supports_chunk_streaming = True
+
+    def __init__(self, config, delete_audio_file):
+        super().__init__(config, delete_audio_file)
+        self.audio_file_type = "wav"
+        self.chunk_format = "pcm"
+        self.chunk_sample_rate = SAMPLE_RATE
+        # 每个字对应的音频时长
+        self.ms_per_char = float(config.get("ms_per_char", 200))
+        # 合成速度相对实时的倍数，1为实时，越大合成越快
+        self.realtime_factor = float(config.get("realtime_factor", 10))
+        # 请求的固定开销
+        self.latency_ms = float(config.get("latency_ms", 100))
+        frequency = float(config.get("frequency", 440))
+        amplitude = int(32767 * float(config.get("volume", 0.1)))
+        # 预先生成一秒的正弦波，合成时按需截取
+        self._tone = array(
+            "h",
+            (
+                int(amplitude * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+                for i in range(SAMPLE_RATE)
+            ),
+        ).tobytes()
+
+    def _render_wav(self, duration_ms):
+        samples = int(SAMPLE_RATE * duration_ms / 1000)
+        repeats = samples // SAMPLE_RATE + 1
+        pcm = (self._tone * repeats)[: samples * 2]
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(pcm)
+        return buffer.getvalue()
+
+    async def text_to_speak(self, text, output_file):
+        duration_ms = max(1, len(text)) * self.ms_per_char
+        await asyncio.sleep(
+            (self.latency_ms + duration_ms / max(self.realtime_factor, 0.01)) / 1000
+        )
+        audio_bytes = self._render_wav(duration_ms)
+        if output_file:
+            with open(output_file, "wb") as audio_file:
+                audio_file.write(audio_bytes)
+        else:
+            return audio_bytes
+
+    async def text_to_speak_chunks(self, text):
+        """按合成速度分块返回PCM，模拟边合成边返回的厂商接口"""
+        duration_ms = max(1, len(text)) * self.ms_per_char
+        await asyncio.sleep(self.latency_ms / 1000)
+        pcm = self._render_wav(duration_ms)[44:]
+        chunk_bytes = SAMPLE_RATE * 2 // 5  # 200ms
+        for start in range(0, len(pcm), chunk_bytes):
+            await asyncio.sleep(0.2 / max(self.realtime_factor, 0.01))
+            yield pcm[start : start + chunk_bytes]
@@ -1,3 +1,4 @@
+import aiohttp
 import requests
 from core.utils.util import check_model_key
 from core.providers.tts.base import TTSProviderBase
@@ -8,6 +9,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    supports_chunk_streaming = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.api_key = config.get("api_key")
@@ -19,6 +22,9 @@ class TTSProvider(TTSProviderBase):
             self.voice = config.get("voice", "alloy")
         self.response_format = config.get("format", "wav")
         self.audio_file_type = config.get("format", "wav")
+        self.chunk_format = self.response_format
+        # OpenAI返回的pcm为24kHz
+        self.chunk_sample_rate = int(config.get("sample_rate", 24000))
 
         # 处理空字符串的情况
         speed = config.get("speed", "1.0")
@@ -52,3 +58,24 @@ class TTSProvider(TTSProviderBase):
             raise Exception(
                 f"OpenAI TTS请求失败: {response.status_code} - {response.text}"
             )
+
+    async def text_to_speak_chunks(self, text):
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        data = {
+            "model": self.model,
+            "input": text,
+            "voice": self.voice,
+            "response_format": self.response_format,
+            "speed": self.speed,
+        }
+        async with aiohttp.ClientSession() as session:
+            async with session.post(self.api_url, json=data, headers=headers) as response:
+                if response.status != 200:
+                    raise Exception(
+                        f"OpenAI TTS请求失败: {response.status} - {await response.text()}"
+                    )
+                async for chunk in response.content.iter_any():
+                    yield chunk
@@ -1,8 +1,11 @@
+import aiohttp
 import requests
 from core.providers.tts.base import TTSProviderBase
 
 
 class TTSProvider(TTSProviderBase):
+    supports_chunk_streaming = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.model = config.get("model")
@@ -17,6 +20,10 @@ class TTSProvider(TTSProviderBase):
         self.speed = float(config.get("speed", 1.0))
         self.gain = config.get("gain")
 
+        # 分块流式返回时的音频格式，opus为ogg封装
+        self.chunk_format = "ogg" if self.response_format == "opus" else self.response_format
+        self.chunk_sample_rate = int(self.sample_rate) if self.sample_rate else 44100
+
         self.host = "api.siliconflow.cn"
         self.api_url = f"https://{self.host}/v1/audio/speech"
 
@@ -43,3 +50,28 @@ class TTSProvider(TTSProviderBase):
                 return data
         except Exception as e:
             raise Exception(f"{__name__} error: {e}")
+
+    async def text_to_speak_chunks(self, text):
+        request_json = {
+            "model": self.model,
+            "input": text,
+            "voice": self.voice,
+            "response_format": self.response_format,
+            "stream": True,
+        }
+        if self.sample_rate:
+            request_json["sample_rate"] = self.chunk_sample_rate
+        headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json",
+        }
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                self.api_url, json=request_json, headers=headers
+            ) as response:
+                if response.status != 200:
+                    raise Exception(
+                        f"{__name__} status_code: {response.status} response: {await response.text()}"
+                    )
+                async for chunk in response.content.iter_any():
+                    yield chunk
@@ -1,9 +1,74 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Optional
 
+# 模型每次推理的采样点数（16kHz下32ms）
+VAD_CHUNK_SAMPLES = 512
+
 
 class VADProviderBase(ABC):
     @abstractmethod
     def is_vad(self, conn, data) -> bool:
         """检测音频数据中的语音活动"""
         pass
+
+    async def is_vad_async(self, conn, data) -> bool:
+        """异步检测语音活动，默认直接调用is_vad；跨进程推理的实现重写此方法，且不支持同步的is_vad"""
+        return self.is_vad(conn, data)
+
+    def init_voice_state_params(self, config):
+        """解析双阈值和静默时长配置"""
+        # 处理空字符串的情况
+        threshold = config.get("threshold", "0.5")
+        threshold_low = config.get("threshold_low", "0.2")
+        min_silence_duration_ms = config.get("min_silence_duration_ms", "1000")
+
+        self.vad_threshold = float(threshold) if threshold else 0.5
+        self.vad_threshold_low = float(threshold_low) if threshold_low else 0.2
+
+        self.silence_threshold_ms = (
+            int(min_silence_duration_ms) if min_silence_duration_ms else 1000
+        )
+
+        # 至少要多少帧才算有语音
+        self.frame_window_threshold = 3
+
+    @staticmethod
+    def take_complete_chunks(conn) -> Optional[bytes]:
+        """从连接缓冲区取出所有完整的推理块，不足一块的数据保留在缓冲区"""
+        chunk_bytes = VAD_CHUNK_SAMPLES * 2
+        usable = len(conn.client_audio_buffer) // chunk_bytes * chunk_bytes
+        if usable == 0:
+            return None
+        pcm_data = bytes(conn.client_audio_buffer[:usable])
+        conn.client_audio_buffer = conn.client_audio_buffer[usable:]
+        return pcm_data
+
+    def update_voice_state(self, conn, speech_prob: float) -> bool:
+        """根据一个推理块的语音概率更新连接的语音状态"""
+        # 双阈值判断
+        if speech_prob >= self.vad_threshold:
+            is_voice = True
+        elif speech_prob <= self.vad_threshold_low:
+            is_voice = False
+        else:
+            is_voice = conn.last_is_voice
+
+        # 声音没低于最低值则延续前一个状态，判断为有声音
+        conn.last_is_voice = is_voice
+
+        # 更新滑动窗口
+        conn.client_voice_window.append(is_voice)
+        client_have_voice = (
+            conn.client_voice_window.count(True) >= self.frame_window_threshold
+        )
+
+        # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+        if conn.client_have_voice and not client_have_voice:
+            stop_duration = time.time() * 1000 - conn.last_activity_time
+            if stop_duration >= self.silence_threshold_ms:
+                conn.client_voice_stop = True
+        if client_have_voice:
+            conn.client_have_voice = True
+            conn.last_activity_time = time.time() * 1000
+        return client_have_voice
@@ -0,0 +1,45 @@
+"""
+模拟语音活动检测，用于离线性能测试
+按音量能量判断是否有声音，不加载模型，结果只取决于输入音频
+"""
+
+import numpy as np
+import opuslib_next
+from config.logger import setup_logging
+from core.providers.vad.base import VADProviderBase, VAD_CHUNK_SAMPLES
+
+TAG = __name__
+logger = setup_logging()
+
+
+class VADProvider(VADProviderBase):
+    def __init__(self, config):
+        logger.bind(tag=TAG).info("MockVAD", config)
+        # 推理块的均方根音量达到该值时视为有声音（16位采样）
+        energy_threshold = config.get("energy_threshold", "500")
+        self.energy_threshold = float(energy_threshold) if energy_threshold else 500.0
+        self.decoder = opuslib_next.Decoder(16000, 1)
+        self.init_voice_state_params(config)
+
+    def speech_prob(self, chunk: np.ndarray) -> float:
+        rms = float(np.sqrt(np.mean(chunk.astype(np.float32) ** 2)))
+        return 1.0 if rms >= self.energy_threshold else 0.0
+
+    def is_vad(self, conn, opus_packet):
+        try:
+            pcm_frame = self.decoder.decode(opus_packet, 960)
+            conn.client_audio_buffer.extend(pcm_frame)
+
+            client_have_voice = False
+            pcm_data = self.take_complete_chunks(conn)
+            if pcm_data:
+                samples = np.frombuffer(pcm_data, dtype=np.int16)
+                for start in range(0, len(samples), VAD_CHUNK_SAMPLES):
+                    client_have_voice = self.update_voice_state(
+                        conn, self.speech_prob(samples[start : start + VAD_CHUNK_SAMPLES])
+                    )
+            return client_have_voice
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
@@ -0,0 +1,50 @@
+import asyncio
+import opuslib_next
+from config.logger import setup_logging
+from core.providers.vad.base import VADProviderBase
+from core.utils.model_worker import get_model_worker_client
+
+TAG = __name__
+logger = setup_logging()
+
+
+class VADProvider(VADProviderBase):
+    """语音概率由本地模型工作进程计算，状态判断仍在本进程完成"""
+
+    def __init__(self, config):
+        self.decoder = opuslib_next.Decoder(16000, 1)
+        self.init_voice_state_params(config)
+        self.client = get_model_worker_client()
+        if self.client is None:
+            raise RuntimeError("本地模型多进程服务未启用")
+
+    def _take_pcm(self, conn, opus_packet):
+        pcm_frame = self.decoder.decode(opus_packet, 960)
+        conn.client_audio_buffer.extend(pcm_frame)
+        return self.take_complete_chunks(conn)
+
+    def _apply_probs(self, conn, probs) -> bool:
+        client_have_voice = False
+        for speech_prob in probs:
+            client_have_voice = self.update_voice_state(conn, speech_prob)
+        return client_have_voice
+
+    def is_vad(self, conn, opus_packet):
+        # 同步等待工作进程的结果会阻塞事件循环，调用方必须使用is_vad_async
+        raise RuntimeError("模型进程VAD不支持同步检测，请使用is_vad_async")
+
+    async def is_vad_async(self, conn, opus_packet):
+        try:
+            pcm_data = self._take_pcm(conn, opus_packet)
+            if not pcm_data:
+                return False
+            probs = await asyncio.wait_for(
+                asyncio.wrap_future(self.client.infer_vad(pcm_data)),
+                timeout=self.client.timeout,
+            )
+            return self._apply_probs(conn, probs)
+        except opuslib_next.OpusError as e:
+            logger.bind(tag=TAG).info(f"解码错误: {e}")
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"模型进程VAD检测失败: {e}")
+        return False
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 
@@ -10,3 +11,7 @@ class VLLMProviderBase(ABC):
     def response(self, question, base64_image):
         """VLLM response generator"""
         pass
+
+    async def response_async(self, question, base64_image):
+        """异步调用，默认在线程池中执行同步接口，避免阻塞事件循环"""
+        return await asyncio.to_thread(self.response, question, base64_image)
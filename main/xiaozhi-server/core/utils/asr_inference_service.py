@@ -0,0 +1,167 @@
+"""
+本地ASR推理服务
+多个连接共享同一个本地ASR模型时，识别请求统一进入队列，
+由固定数量的推理线程把短时间窗口内到达的请求合并为一次批量推理
+"""
+
+import time
+import queue
+import asyncio
+import weakref
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Any
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 已启动的推理服务，供指标接口汇总
+_services = weakref.WeakSet()
+
+
+class ASRInferenceService:
+    """本地ASR批量推理服务"""
+
+    def __init__(
+        self,
+        name: str,
+        batch_infer: Callable[[List[bytes]], List[str]],
+        batch_window_ms: float = 20,
+        max_batch_size: int = 8,
+        num_workers: int = 1,
+    ):
+        """
+        Args:
+            name: 服务名称，用于日志和指标
+            batch_infer: 批量推理函数，输入PCM列表，按顺序返回识别文本列表
+            batch_window_ms: 合并请求的等待窗口(毫秒)
+            max_batch_size: 单次批量推理的最大请求数
+            num_workers: 推理线程数，同一时刻最多有这么多批次在执行
+        """
+        self.name = name
+        self._batch_infer = batch_infer
+        self.batch_window = max(0.0, float(batch_window_ms)) / 1000
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.num_workers = max(1, int(num_workers))
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_batch_size": 0,
+            "last_batch_size": 0,
+            "total_wait_ms": 0.0,
+            "total_infer_ms": 0.0,
+            "batch_size_histogram": {},
+        }
+
+        self._workers = []
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop, name=f"asr-infer-{name}-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        _services.add(self)
+        logger.bind(tag=TAG).info(
+            f"本地ASR推理服务已启动: {name}, 批处理窗口: {batch_window_ms}ms, "
+            f"最大批量: {self.max_batch_size}, 推理线程: {self.num_workers}"
+        )
+
+    def submit(self, pcm_data: bytes) -> Future:
+        """提交一条识别请求，返回Future"""
+        future = Future()
+        self._queue.put((pcm_data, future, time.monotonic()))
+        return future
+
+    async def infer(self, pcm_data: bytes) -> str:
+        """在任意事件循环中等待识别结果"""
+        return await asyncio.wrap_future(self.submit(pcm_data))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取队列深度和批量推理统计"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["batch_size_histogram"] = dict(self._stats["batch_size_histogram"])
+            in_flight = self._in_flight
+        batches = stats["batches"]
+        requests = stats["requests"]
+        stats["name"] = self.name
+        stats["queue_depth"] = self._queue.qsize()
+        stats["in_flight"] = in_flight
+        stats["avg_batch_size"] = requests / batches if batches else 0.0
+        stats["avg_wait_ms"] = stats["total_wait_ms"] / requests if requests else 0.0
+        stats["avg_infer_ms"] = stats["total_infer_ms"] / batches if batches else 0.0
+        return stats
+
+    def _collect_batch(self) -> list:
+        """阻塞等待第一条请求，然后在窗口期内尽量凑满一批"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self):
+        while True:
+            batch = self._collect_batch()
+            # 跳过调用方已取消的请求
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            start_time = time.monotonic()
+            with self._stats_lock:
+                self._in_flight += len(batch)
+            try:
+                texts = self._batch_infer([pcm for pcm, _, _ in batch])
+                if len(texts) != len(batch):
+                    raise RuntimeError(
+                        f"批量推理结果数量不匹配: 输入{len(batch)}, 输出{len(texts)}"
+                    )
+                for (_, future, _), text in zip(batch, texts):
+                    future.set_result(text)
+                failed = False
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"{self.name} 批量推理失败: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                failed = True
+
+            end_time = time.monotonic()
+            batch_size = len(batch)
+            with self._stats_lock:
+                self._in_flight -= batch_size
+                stats = self._stats
+                stats["requests"] += batch_size
+                stats["batches"] += 1
+                stats["last_batch_size"] = batch_size
+                stats["max_batch_size"] = max(stats["max_batch_size"], batch_size)
+                stats["total_infer_ms"] += (end_time - start_time) * 1000
+                stats["total_wait_ms"] += sum(
+                    (start_time - enqueue_time) * 1000 for _, _, enqueue_time in batch
+                )
+                histogram = stats["batch_size_histogram"]
+                histogram[batch_size] = histogram.get(batch_size, 0) + 1
+                if failed:
+                    stats["errors"] += 1
+            logger.bind(tag=TAG).debug(
+                f"{self.name} 批量推理完成: 批量{batch_size}, "
+                f"耗时{(end_time - start_time) * 1000:.1f}ms, 队列剩余{self._queue.qsize()}"
+            )
+
+
+def get_asr_inference_stats() -> List[Dict[str, Any]]:
+    """获取所有本地ASR推理服务的统计"""
+    return [service.get_stats() for service in list(_services)]
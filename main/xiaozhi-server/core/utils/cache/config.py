@@ -18,6 +18,9 @@ class CacheType(Enum):
     IP_INFO = "ip_info"
     CONFIG = "config"
     DEVICE_PROMPT = "device_prompt"
+    AGENT_CONFIG = "agent_config"
+    VISION_IMAGE = "vision_image"
+    VISION_RESPONSE = "vision_response"
 
 
 @dataclass
@@ -54,5 +57,14 @@ class CacheConfig:
             CacheType.DEVICE_PROMPT: cls(
                 strategy=CacheStrategy.TTL, ttl=None, max_size=1000  # 手动失效
             ),
+            CacheType.AGENT_CONFIG: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=86400, max_size=5000  # 按条目设置过期
+            ),
+            CacheType.VISION_IMAGE: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=600, max_size=32  # 预处理后的图片较大，只保留少量
+            ),
+            CacheType.VISION_RESPONSE: cls(
+                strategy=CacheStrategy.TTL_LRU, ttl=30, max_size=500  # 按配置设置过期
+            ),
         }
         return configs.get(cache_type, cls())
@@ -197,6 +197,12 @@ class GlobalCacheManager:
 
         return deleted_count
 
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计和各缓存空间的条目数"""
+        with self._global_lock:
+            sizes = {name: len(cache) for name, cache in self._caches.items()}
+        return {**self._stats, "sizes": sizes}
+
     def _maybe_cleanup(self, cache_name: str):
         """定期清理检查"""
         config = self._configs.get(cache_name)
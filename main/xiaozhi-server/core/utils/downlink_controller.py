@@ -0,0 +1,159 @@
+"""
+下行自适应流控
+每个连接一个控制器，估计设备端的播放缓冲和网络往返时延，决定每段音频开始时突发发送的帧数，
+之后按实时速率发送并保持这一提前量：链路抖动大或设备报告欠载时加大缓冲，
+链路稳定时逐步放宽提前量，让服务端更早发完整段音频。
+
+往返时延来自WebSocket的ping/pong：连接保活的ping结果，以及用户说完话时额外发送的一次ping。
+设备也可以在listen或tts消息中附带可选的播放反馈，例如：
+    {"type": "listen", "state": "stop", "buffer_ms": 180, "underruns": 2}
+buffer_ms为设备当前缓冲的音频时长，underruns为累计欠载次数。
+"""
+
+import asyncio
+from typing import Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 每帧音频时长（毫秒），匹配 Opus 编码
+FRAME_MS = 60
+# 每次欠载增加的缓冲，以及每段音频顺利发完后回落的缓冲（毫秒）
+UNDERRUN_PENALTY_MS = 120
+PENALTY_DECAY_MS = 30
+# 链路稳定时每段音频放宽的提前量（毫秒）
+BONUS_STEP_MS = 60
+# 往返时延波动低于该值（秒）才认为链路稳定
+STABLE_RTTVAR = 0.03
+# ping等待pong的超时时间（秒）
+PROBE_TIMEOUT = 2.0
+
+
+class DownlinkController:
+    def __init__(
+        self,
+        conn,
+        min_ahead_ms: float = 180,
+        max_ahead_ms: float = 600,
+        adaptive: bool = True,
+    ):
+        self.conn = conn
+        self.min_ahead_ms = min_ahead_ms
+        self.max_ahead_ms = max(min_ahead_ms, max_ahead_ms)
+        self.adaptive = adaptive
+        # 平滑往返时延及其波动（秒），算法同TCP重传超时估计
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.penalty_ms = 0.0
+        self.bonus_ms = 0.0
+        # 估计设备播放完已发送音频的时刻（事件循环时钟）
+        self.play_until = 0.0
+        self.underruns = 0
+        self._last_latency = None
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, conn, config: dict) -> "DownlinkController":
+        downlink_config = config.get("downlink") or {}
+        return cls(
+            conn,
+            min_ahead_ms=int(downlink_config.get("pre_buffer_frames", 3)) * FRAME_MS,
+            max_ahead_ms=float(downlink_config.get("max_ahead_ms", 600)),
+            adaptive=str(downlink_config.get("adaptive", True)).lower()
+            in ("true", "1", "yes"),
+        )
+
+    def add_rtt_sample(self, rtt: float):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def probe(self):
+        """发送一次ping测量往返时延，不阻塞调用方"""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe())
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            pong_waiter = await self.conn.websocket.ping()
+            await asyncio.wait_for(pong_waiter, timeout=PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            # 超时按超时时长计入，链路很差时加大缓冲
+            self.add_rtt_sample(PROBE_TIMEOUT)
+            return
+        except Exception as e:
+            logger.bind(tag=TAG).debug(f"测量往返时延失败: {e}")
+            return
+        self.add_rtt_sample(loop.time() - start)
+
+    def on_client_feedback(self, msg: dict):
+        """处理设备在listen/tts消息中附带的播放反馈，没有反馈字段时忽略"""
+        buffer_ms = msg.get("buffer_ms")
+        if isinstance(buffer_ms, (int, float)) and buffer_ms >= 0:
+            self.play_until = asyncio.get_running_loop().time() + buffer_ms / 1000
+        underruns = msg.get("underruns")
+        if isinstance(underruns, int):
+            if underruns > self.underruns:
+                self.on_underrun(underruns - self.underruns)
+            self.underruns = underruns
+
+    def on_underrun(self, count: int = 1):
+        self.penalty_ms = min(
+            self.max_ahead_ms, self.penalty_ms + UNDERRUN_PENALTY_MS * count
+        )
+        self.bonus_ms = 0.0
+
+    def target_ahead_ms(self) -> float:
+        """期望设备端保持的缓冲时长"""
+        if not self.adaptive:
+            return self.min_ahead_ms
+        rtt_ms = (self.srtt or 0.0) * 1000
+        target = (
+            self.min_ahead_ms
+            + rtt_ms
+            + 4 * self.rttvar * 1000
+            + self.penalty_ms
+            + self.bonus_ms
+        )
+        return max(self.min_ahead_ms, min(self.max_ahead_ms, target))
+
+    def buffered_ms(self, now: float) -> float:
+        return max(0.0, self.play_until - now) * 1000
+
+    def start_stream(self, now: float, new_turn: bool) -> int:
+        """一段音频开始发送时调用，返回需要预先突发发送的帧数"""
+        if new_turn:
+            # 新一轮对话开始时设备缓冲为空
+            self.play_until = now
+        if not self.adaptive:
+            return int(self.min_ahead_ms // FRAME_MS) if new_turn else 0
+        self._sample_keepalive_latency()
+        missing_ms = self.target_ahead_ms() - self.buffered_ms(now)
+        return max(0, int(round(missing_ms / FRAME_MS)))
+
+    def on_frames_sent(self, now: float, count: int):
+        self.play_until = max(self.play_until, now) + count * FRAME_MS / 1000
+
+    def end_stream(self):
+        """一段音频完整发完，期间没有欠载时逐步回落缓冲、放宽提前量"""
+        if not self.adaptive:
+            return
+        if self.penalty_ms > 0:
+            self.penalty_ms = max(0.0, self.penalty_ms - PENALTY_DECAY_MS)
+        elif self.srtt is not None and self.rttvar < STABLE_RTTVAR:
+            self.bonus_ms = min(
+                self.max_ahead_ms - self.min_ahead_ms, self.bonus_ms + BONUS_STEP_MS
+            )
+
+    def _sample_keepalive_latency(self):
+        """连接保活的ping会更新websocket.latency，有新结果时计入估计"""
+        latency = getattr(self.conn.websocket, "latency", None)
+        if latency and latency != self._last_latency:
+            self._last_latency = latency
+            self.add_rtt_sample(latency)
@@ -0,0 +1,194 @@
+"""
+下行音频发送调度器
+所有连接的音频帧由一个协程按固定刻度统一发送：每个刻度遍历正在播放的音频流，把到期的帧一次写出，
+不再为每个连接的每一帧单独sleep和唤醒。
+
+每段音频开始时突发发送的帧数和之后保持的提前量由连接的下行流控决定（见downlink_controller）。
+到期的帧交给该音频流的写入任务发送，每个音频流同时最多一个写入任务，调度协程本身从不等待网络写入，
+个别客户端的发送缓冲区积压不会拖慢其他连接。
+客户端落后时（上一次写入还没完成，或事件循环卡顿错过了刻度），积压的到期帧在下一次一起连续写出。
+打断时直接取消连接上的音频流，不需要逐帧检查打断标志。
+"""
+
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional
+from config.logger import setup_logging
+from core.utils.metrics import AUDIO_FRAMES_SENT
+
+TAG = __name__
+logger = setup_logging()
+
+# 每帧音频时长（秒），匹配 Opus 编码
+FRAME_DURATION = 0.06
+
+
+class AudioStream:
+    """一段按实时速率发送的音频，由调度器推进"""
+
+    __slots__ = (
+        "conn",
+        "frames",
+        "new_turn",
+        "ahead",
+        "start_time",
+        "sent",
+        "future",
+        "writing",
+    )
+
+    def __init__(self, conn, frames: List[bytes], new_turn: bool):
+        self.conn = conn
+        self.frames = frames
+        # 是否本轮对话的第一段音频，此时设备缓冲为空
+        self.new_turn = new_turn
+        # 开始时突发发送的帧数，之后保持这一提前量
+        self.ahead = 0
+        self.start_time: Optional[float] = None
+        self.sent = 0
+        self.future = asyncio.get_running_loop().create_future()
+        # 正在进行的写入任务，写入完成前不再为该流安排新的帧
+        self.writing: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self):
+        return self.future.done()
+
+    def due_frames(self, now: float) -> int:
+        """截至now应已发出的帧数：突发帧立即发送，之后每帧按实时速率到期"""
+        if self.start_time is None:
+            self.start_time = now
+            self.ahead = self.conn.downlink_controller.start_stream(now, self.new_turn)
+        elapsed = int((now - self.start_time) / FRAME_DURATION) + 1
+        return min(len(self.frames), self.ahead + elapsed)
+
+    def cancel(self):
+        if not self.future.done():
+            self.future.set_result(False)
+
+    async def wait(self) -> bool:
+        """等待发送完成，被取消时返回False"""
+        return await asyncio.shield(self.future)
+
+
+class DownlinkScheduler:
+    def __init__(self, tick: float = 0.02):
+        self.tick = tick
+        self._streams: Dict[object, deque] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "DownlinkScheduler":
+        downlink_config = config.get("downlink") or {}
+        return cls(tick=float(downlink_config.get("tick_ms", 20)) / 1000)
+
+    def start(self):
+        """在当前事件循环中启动调度协程，重复调用无副作用"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for conn in list(self._streams):
+            self.cancel(conn)
+
+    async def play(self, conn, frames: List[bytes], pre_buffer: bool) -> AudioStream:
+        """
+        排队播放一段音频，同一连接上的音频流按提交顺序依次播放
+        连接上没有正在播放的音频时立即写出首批到期的帧，返回时预缓冲已经发出
+        pre_buffer为True表示本轮对话的第一段音频
+        """
+        self.start()
+        stream = AudioStream(conn, frames, pre_buffer)
+        streams = self._streams.setdefault(conn, deque())
+        streams.append(stream)
+        if len(streams) == 1:
+            self._service(conn, streams, asyncio.get_running_loop().time())
+            # 由调用方等待首批写入，调度协程不等待
+            if stream.writing is not None:
+                await asyncio.shield(stream.writing)
+        return stream
+
+    def cancel(self, conn):
+        """取消连接上所有正在播放和排队的音频流"""
+        streams = self._streams.pop(conn, None)
+        if streams:
+            for stream in streams:
+                stream.cancel()
+
+    def get_stats(self) -> dict:
+        return {"streams": len(self._streams)}
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            next_time += self.tick
+            delay = next_time - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # 落后超过一个刻度时不补跑，到期的帧会在本次一起写出
+                next_time = loop.time()
+            now = loop.time()
+            for conn, streams in list(self._streams.items()):
+                try:
+                    self._service(conn, streams, now)
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"下行音频调度出错: {e}")
+
+    def _service(self, conn, streams: deque, now: float):
+        """推进连接上的音频流，到期的帧交给写入任务发送，不等待网络写入"""
+        while streams:
+            stream = streams[0]
+            if not stream.finished:
+                if stream.writing is not None:
+                    return
+                due = stream.due_frames(now)
+                if due > stream.sent:
+                    batch = stream.frames[stream.sent : due]
+                    stream.writing = asyncio.create_task(self._write(stream, batch))
+                    return
+                if stream.finished:
+                    pass
+                elif stream.sent < len(stream.frames):
+                    return
+                else:
+                    stream.future.set_result(True)
+                    conn.downlink_controller.end_stream()
+            streams.popleft()
+        if self._streams.get(conn) is streams:
+            del self._streams[conn]
+
+    async def _write(self, stream: AudioStream, batch: List[bytes]):
+        conn = stream.conn
+        sent = stream.sent
+        try:
+            for frame in batch:
+                if stream.finished:
+                    break
+                await conn.websocket.send(frame)
+                stream.sent += 1
+            # 推迟空闲定时器，只修改截止时间，不读取时钟
+            conn.touch_activity()
+        except Exception as e:
+            if not stream.future.done():
+                stream.future.set_exception(e)
+        finally:
+            now = asyncio.get_running_loop().time()
+            conn.downlink_controller.on_frames_sent(now, stream.sent - sent)
+            AUDIO_FRAMES_SENT.inc(stream.sent - sent)
+            stream.writing = None
+        # 写完最后一批时立即结束该流并开始下一段，不必等到下一个刻度
+        streams = self._streams.get(conn)
+        if streams and streams[0] is stream:
+            try:
+                self._service(conn, streams, now)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"下行音频调度出错: {e}")
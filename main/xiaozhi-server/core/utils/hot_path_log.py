@@ -0,0 +1,184 @@
+"""
+热路径日志
+每句音频、每条消息、每个LLM分片这类高频事件不在调用处格式化字符串，
+只把事件名和字段放入队列，由后台线程格式化并输出，并支持采样和按设备限流
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import threading
+from typing import Any, Dict, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 队列积压超过该值时直接丢弃新事件，避免日志拖慢业务
+MAX_QUEUE_SIZE = 10000
+# 限流状态最多记录的设备数，超过后清空重新计数
+MAX_TRACKED_DEVICES = 10000
+
+
+class HotPathLogger:
+    """低开销的热路径事件日志"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+        per_device_rate: float = 20,
+        sink: str = "loguru",
+        file_path: Optional[str] = None,
+    ):
+        self.enabled = enabled
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        # 令牌桶：每秒补充per_device_rate个，最多积攒1秒
+        self.per_device_rate = float(per_device_rate or 0)
+        self.sink = sink
+        self.file_path = file_path
+        self._buckets: Dict[Any, list] = {}
+        self._queue = queue.SimpleQueue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats = {
+            "emitted": 0,
+            "sampled_out": 0,
+            "rate_limited": 0,
+            "queue_dropped": 0,
+            "written": 0,
+        }
+
+    def event(self, name: str, device_id: Optional[str] = None, **fields):
+        """
+        记录一个热路径事件，字段在后台线程中才会被格式化
+
+        Args:
+            name: 事件名
+            device_id: 设备ID，用于按设备限流
+            fields: 事件字段
+        """
+        if not self.enabled:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self._stats["sampled_out"] += 1
+            return
+        now = time.time()
+        if self.per_device_rate > 0 and not self._take_token(device_id, now):
+            self._stats["rate_limited"] += 1
+            return
+        if self._queue.qsize() >= MAX_QUEUE_SIZE:
+            self._stats["queue_dropped"] += 1
+            return
+        if self._worker is None:
+            self._start_worker()
+        self._stats["emitted"] += 1
+        self._queue.put((now, name, device_id, fields))
+
+    def _take_token(self, device_id, now: float) -> bool:
+        # 只在事件线程间做近似计数，不加锁，偶尔多放行一两条可以接受
+        bucket = self._buckets.get(device_id)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_DEVICES:
+                self._buckets.clear()
+            self._buckets[device_id] = [self.per_device_rate - 1, now]
+            return True
+        tokens = min(
+            self.per_device_rate, bucket[0] + (now - bucket[1]) * self.per_device_rate
+        )
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+    def _start_worker(self):
+        with self._worker_lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(
+                target=self._run, name="hot-path-log", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        output = None
+        if self.sink == "jsonl" and self.file_path:
+            output = open(self.file_path, "a", encoding="utf-8", buffering=1 << 16)
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # 一次取出积压的全部事件，批量写入
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if output is not None:
+                    output.write(
+                        "".join(self._format_json(record) + "\n" for record in batch)
+                    )
+                    output.flush()
+                else:
+                    for ts, name, device_id, fields in batch:
+                        logger.bind(tag=TAG).info(
+                            "[{}] {} {}",
+                            device_id or "-",
+                            name,
+                            " ".join(f"{k}={v}" for k, v in fields.items()),
+                        )
+                self._stats["written"] += len(batch)
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"写入热路径日志失败: {e}")
+
+    @staticmethod
+    def _format_json(record) -> str:
+        ts, name, device_id, fields = record
+        return json.dumps(
+            {"ts": round(ts, 6), "event": name, "device_id": device_id, **fields},
+            ensure_ascii=False,
+            default=str,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats["queue_size"] = self._queue.qsize()
+        return stats
+
+
+_hot_path_logger = None
+_hot_path_lock = threading.Lock()
+
+
+def get_hot_path_logger() -> HotPathLogger:
+    """获取全局热路径日志，首次调用时按log.hot_path配置创建"""
+    global _hot_path_logger
+    if _hot_path_logger is not None:
+        return _hot_path_logger
+    with _hot_path_lock:
+        if _hot_path_logger is None:
+            from config.config_loader import load_config
+
+            log_config = load_config().get("log", {})
+            hot_config = log_config.get("hot_path") or {}
+            file_path = os.path.join(
+                log_config.get("log_dir", "tmp"),
+                hot_config.get("file", "hot_path.jsonl"),
+            )
+            _hot_path_logger = HotPathLogger(
+                enabled=hot_config.get("enabled", True),
+                sample_rate=hot_config.get("sample_rate", 1.0),
+                per_device_rate=hot_config.get("per_device_rate", 20),
+                sink=hot_config.get("sink", "loguru"),
+                file_path=file_path,
+            )
+    return _hot_path_logger
+
+
+def hot_event(name: str, device_id: Optional[str] = None, **fields):
+    """记录热路径事件的快捷方法"""
+    get_hot_path_logger().event(name, device_id, **fields)
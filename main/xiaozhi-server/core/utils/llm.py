@@ -7,10 +7,20 @@ project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
 sys.path.insert(0, project_root)
 
 from config.logger import setup_logging
+import json
+import hashlib
 import importlib
+import threading
+from collections import OrderedDict
 
 logger = setup_logging()
 
+# 按配置共享的LLM实例：LLM客户端本身无连接级状态，相同配置的连接复用同一个实例（及其HTTP连接池）
+MAX_SHARED_INSTANCES = 64
+_shared_instances = OrderedDict()
+_shared_lock = threading.Lock()
+_shared_stats = {"hits": 0, "misses": 0}
+
 
 def create_instance(class_name, *args, **kwargs):
     # 创建LLM实例
@@ -21,3 +31,39 @@ def create_instance(class_name, *args, **kwargs):
         return sys.modules[lib_name].LLMProvider(*args, **kwargs)
 
     raise ValueError(f"不支持的LLM类型: {class_name}，请检查该配置的type是否设置正确")
+
+
+def config_hash(class_name, config):
+    """计算配置块的哈希，作为共享实例的键"""
+    content = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{class_name}:{content}".encode("utf-8")).hexdigest()
+
+
+def get_shared_instance(class_name, config):
+    """获取相同配置共享的LLM实例，不存在时创建"""
+    key = config_hash(class_name, config)
+    with _shared_lock:
+        instance = _shared_instances.get(key)
+        if instance is not None:
+            _shared_instances.move_to_end(key)
+            _shared_stats["hits"] += 1
+            return instance
+
+    # 创建实例可能较慢，不持有锁；并发创建时以先写入的为准
+    instance = create_instance(class_name, config)
+    with _shared_lock:
+        existing = _shared_instances.get(key)
+        if existing is not None:
+            _shared_stats["hits"] += 1
+            return existing
+        _shared_stats["misses"] += 1
+        _shared_instances[key] = instance
+        # 超出上限时淘汰最久未使用的实例，仍在使用的连接持有引用不受影响
+        while len(_shared_instances) > MAX_SHARED_INSTANCES:
+            _shared_instances.popitem(last=False)
+    return instance
+
+
+def get_shared_instance_stats():
+    with _shared_lock:
+        return {"instances": len(_shared_instances), **_shared_stats}
@@ -0,0 +1,192 @@
+"""
+运行指标
+热路径上只做计数器自增和直方图分桶，不加锁（依赖GIL，极少数并发自增可能丢失，对监控可以接受）；
+队列深度、连接数、缓存命中率等状态类指标在抓取时通过采集函数现场计算，
+以Prometheus文本格式输出
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 延迟类直方图的默认分桶（秒）
+DEFAULT_LATENCY_BUCKETS = (
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0
+)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Counter:
+    """只增计数器"""
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in list(self._values.items()):
+            labels = dict(zip(self.label_names, key))
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """固定分桶的直方图"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签：[各分桶计数..., +Inf计数, 总和]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in list(self._values.items()):
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = {**labels, "le": repr(float(bound))}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(
+                f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {cumulative}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, label_names: Iterable[str] = ()) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Counter(name, help_text, label_names)
+            return metric
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(
+                    name, help_text, label_names, buckets
+                )
+            return metric
+
+    def register_collector(self, collector: Callable):
+        """
+        注册抓取时调用的采集函数
+        采集函数返回 [(指标名, 类型gauge/counter, 说明, [(后缀, 标签, 值), ...]), ...]
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def unregister_collector(self, collector: Callable):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def render(self) -> str:
+        """生成Prometheus文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"采集指标失败: {e}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for suffix, labels, value in samples:
+                    lines.append(f"{name}{suffix}{_format_labels(labels)} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+registry = MetricsRegistry()
+
+# 热路径指标
+CONNECTIONS_TOTAL = registry.counter("xiaozhi_connections_total", "累计建立的设备连接数")
+TURNS_TOTAL = registry.counter("xiaozhi_turns_total", "累计完成的对话轮数")
+AUDIO_FRAMES_SENT = registry.counter("xiaozhi_audio_frames_sent_total", "累计下发的音频帧数")
+STAGE_LATENCY = registry.histogram(
+    "xiaozhi_stage_latency_seconds",
+    "对话各阶段耗时",
+    label_names=("stage", "provider"),
+)
+VISION_LATENCY = registry.histogram(
+    "xiaozhi_vision_latency_seconds",
+    "视觉分析请求各阶段耗时",
+    label_names=("stage", "provider"),
+)
+VISION_REQUESTS = registry.counter(
+    "xiaozhi_vision_requests_total", "视觉分析请求数", label_names=("result",)
+)
+VISION_IMAGE_BYTES = registry.counter(
+    "xiaozhi_vision_image_bytes_total",
+    "视觉分析图片字节数，original为设备上传的原图，processed为预处理后上传给模型的图片",
+    label_names=("stage",),
+)
+
+
+def gauge(name: str, help_text: str, value: float, labels: Optional[Dict[str, str]] = None):
+    """构造一个单值gauge，供采集函数使用"""
+    return (name, "gauge", help_text, [("", labels or {}, value)])
@@ -0,0 +1,436 @@
+"""
+本地模型多进程服务
+把本地ASR/VAD模型放到独立的工作进程中推理，主进程通过UNIX socket上的二进制协议调用，
+避免模型推理和websocket事件循环在同一个进程里争抢GIL
+
+协议帧格式：op(1字节) + request_id(4字节) + payload长度(4字节) + payload，均为网络字节序
+
+启动方式：
+- spawn：由服务进程启动并守护工作进程
+- connect：连接已启动的工作进程，一台机器上的多个服务进程可以共享同一组工作进程，
+  工作进程通过 python -m core.utils.model_worker 启动（需与服务使用相同的配置）
+"""
+
+import os
+import glob
+import time
+import socket
+import struct
+import asyncio
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+HEADER = struct.Struct("!BII")
+
+OP_ASR = 1
+OP_VAD = 2
+OP_PING = 3
+OP_RESULT = 0x80
+OP_ERROR = 0xFF
+
+# 可以交给工作进程推理的本地模型类型
+LOCAL_ASR_TYPES = ("fun_local", "sherpa_onnx_local")
+LOCAL_VAD_TYPES = ("silero",)
+
+_client = None
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("工作进程连接已断开")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _module_type(config: Dict[str, Any], module: str) -> Optional[str]:
+    """获取选中模块的type"""
+    select_module = config.get("selected_module", {}).get(module)
+    if not select_module or select_module not in config.get(module, {}):
+        return None
+    return config[module][select_module].get("type", select_module)
+
+
+def _socket_path(socket_dir: str, index: int) -> str:
+    return os.path.join(socket_dir, f"worker-{index}.sock")
+
+
+class ModelWorker:
+    """运行在工作进程中的模型服务"""
+
+    def __init__(self, config: Dict[str, Any], socket_path: str):
+        self.config = config
+        self.socket_path = socket_path
+        self.asr = None
+        self.vad = None
+        # VAD模型带状态，串行推理
+        self.vad_executor = ThreadPoolExecutor(max_workers=1)
+
+    def load_models(self):
+        from core.utils import asr, vad
+
+        asr_type = _module_type(self.config, "ASR")
+        if asr_type in LOCAL_ASR_TYPES:
+            select_asr_module = self.config["selected_module"]["ASR"]
+            self.asr = asr.create_instance(
+                asr_type,
+                self.config["ASR"][select_asr_module],
+                str(self.config.get("delete_audio", True)).lower()
+                in ("true", "1", "yes"),
+            )
+        vad_type = _module_type(self.config, "VAD")
+        if vad_type in LOCAL_VAD_TYPES:
+            select_vad_module = self.config["selected_module"]["VAD"]
+            self.vad = vad.create_instance(
+                vad_type, self.config["VAD"][select_vad_module]
+            )
+
+    def warmup(self):
+        """用静音数据跑一遍推理，避免第一个请求承担模型初始化开销"""
+        start_time = time.time()
+        if self.asr is not None:
+            asyncio.run(self.asr.speech_to_text([b"\x00" * 32000], "warmup", "pcm"))
+        if self.vad is not None:
+            self.vad.speech_probs(b"\x00" * 2048)
+        logger.bind(tag=TAG).info(
+            f"模型进程预热完成: {self.socket_path}, 耗时: {time.time() - start_time:.3f}s"
+        )
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_client, self.socket_path)
+        logger.bind(tag=TAG).info(f"模型进程已就绪: {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_client(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                op, request_id, length = HEADER.unpack(header)
+                payload = await reader.readexactly(length) if length else b""
+                task = asyncio.create_task(
+                    self._handle_request(writer, write_lock, op, request_id, payload)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _handle_request(self, writer, write_lock, op, request_id, payload):
+        try:
+            if op == OP_ASR and self.asr is not None:
+                text, _ = await self.asr.speech_to_text([payload], "worker", "pcm")
+                result = (text or "").encode("utf-8")
+            elif op == OP_VAD and self.vad is not None:
+                probs = await asyncio.get_running_loop().run_in_executor(
+                    self.vad_executor, self.vad.speech_probs, payload
+                )
+                result = struct.pack(f"!{len(probs)}f", *probs)
+            elif op == OP_PING:
+                result = b""
+            else:
+                raise ValueError(f"不支持的请求类型: {op}")
+            response_op = OP_RESULT
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"模型进程处理请求失败: {e}")
+            response_op, result = OP_ERROR, str(e).encode("utf-8")
+
+        async with write_lock:
+            writer.write(HEADER.pack(response_op, request_id, len(result)) + result)
+            await writer.drain()
+
+
+def _worker_main(config: Dict[str, Any], socket_path: str):
+    """工作进程入口"""
+    worker = ModelWorker(config, socket_path)
+    worker.load_models()
+    worker.warmup()
+    asyncio.run(worker.serve())
+
+
+class ModelWorkerPool:
+    """启动并守护模型工作进程，进程退出后自动重启"""
+
+    def __init__(self, config: Dict[str, Any]):
+        worker_config = config.get("model_worker", {})
+        self.config = config
+        self.num_workers = max(1, int(worker_config.get("workers", 2)))
+        self.socket_dir = worker_config.get("socket_dir", "tmp/model_worker")
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: Dict[int, Any] = {}
+        self._restart_counts: Dict[int, int] = {}
+        self._stop_event = threading.Event()
+        self._monitor_thread = None
+
+    @property
+    def socket_paths(self) -> List[str]:
+        return [_socket_path(self.socket_dir, i) for i in range(self.num_workers)]
+
+    def start(self):
+        os.makedirs(self.socket_dir, exist_ok=True)
+        for i in range(self.num_workers):
+            self._start_worker(i)
+        self._monitor_thread = threading.Thread(
+            target=self._monitor, name="model-worker-monitor", daemon=True
+        )
+        self._monitor_thread.start()
+
+    def _start_worker(self, index: int):
+        socket_path = _socket_path(self.socket_dir, index)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.config, socket_path),
+            name=f"model-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+        logger.bind(tag=TAG).info(f"模型进程已启动: {index}, pid: {process.pid}")
+
+    def _monitor(self):
+        while not self._stop_event.wait(1):
+            for index, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                restart_count = self._restart_counts.get(index, 0)
+                logger.bind(tag=TAG).error(
+                    f"模型进程{index}已退出(exitcode={process.exitcode})，第{restart_count + 1}次重启"
+                )
+                # 连续崩溃时退避，最多等待30秒
+                if self._stop_event.wait(min(2**restart_count, 30)):
+                    return
+                self._restart_counts[index] = restart_count + 1
+                self._start_worker(index)
+
+    def wait_ready(self, timeout: float = 120) -> bool:
+        """等待所有工作进程完成预热并开始监听"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if all(os.path.exists(path) for path in self.socket_paths):
+                return True
+            time.sleep(0.5)
+        return False
+
+    def join(self):
+        """阻塞直到守护线程退出（独立运行时使用）"""
+        while self._monitor_thread and self._monitor_thread.is_alive():
+            self._monitor_thread.join(1)
+
+    def stop(self):
+        self._stop_event.set()
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+
+class _WorkerConnection:
+    """到单个工作进程的长连接，请求按request_id多路复用"""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.closed = False
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        # 发送单独加锁，避免大包发送阻塞读线程取回结果
+        self._write_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def request(self, op: int, payload: bytes) -> Future:
+        future = Future()
+        with self._lock:
+            if self.closed:
+                raise ConnectionError(f"工作进程连接已断开: {self.socket_path}")
+            request_id = next(self._request_ids) & 0xFFFFFFFF
+            self._pending[request_id] = future
+        try:
+            with self._write_lock:
+                self.sock.sendall(HEADER.pack(op, request_id, len(payload)))
+                self.sock.sendall(payload)
+        except OSError as e:
+            self._close(e)
+            raise
+        return future
+
+    def _read_loop(self):
+        try:
+            while True:
+                op, request_id, length = HEADER.unpack(
+                    _recv_exact(self.sock, HEADER.size)
+                )
+                payload = _recv_exact(self.sock, length) if length else b""
+                with self._lock:
+                    future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if op == OP_ERROR:
+                    future.set_exception(RuntimeError(payload.decode("utf-8")))
+                else:
+                    future.set_result(payload)
+        except Exception as e:
+            self._close(e)
+
+    def _close(self, error: Exception):
+        """关闭连接并让所有未完成的请求失败"""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError(str(error)))
+
+
+class ModelWorkerClient:
+    """主进程侧的调用客户端，线程安全，可在任意事件循环中使用"""
+
+    def __init__(self, config: Dict[str, Any], socket_paths: Optional[List[str]] = None):
+        worker_config = config.get("model_worker", {})
+        self.socket_dir = worker_config.get("socket_dir", "tmp/model_worker")
+        self.timeout = float(worker_config.get("timeout", 15))
+        self._socket_paths = socket_paths
+        self._connections: Dict[str, _WorkerConnection] = {}
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        # 工作进程加载的是启动时选中的模块，只有选中相同模块的连接才能走工作进程
+        self.asr_module = (
+            config["selected_module"].get("ASR")
+            if _module_type(config, "ASR") in LOCAL_ASR_TYPES
+            else None
+        )
+        self.vad_module = (
+            config["selected_module"].get("VAD")
+            if _module_type(config, "VAD") in LOCAL_VAD_TYPES
+            else None
+        )
+
+    def _paths(self) -> List[str]:
+        if self._socket_paths is not None:
+            return self._socket_paths
+        return sorted(glob.glob(os.path.join(self.socket_dir, "worker-*.sock")))
+
+    def _request(self, op: int, payload: bytes) -> Future:
+        paths = self._paths()
+        if not paths:
+            raise ConnectionError("没有可用的模型进程")
+        start = next(self._round_robin)
+        last_error = None
+        # 轮询选择工作进程，连接失败时尝试下一个
+        for i in range(len(paths)):
+            path = paths[(start + i) % len(paths)]
+            try:
+                with self._lock:
+                    connection = self._connections.get(path)
+                    if connection is None or connection.closed:
+                        connection = _WorkerConnection(path)
+                        self._connections[path] = connection
+                return connection.request(op, payload)
+            except OSError as e:
+                last_error = e
+        raise ConnectionError(f"所有模型进程均不可用: {last_error}")
+
+    def infer_asr(self, pcm_data: bytes) -> Future:
+        """提交ASR请求，Future结果为识别文本"""
+        future = Future()
+        raw = self._request(OP_ASR, pcm_data)
+        raw.add_done_callback(
+            lambda f: _chain(f, future, lambda payload: payload.decode("utf-8"))
+        )
+        return future
+
+    def infer_vad(self, pcm_data: bytes) -> Future:
+        """提交VAD请求，Future结果为每个推理块的语音概率"""
+        future = Future()
+        raw = self._request(OP_VAD, pcm_data)
+        raw.add_done_callback(
+            lambda f: _chain(
+                f,
+                future,
+                lambda payload: list(struct.unpack(f"!{len(payload) // 4}f", payload)),
+            )
+        )
+        return future
+
+    def serves_asr(self, select_asr_module: str) -> bool:
+        return self.asr_module is not None and select_asr_module == self.asr_module
+
+    def serves_vad(self, select_vad_module: str) -> bool:
+        return self.vad_module is not None and select_vad_module == self.vad_module
+
+
+def _chain(source: Future, target: Future, convert):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+        return
+    try:
+        target.set_result(convert(source.result()))
+    except Exception as e:
+        target.set_exception(e)
+
+
+def is_model_worker_enabled(config: Dict[str, Any]) -> bool:
+    return bool(config.get("model_worker", {}).get("enabled", False))
+
+
+def init_model_worker(config: Dict[str, Any]) -> Optional[ModelWorkerPool]:
+    """按配置启动工作进程并初始化全局客户端，返回进程池（connect模式返回None）"""
+    global _client
+    if not is_model_worker_enabled(config):
+        return None
+    pool = None
+    mode = config["model_worker"].get("mode", "spawn")
+    if mode == "spawn":
+        pool = ModelWorkerPool(config)
+        pool.start()
+        if not pool.wait_ready(float(config["model_worker"].get("startup_timeout", 120))):
+            logger.bind(tag=TAG).warning("部分模型进程未在规定时间内就绪")
+        _client = ModelWorkerClient(config, pool.socket_paths)
+    else:
+        _client = ModelWorkerClient(config)
+    logger.bind(tag=TAG).info(
+        f"本地模型多进程服务已启用: mode={mode}, asr={_client.asr_module}, vad={_client.vad_module}"
+    )
+    return pool
+
+
+def get_model_worker_client() -> Optional[ModelWorkerClient]:
+    return _client
+
+
+if __name__ == "__main__":
+    from config.config_loader import load_config
+
+    pool = ModelWorkerPool(load_config())
+    pool.start()
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        pool.stop()
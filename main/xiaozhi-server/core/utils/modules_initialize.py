@@ -1,6 +1,7 @@
 from typing import Dict, Any
 from config.logger import setup_logging
 from core.utils import tts, llm, intent, memory, vad, asr
+from core.utils.model_worker import get_model_worker_client
 
 TAG = __name__
 logger = setup_logging()
@@ -41,7 +42,8 @@ def initialize_modules(
             if "type" not in config["LLM"][select_llm_module]
             else config["LLM"][select_llm_module]["type"]
         )
-        modules["llm"] = llm.create_instance(
+        # 相同配置的连接共享LLM实例，避免每个连接重新建立HTTP连接池
+        modules["llm"] = llm.get_shared_instance(
             llm_type,
             config["LLM"][select_llm_module],
         )
@@ -71,6 +73,13 @@ def initialize_modules(
             "api_key": "",
             "timeout": 30
         }
+        # 离线性能测试时允许使用模拟记忆服务
+        select_memory_config = config.get("Memory", {}).get(
+            config["selected_module"].get("Memory"), {}
+        )
+        if select_memory_config.get("type") == "mock":
+            forced_memory_type = "mock"
+            forced_memory_config = select_memory_config
         modules["memory"] = memory.create_instance(
             forced_memory_type,
             forced_memory_config,
@@ -87,6 +96,10 @@ def initialize_modules(
             if "type" not in config["VAD"][select_vad_module]
             else config["VAD"][select_vad_module]["type"]
         )
+        # 本地模型由工作进程托管时，使用代理实例
+        worker_client = get_model_worker_client()
+        if worker_client and worker_client.serves_vad(select_vad_module):
+            vad_type = "worker_proxy"
         modules["vad"] = vad.create_instance(
             vad_type,
             config["VAD"][select_vad_module],
@@ -123,6 +136,10 @@ def initialize_asr(config):
         if "type" not in config["ASR"][select_asr_module]
         else config["ASR"][select_asr_module]["type"]
     )
+    # 本地模型由工作进程托管时，使用代理实例
+    worker_client = get_model_worker_client()
+    if worker_client and worker_client.serves_asr(select_asr_module):
+        asr_type = "worker_proxy"
     new_asr = asr.create_instance(
         asr_type,
         config["ASR"][select_asr_module],
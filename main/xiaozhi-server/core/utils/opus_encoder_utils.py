@@ -4,13 +4,49 @@ Opus编码工具类
 """
 
 import logging
+import threading
 import traceback
 
-import numpy as np
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from opuslib_next import Encoder
 from opuslib_next import constants
 
+# 每种(采样率, 通道数, 比特率)最多缓存的空闲编码器数量
+MAX_IDLE_ENCODERS = 32
+
+_encoder_pool: Dict[Tuple[int, int, int], List[Encoder]] = {}
+_encoder_pool_lock = threading.Lock()
+
+
+def acquire_encoder(
+    sample_rate: int, channels: int, bitrate: int, complexity: int
+) -> Encoder:
+    """从编码器池中取出一个已重置的编码器，池中没有时新建"""
+    key = (sample_rate, channels, bitrate)
+    with _encoder_pool_lock:
+        idle = _encoder_pool.get(key)
+        encoder = idle.pop() if idle else None
+    if encoder is not None:
+        encoder.reset_state()
+        return encoder
+
+    encoder = Encoder(
+        sample_rate, channels, constants.APPLICATION_AUDIO  # 音频优化模式
+    )
+    encoder.bitrate = bitrate
+    encoder.complexity = complexity
+    encoder.signal = constants.SIGNAL_VOICE  # 语音信号优化
+    return encoder
+
+
+def release_encoder(sample_rate: int, channels: int, bitrate: int, encoder: Encoder):
+    """归还编码器，供后续的连接复用"""
+    key = (sample_rate, channels, bitrate)
+    with _encoder_pool_lock:
+        idle = _encoder_pool.setdefault(key, [])
+        if len(idle) < MAX_IDLE_ENCODERS:
+            idle.append(encoder)
+
 
 class OpusEncoderUtils:
     """PCM到Opus的编码器"""
@@ -31,106 +67,113 @@ class OpusEncoderUtils:
         self.frame_size = (sample_rate * frame_size_ms) // 1000
         # 总帧大小 = 每帧样本数 * 通道数
         self.total_frame_size = self.frame_size * channels
+        # 每帧字节数（16位PCM）
+        self.frame_bytes = self.total_frame_size * 2
 
         # 比特率和复杂度设置
         self.bitrate = 24000  # bps
         self.complexity = 10  # 最高质量
 
-        # 缓冲区初始化为空
-        self.buffer = np.array([], dtype=np.int16)
+        # 预分配一帧大小的缓冲区，只保存上次调用剩下的不足一帧的数据
+        self._pending = bytearray(self.frame_bytes)
+        self._pending_len = 0
+        # 防止编码过程中编码器被close归还给其他连接
+        self._lock = threading.Lock()
 
         try:
             # 创建Opus编码器
-            self.encoder = Encoder(
-                sample_rate, channels, constants.APPLICATION_AUDIO  # 音频优化模式
+            self.encoder = acquire_encoder(
+                sample_rate, channels, self.bitrate, self.complexity
             )
-            self.encoder.bitrate = self.bitrate
-            self.encoder.complexity = self.complexity
-            self.encoder.signal = constants.SIGNAL_VOICE  # 语音信号优化
         except Exception as e:
             logging.error(f"初始化Opus编码器失败: {e}")
             raise RuntimeError("初始化失败") from e
 
     def reset_state(self):
         """重置编码器状态"""
-        self.encoder.reset_state()
-        self.buffer = np.array([], dtype=np.int16)
+        with self._lock:
+            if self.encoder is not None:
+                self.encoder.reset_state()
+            self._pending_len = 0
 
     def encode_pcm_to_opus(self, pcm_data: bytes, end_of_stream: bool) -> List[bytes]:
         """
-        将PCM数据编码为Opus格式
+        将PCM数据编码为Opus格式，一次调用编码其中所有完整帧
 
         Args:
-            pcm_data: PCM字节数据
+            pcm_data: PCM字节数据（小端16位），可以是bytes、bytearray或memoryview
             end_of_stream: 是否为流的结束
 
         Returns:
             Opus数据包列表
         """
-        # 将字节数据转换为short数组
-        new_samples = self._convert_bytes_to_shorts(pcm_data)
-
-        # 校验PCM数据
-        self._validate_pcm_data(new_samples)
-
-        # 将新数据追加到缓冲区
-        self.buffer = np.append(self.buffer, new_samples)
-
+        with self._lock:
+            return self._encode_locked(pcm_data, end_of_stream)
+
+    def _encode_locked(self, pcm_data: bytes, end_of_stream: bool) -> List[bytes]:
+        # 通过memoryview按帧切片，不为整块数据创建副本
+        view = memoryview(pcm_data).cast("B")
+        total = len(view)
+        frame_bytes = self.frame_bytes
         opus_packets = []
         offset = 0
 
+        # 先用新数据补齐上次剩下的不完整帧
+        if self._pending_len:
+            take = min(frame_bytes - self._pending_len, total)
+            self._pending[self._pending_len : self._pending_len + take] = view[:take]
+            self._pending_len += take
+            offset = take
+            if self._pending_len == frame_bytes:
+                self._append_encoded(opus_packets, bytes(self._pending))
+                self._pending_len = 0
+
         # 处理所有完整帧
-        while offset <= len(self.buffer) - self.total_frame_size:
-            frame = self.buffer[offset : offset + self.total_frame_size]
-            output = self._encode(frame)
-            if output:
-                opus_packets.append(output)
-            offset += self.total_frame_size
+        end = offset + (total - offset) // frame_bytes * frame_bytes
+        for start in range(offset, end, frame_bytes):
+            self._append_encoded(opus_packets, view[start : start + frame_bytes].tobytes())
 
-        # 保留未处理的样本
-        self.buffer = self.buffer[offset:]
+        # 保留未处理的数据
+        remaining = total - end
+        if remaining:
+            self._pending[self._pending_len : self._pending_len + remaining] = view[end:]
+            self._pending_len += remaining
 
         # 流结束时处理剩余数据
-        if end_of_stream and len(self.buffer) > 0:
-            # 创建最后一帧并用0填充
-            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
-            last_frame[: len(self.buffer)] = self.buffer
-
-            output = self._encode(last_frame)
-            if output:
-                opus_packets.append(output)
-            self.buffer = np.array([], dtype=np.int16)
+        if end_of_stream and self._pending_len:
+            # 最后一帧用0填充
+            self._pending[self._pending_len :] = bytes(frame_bytes - self._pending_len)
+            self._append_encoded(opus_packets, bytes(self._pending))
+            self._pending_len = 0
 
         return opus_packets
 
-    def _encode(self, frame: np.ndarray) -> Optional[bytes]:
+    def _append_encoded(self, opus_packets: List[bytes], frame: bytes):
+        output = self._encode(frame)
+        if output:
+            opus_packets.append(output)
+
+    def _encode(self, frame: bytes) -> Optional[bytes]:
         """编码一帧音频数据"""
         try:
-            # 将numpy数组转换为bytes
-            frame_bytes = frame.tobytes()
+            if self.encoder is None:
+                # close之后再次使用时重新从编码器池获取
+                self.encoder = acquire_encoder(
+                    self.sample_rate, self.channels, self.bitrate, self.complexity
+                )
             # opuslib要求输入字节数必须是channels*2的倍数
-            encoded = self.encoder.encode(frame_bytes, self.frame_size)
+            encoded = self.encoder.encode(frame, self.frame_size)
             return encoded
         except Exception as e:
             logging.error(f"Opus编码失败: {e}")
             traceback.print_exc()
             return None
 
-    def _convert_bytes_to_shorts(self, bytes_data: bytes) -> np.ndarray:
-        """将字节数组转换为short数组 (16位PCM)"""
-        # 假设输入是小端字节序的16位PCM
-        return np.frombuffer(bytes_data, dtype=np.int16)
-
-    def _validate_pcm_data(self, pcm_shorts: np.ndarray) -> None:
-        """验证PCM数据是否有效"""
-        # 16位PCM数据范围是 -32768 到 32767
-        if np.any((pcm_shorts < -32768) | (pcm_shorts > 32767)):
-            invalid_samples = pcm_shorts[(pcm_shorts < -32768) | (pcm_shorts > 32767)]
-            logging.warning(f"发现无效PCM样本: {invalid_samples[:5]}...")
-            # 在实际应用中可以选择裁剪而不是抛出异常
-            # np.clip(pcm_shorts, -32768, 32767, out=pcm_shorts)
-
     def close(self):
-        """关闭编码器并释放资源"""
-        # opuslib没有明确的关闭方法，Python的垃圾回收会处理
-        pass
+        """归还编码器到编码器池，之后仍可继续使用（会重新获取编码器）"""
+        with self._lock:
+            encoder = self.encoder
+            self.encoder = None
+            self._pending_len = 0
+        if encoder is not None:
+            release_encoder(self.sample_rate, self.channels, self.bitrate, encoder)
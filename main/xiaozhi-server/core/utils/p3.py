@@ -56,4 +56,22 @@ def decode_opus_from_bytes(input_bytes):
         total_frames += 1
 
     total_duration = (total_frames * frame_duration_ms) / 1000.0
-    return opus_datas, total_duration
\ No newline at end of file
+    return opus_datas, total_duration
+
+def encode_opus_to_bytes(opus_datas):
+    """
+    将 Opus 数据包列表封装为p3格式：每包前加4字节头部[1字节类型，1字节保留，2字节长度]
+    """
+    parts = []
+    for opus_data in opus_datas:
+        parts.append(struct.pack('>BBH', 0, 0, len(opus_data)))
+        parts.append(opus_data)
+    return b"".join(parts)
+
+
+def encode_opus_to_file(opus_datas, output_file):
+    """
+    将 Opus 数据包列表保存为p3文件
+    """
+    with open(output_file, 'wb') as f:
+        f.write(encode_opus_to_bytes(opus_datas))
@@ -0,0 +1,499 @@
+"""
+聊天记录上报器
+进程内所有连接的聊天记录由一个上报器统一上报给manager-api：
+音频在独立的线程池中由Opus转成WAV，不占用连接的线程池；
+记录按条数、大小或等待时间攒成一批，gzip压缩后一次请求上报，多个设备的记录可以合并在同一批中。
+
+上报失败的批次写入磁盘，按指数退避重试，服务重启后继续上报；
+manager-api拒绝的批次改为逐条上报，仍被拒绝的记录移到dead子目录，不阻塞之后的记录。
+manager-api没有批量接口时改为逐条上报，并定时重新尝试批量接口。
+"""
+
+import os
+import json
+import gzip
+import time
+import atexit
+import base64
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from config.logger import setup_logging
+from config.manage_api_client import (
+    ManageApiError,
+    is_endpoint_unsupported,
+    report_batch,
+    report_record,
+    should_retry,
+)
+
+TAG = __name__
+logger = setup_logging()
+
+# 估算记录大小时每条记录的固定开销（字节）
+RECORD_OVERHEAD = 200
+# 批量接口不可用时，间隔该时长（秒）重新尝试
+BATCH_PROBE_INTERVAL = 300
+
+
+class ReportSpooler:
+    def __init__(
+        self,
+        batch_size: int = 20,
+        max_batch_bytes: int = 2 * 1024 * 1024,
+        flush_interval: float = 2.0,
+        compress: bool = True,
+        spool_dir: str = "data/report_spool",
+        max_spool_bytes: int = 200 * 1024 * 1024,
+        encode_workers: int = 1,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.spool_dir = spool_dir
+        self.max_spool_bytes = max_spool_bytes
+        self.base_retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._cond = threading.Condition()
+        # 待上报的记录：(提交时间, 记录, 估算大小)
+        self._pending: deque = deque()
+        self._pending_bytes = 0
+        # 正在编码音频的记录：序号 -> 提交时间
+        self._encoding: Dict[int, float] = {}
+        self._encode_seq = 0
+        self._encoder = ThreadPoolExecutor(
+            max_workers=max(1, encode_workers), thread_name_prefix="report-encode"
+        )
+        # 磁盘上等待重试的批次文件名，最早的在前
+        self._spool: deque = deque()
+        self._spool_bytes = 0
+        self._spool_seq = 0
+        self._retry_delay = retry_delay
+        self._next_retry = 0.0
+        self._batch_supported = True
+        self._batch_probe_at = 0.0
+        # 被manager-api拒绝的记录保存在dead子目录，不再重试
+        self.dead_letter_dir = os.path.join(spool_dir, "dead")
+        self._dead_letter_bytes = 0
+        self._closed = False
+        self._stats = {
+            "records": 0,
+            "sent": 0,
+            "batches": 0,
+            "bytes_sent": 0,
+            "failed_batches": 0,
+            "dead_letter": 0,
+            "dropped": 0,
+        }
+
+        self._load_spool()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="report-spooler"
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ReportSpooler":
+        report_config = (config.get("manager-api") or {}).get("report") or {}
+        return cls(
+            batch_size=int(report_config.get("batch_size", 20)),
+            flush_interval=float(report_config.get("flush_interval", 2)),
+            compress=str(report_config.get("compress", True)).lower()
+            in ("true", "1", "yes"),
+            spool_dir=report_config.get("spool_dir") or "data/report_spool",
+            max_spool_bytes=int(float(report_config.get("max_spool_mb", 200)) * 1024 * 1024),
+            encode_workers=int(report_config.get("encode_workers", 1)),
+        )
+
+    def submit(self, record: Dict, audio_encoder: Optional[Callable[[], bytes]] = None):
+        """
+        提交一条上报记录，不阻塞调用方
+        Args:
+            record: 上报接口的请求体，不含audioBase64
+            audio_encoder: 生成上报音频的函数，在编码线程池中调用
+        """
+        submit_time = time.time()
+        if audio_encoder is None:
+            self._append(submit_time, record)
+            return
+        with self._cond:
+            token = self._encode_seq
+            self._encode_seq += 1
+            self._encoding[token] = submit_time
+        try:
+            self._encoder.submit(self._encode, token, submit_time, record, audio_encoder)
+        except RuntimeError:
+            # 进程退出时线程池已关闭，只上报文本
+            with self._cond:
+                self._encoding.pop(token, None)
+            self._append(submit_time, record)
+
+    def get_stats(self) -> dict:
+        now = time.time()
+        with self._cond:
+            oldest = [self._pending[0][0]] if self._pending else []
+            oldest.extend(self._encoding.values())
+            if self._spool:
+                oldest.append(self._spool_time(self._spool[0]))
+            return {
+                "pending": len(self._pending),
+                "encoding": len(self._encoding),
+                "spooled_batches": len(self._spool),
+                "spooled_bytes": self._spool_bytes,
+                # 最早一条未上报记录已等待的时长
+                "lag_seconds": max(0.0, now - min(oldest)) if oldest else 0.0,
+                **self._stats,
+            }
+
+    def close(self, timeout: float = 5.0):
+        """停止上报，尚未上报的记录写入磁盘，下次启动时继续上报"""
+        if self._closed:
+            return
+        self._encoder.shutdown(wait=True)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        while True:
+            batch = self._take_batch(wait=False)
+            if not batch:
+                break
+            body, compressed = self._serialize(batch)
+            self._write_spool(batch[0][0], body, compressed, len(batch))
+
+    def _encode(self, token, submit_time, record, audio_encoder):
+        try:
+            audio = audio_encoder()
+            record["audioBase64"] = (
+                base64.b64encode(audio).decode("utf-8") if audio else None
+            )
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"上报音频编码失败，只上报文本: {e}")
+        with self._cond:
+            self._encoding.pop(token, None)
+        self._append(submit_time, record)
+
+    def _append(self, submit_time, record):
+        size = (
+            len(record.get("content") or "") * 3
+            + len(record.get("audioBase64") or "")
+            + RECORD_OVERHEAD
+        )
+        with self._cond:
+            self._pending.append((submit_time, record, size))
+            self._pending_bytes += size
+            self._stats["records"] += 1
+            if (
+                len(self._pending) >= self._batch_limit()
+                or self._pending_bytes >= self.max_batch_bytes
+            ):
+                self._cond.notify()
+
+    def _batch_limit(self) -> int:
+        # 逐条上报时每批只放一条，失败重试时不会重复上报已成功的记录
+        return self.batch_size if self._batch_supported else 1
+
+    def _run(self):
+        while not self._closed:
+            try:
+                batch = self._take_batch()
+                if batch:
+                    body, compressed = self._serialize(batch)
+                    # 磁盘上有待重试的批次时按顺序排在其后
+                    remainder = (body, compressed, len(batch))
+                    if not self._spool:
+                        remainder = self._send(body, compressed, len(batch))
+                    if remainder is not None:
+                        self._write_spool(batch[0][0], *remainder)
+                        if len(self._spool) == 1:
+                            self._backoff()
+                self._retry_spool()
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
+                time.sleep(1)
+
+    def _take_batch(self, wait: bool = True) -> List[Tuple[float, Dict]]:
+        """等待攒够一批记录；磁盘上的批次到了重试时间或上报器关闭时返回空列表"""
+        with self._cond:
+            while wait:
+                if self._closed:
+                    return []
+                now = time.time()
+                if self._pending and (
+                    len(self._pending) >= self._batch_limit()
+                    or self._pending_bytes >= self.max_batch_bytes
+                    or now - self._pending[0][0] >= self.flush_interval
+                ):
+                    break
+                timeout = self.flush_interval
+                if self._pending:
+                    timeout -= now - self._pending[0][0]
+                if self._spool:
+                    retry_in = self._next_retry - time.monotonic()
+                    if retry_in <= 0:
+                        return []
+                    timeout = min(timeout, retry_in)
+                self._cond.wait(timeout)
+
+            batch = []
+            size = 0
+            limit = self._batch_limit()
+            while self._pending and len(batch) < limit:
+                submit_time, record, record_size = self._pending[0]
+                if batch and size + record_size > self.max_batch_bytes:
+                    break
+                self._pending.popleft()
+                self._pending_bytes -= record_size
+                size += record_size
+                batch.append((submit_time, record))
+            return batch
+
+    def _serialize(self, batch) -> Tuple[bytes, bool]:
+        return self._serialize_records([record for _, record in batch])
+
+    def _serialize_records(self, records: List[Dict]) -> Tuple[bytes, bool]:
+        body = json.dumps(records, ensure_ascii=False).encode("utf-8")
+        if self.compress:
+            return gzip.compress(body, compresslevel=6), True
+        return body, False
+
+    def _send(
+        self, body: bytes, compressed: bool, count: int
+    ) -> Optional[Tuple[bytes, bool, int]]:
+        """
+        上报一批记录，返回None表示已处理完，否则返回需要稍后重试的记录
+        被manager-api拒绝的记录移到dead子目录，不会返回
+        """
+        probing = not self._batch_supported
+        batch_unauthorized = False
+        if not probing or time.monotonic() >= self._batch_probe_at:
+            try:
+                report_batch(body, compressed)
+            except Exception as e:
+                if is_endpoint_unsupported(e):
+                    # 旧版manager-api没有批量接口，同一批记录改为逐条上报，稍后再尝试
+                    self._disable_batch(probing, e)
+                elif isinstance(e, ManageApiError) and e.code == 401:
+                    # 旧版manager-api未放行批量接口时也返回401，逐条上报成功才说明是接口问题
+                    batch_unauthorized = True
+                elif should_retry(e):
+                    return self._keep(body, compressed, count, e)
+                else:
+                    # 批次中可能有个别记录被拒绝，逐条上报以免其余记录受影响
+                    logger.bind(tag=TAG).warning(f"批量上报被拒绝，本批改为逐条上报: {e}")
+            else:
+                if probing:
+                    self._batch_supported = True
+                    logger.bind(tag=TAG).info("manager-api批量上报接口可用，恢复批量上报")
+                self._record_sent(count, len(body))
+                return None
+
+        records = json.loads(gzip.decompress(body) if compressed else body)
+        sent = 0
+        for index, record in enumerate(records):
+            try:
+                report_record(record)
+                sent += 1
+            except Exception as e:
+                if not should_retry(e):
+                    self._dead_letter(record, e)
+                    continue
+                # 已处理的记录不再重试，只保留剩余的记录
+                if index:
+                    self._record_sent(sent, 0)
+                    body, compressed = self._serialize_records(records[index:])
+                return self._keep(body, compressed, len(records) - index, e)
+        if batch_unauthorized:
+            self._disable_batch(probing, "批量接口返回401，逐条上报成功")
+        self._record_sent(sent, len(body))
+        return None
+
+    def _disable_batch(self, probing: bool, reason):
+        self._batch_supported = False
+        self._batch_probe_at = time.monotonic() + BATCH_PROBE_INTERVAL
+        if not probing:
+            logger.bind(tag=TAG).warning(f"manager-api不支持批量上报接口，改为逐条上报: {reason}")
+
+    def _keep(self, body: bytes, compressed: bool, count: int, e: Exception):
+        logger.bind(tag=TAG).warning(f"聊天记录上报失败，{count}条记录稍后重试: {e}")
+        with self._cond:
+            self._stats["failed_batches"] += 1
+        return body, compressed, count
+
+    def _dead_letter(self, record: Dict, e: Exception):
+        """保存被manager-api拒绝的记录，供人工排查后补报"""
+        body, compressed = self._serialize_records([record])
+        with self._cond:
+            self._spool_seq += 1
+            name = f"{int(time.time() * 1000):013d}-{self._spool_seq:06d}-1.json"
+            over_limit = self._dead_letter_bytes + len(body) > self.max_spool_bytes
+        if compressed:
+            name += ".gz"
+        path = os.path.join(self.dead_letter_dir, name)
+        if over_limit:
+            logger.bind(tag=TAG).error(f"聊天记录被拒绝，dead目录已满，丢弃该记录: {e}")
+            with self._cond:
+                self._stats["dropped"] += 1
+            return
+        try:
+            os.makedirs(self.dead_letter_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(path + ".tmp", path)
+        except OSError as write_error:
+            logger.bind(tag=TAG).error(f"写入dead目录失败，丢弃该记录: {path}, {write_error}")
+            with self._cond:
+                self._stats["dropped"] += 1
+            return
+        logger.bind(tag=TAG).error(f"聊天记录被manager-api拒绝，已移到{path}: {e}")
+        with self._cond:
+            self._dead_letter_bytes += len(body)
+            self._stats["dead_letter"] += 1
+
+    def _record_sent(self, count: int, size: int):
+        with self._cond:
+            self._stats["sent"] += count
+            self._stats["batches"] += 1
+            self._stats["bytes_sent"] += size
+
+    def _backoff(self):
+        self._next_retry = time.monotonic() + self._retry_delay
+        self._retry_delay = min(self._retry_delay * 2, self.max_retry_delay)
+
+    def _retry_spool(self):
+        while self._spool and not self._closed and time.monotonic() >= self._next_retry:
+            name = self._spool[0]
+            path = os.path.join(self.spool_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    body = f.read()
+            except OSError as e:
+                logger.bind(tag=TAG).error(f"读取上报缓存文件失败: {path}, {e}")
+                self._remove_spool_head(0)
+                continue
+            count = self._spool_count(name)
+            remainder = self._send(body, name.endswith(".gz"), count)
+            if remainder is not None:
+                if remainder[2] < count:
+                    self._replace_spool_head(len(body), *remainder)
+                self._backoff()
+                return
+            self._remove_spool_head(len(body))
+            self._retry_delay = self.base_retry_delay
+
+    def _write_spool(self, oldest: float, body: bytes, compressed: bool, count: int):
+        with self._cond:
+            self._spool_seq += 1
+            name = f"{int(oldest * 1000):013d}-{self._spool_seq:06d}-{count}.json"
+        if compressed:
+            name += ".gz"
+        path = os.path.join(self.spool_dir, name)
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            # 先写临时文件再改名，进程中途退出时不会留下不完整的批次
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.bind(tag=TAG).error(f"写入上报缓存文件失败，丢弃{count}条记录: {e}")
+            with self._cond:
+                self._stats["dropped"] += count
+            return
+        with self._cond:
+            self._spool.append(name)
+            self._spool_bytes += len(body)
+        # 超出磁盘缓存上限时丢弃最早的批次
+        while self._spool_bytes > self.max_spool_bytes and len(self._spool) > 1:
+            dropped = self._spool[0]
+            logger.bind(tag=TAG).warning(f"上报缓存超出上限，丢弃最早的批次: {dropped}")
+            with self._cond:
+                self._stats["dropped"] += self._spool_count(dropped)
+            self._remove_spool_head()
+
+    def _replace_spool_head(self, old_size: int, body: bytes, compressed: bool, count: int):
+        """部分记录上报成功后，用剩余的记录替换最早的批次文件"""
+        old_name = self._spool[0]
+        prefix = old_name.split(".", 1)[0].rsplit("-", 1)[0]
+        name = f"{prefix}-{count}.json" + (".gz" if compressed else "")
+        path = os.path.join(self.spool_dir, name)
+        try:
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(path + ".tmp", path)
+            if name != old_name:
+                os.remove(os.path.join(self.spool_dir, old_name))
+        except OSError as e:
+            # 替换失败时保留原文件，重试时可能重复上报部分记录
+            logger.bind(tag=TAG).error(f"更新上报缓存文件失败: {path}, {e}")
+            return
+        with self._cond:
+            self._spool[0] = name
+            self._spool_bytes += len(body) - old_size
+
+    def _remove_spool_head(self, size: Optional[int] = None):
+        name = self._spool[0]
+        path = os.path.join(self.spool_dir, name)
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        with self._cond:
+            self._spool.popleft()
+            self._spool_bytes -= size
+
+    def _load_spool(self):
+        """加载上次退出时未上报的批次"""
+        if os.path.isdir(self.dead_letter_dir):
+            for name in os.listdir(self.dead_letter_dir):
+                self._dead_letter_bytes += os.path.getsize(
+                    os.path.join(self.dead_letter_dir, name)
+                )
+        if not os.path.isdir(self.spool_dir):
+            return
+        names = sorted(
+            name
+            for name in os.listdir(self.spool_dir)
+            if name.endswith((".json", ".json.gz"))
+        )
+        for name in names:
+            self._spool.append(name)
+            self._spool_bytes += os.path.getsize(os.path.join(self.spool_dir, name))
+        if names:
+            logger.bind(tag=TAG).info(f"发现{len(names)}个未上报的聊天记录批次，将继续上报")
+
+    @staticmethod
+    def _spool_time(name: str) -> float:
+        return int(name.split("-", 1)[0]) / 1000
+
+    @staticmethod
+    def _spool_count(name: str) -> int:
+        return int(name.split(".", 1)[0].rsplit("-", 1)[1])
+
+
+_spooler: Optional[ReportSpooler] = None
+_spooler_lock = threading.Lock()
+
+
+def get_report_spooler(config: dict) -> ReportSpooler:
+    """获取进程内共享的上报器，首次调用时按配置创建"""
+    global _spooler
+    if _spooler is None:
+        with _spooler_lock:
+            if _spooler is None:
+                _spooler = ReportSpooler.from_config(config)
+    return _spooler
+
+
+def get_report_spooler_stats() -> dict:
+    return _spooler.get_stats() if _spooler is not None else {}
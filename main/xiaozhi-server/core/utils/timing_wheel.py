@@ -0,0 +1,154 @@
+"""
+分层时间轮
+所有连接的空闲关闭、记忆保存、结束语等定时任务共用一个时间轮，由一个协程按固定刻度推进，
+不再为每个连接单独起轮询协程。
+
+推迟定时器（每次收发音频都会发生）只修改截止时间，不移动槽位也不读取系统时钟，复杂度O(1)；
+槽位到期时发现截止时间已被推后，再把定时器放回合适的槽位。
+"""
+
+import time
+import asyncio
+from typing import Callable, List, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+
+class Timer:
+    """时间轮上的一个定时器"""
+
+    __slots__ = ("deadline", "callback", "cancelled", "_wheel", "_version")
+
+    def __init__(self, wheel: "TimingWheel", deadline: float, callback: Callable):
+        self._wheel = wheel
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+        self._version = 0
+
+    def reschedule(self, delay: float):
+        """从当前刻度起delay秒后触发，已经触发或取消的定时器会重新生效"""
+        deadline = self._wheel.now + delay
+        if self.cancelled or deadline < self.deadline:
+            # 提前或重新启用时需要放入新的槽位，旧槽位中的条目作废
+            self.cancelled = False
+            self.deadline = deadline
+            self._version += 1
+            self._wheel._insert(self)
+        else:
+            self.deadline = deadline
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimingWheel:
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 3):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        # 当前刻度对应的单调时钟，供推迟定时器时使用，避免频繁读取时钟
+        self.now = time.monotonic()
+        self._origin = self.now
+        self._current_tick = 0
+        self._wheels: List[List[list]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._task: Optional[asyncio.Task] = None
+        self.timer_count = 0
+
+    def start(self):
+        """在当前事件循环中启动推进协程，重复调用无副作用"""
+        if self._task is None or self._task.done():
+            self.now = time.monotonic()
+            self._origin = self.now - self._current_tick * self.tick
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, delay: float, callback: Callable) -> Timer:
+        """delay秒后在事件循环中调用callback，callback可以是普通函数或协程函数"""
+        timer = Timer(self, self.now + delay, callback)
+        self._insert(timer)
+        return timer
+
+    def _insert(self, timer: Timer, min_tick: Optional[int] = None):
+        if min_tick is None:
+            min_tick = self._current_tick + 1
+        target = max(min_tick, int(-(-(timer.deadline - self._origin) // self.tick)))
+        span = 1
+        for level in range(self.levels):
+            if target - self._current_tick < span * self.slots or level == self.levels - 1:
+                # 超出最高层范围的放在最高层最远的槽位，到时再重新放置
+                target = min(target, self._current_tick + span * self.slots - 1)
+                index = (target // span) % self.slots
+                self._wheels[level][index].append((timer, timer._version))
+                self.timer_count += 1
+                return
+            span *= self.slots
+
+    def _advance(self):
+        """推进一个刻度，返回到期的定时器"""
+        self._current_tick += 1
+        tick = self._current_tick
+        # 高层槽位到期时下放到低层
+        span = self.slots
+        for level in range(1, self.levels):
+            if tick % span != 0:
+                break
+            index = (tick // span) % self.slots
+            entries = self._wheels[level][index]
+            self._wheels[level][index] = []
+            self.timer_count -= len(entries)
+            for timer, version in entries:
+                if version == timer._version and not timer.cancelled:
+                    self._insert(timer, min_tick=tick)
+            span *= self.slots
+
+        index = tick % self.slots
+        entries = self._wheels[0][index]
+        self._wheels[0][index] = []
+        self.timer_count -= len(entries)
+        expired = []
+        for timer, version in entries:
+            if version != timer._version or timer.cancelled:
+                continue
+            if timer.deadline - self.now > self.tick / 2:
+                # 截止时间已被推后，放回时间轮
+                self._insert(timer)
+            else:
+                timer.cancelled = True
+                expired.append(timer)
+        return expired
+
+    async def _run(self):
+        while True:
+            next_time = self._origin + (self._current_tick + 1) * self.tick
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.now = time.monotonic()
+            # 事件循环卡顿时补齐落后的刻度
+            while self._origin + (self._current_tick + 1) * self.tick <= self.now:
+                for timer in self._advance():
+                    self._fire(timer)
+
+    def _fire(self, timer: Timer):
+        try:
+            result = timer.callback()
+            if asyncio.iscoroutine(result):
+                asyncio.create_task(result)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"定时任务执行出错: {e}")
+
+    def get_stats(self) -> dict:
+        return {"entries": self.timer_count, "tick": self._current_tick}
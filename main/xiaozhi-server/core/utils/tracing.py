@@ -0,0 +1,296 @@
+"""
+对话链路追踪
+每轮对话（从用户说完话开始）创建一个TurnTrace，记录VAD、ASR、声纹、意图、记忆、LLM、TTS和首包发送等阶段的耗时，
+对话结束时按配置导出到JSON Lines文件或OpenTelemetry，并按阶段和提供者统计p50/p95/p99
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from config.logger import setup_logging
+from core.utils.hot_path_log import HotPathLogger
+from core.utils.metrics import STAGE_LATENCY, TURNS_TOTAL
+
+TAG = __name__
+logger = setup_logging()
+
+
+class TurnTrace:
+    """一轮对话的追踪记录，各阶段可能在不同线程中记录"""
+
+    def __init__(self, collector, device_id=None, session_id=None):
+        self.collector = collector
+        self.trace_id = uuid.uuid4().hex
+        self.device_id = device_id
+        self.session_id = session_id
+        self.start_time = time.monotonic()
+        self.start_wall_time = time.time()
+        self.spans: List[Dict[str, Any]] = []
+        self.marks: Dict[str, float] = {}
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        """距本轮开始的秒数"""
+        return time.monotonic() - self.start_time
+
+    def add_span(self, name, start, end, provider=None, **attrs):
+        """记录一个阶段，start和end为time.monotonic()的值"""
+        with self._lock:
+            if self.finished:
+                return
+            self.spans.append(
+                {
+                    "name": name,
+                    "provider": provider,
+                    "start": start,
+                    "end": end,
+                    "attrs": attrs,
+                }
+            )
+
+    @contextmanager
+    def span(self, name, provider=None, **attrs):
+        """
+        记录代码块耗时，块内可以向返回的字典补充属性
+
+        with trace.span("asr", provider="FunASR") as attrs:
+            attrs["text_len"] = 10
+        """
+        start = time.monotonic()
+        try:
+            yield attrs
+        finally:
+            self.add_span(name, start, time.monotonic(), provider, **attrs)
+
+    def mark(self, name, provider=None, **attrs) -> bool:
+        """记录本轮的里程碑（如首包发送），每个里程碑只记录第一次，返回是否记录成功"""
+        now = time.monotonic()
+        with self._lock:
+            if self.finished or name in self.marks:
+                return False
+            self.marks[name] = now
+        self.add_span(name, self.start_time, now, provider, **attrs)
+        return True
+
+    def has_mark(self, name) -> bool:
+        return name in self.marks
+
+    def finish(self):
+        """结束本轮追踪并导出，重复调用无效"""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+        self.collector.record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "device_id": self.device_id,
+            "session_id": self.session_id,
+            "start": round(self.start_wall_time, 6),
+            "spans": [
+                {
+                    "name": span["name"],
+                    "provider": span["provider"],
+                    "offset_ms": round((span["start"] - self.start_time) * 1000, 1),
+                    "duration_ms": round((span["end"] - span["start"]) * 1000, 1),
+                    **span["attrs"],
+                }
+                for span in self.spans
+            ],
+        }
+
+
+class NullTrace(TurnTrace):
+    """未开启追踪或当前没有进行中的对话时使用，所有记录都被忽略"""
+
+    def __init__(self):
+        super().__init__(None)
+        self.finished = True
+
+    def finish(self):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class TraceCollector:
+    """汇总所有连接的追踪记录：计算分位数并导出"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        exporter: str = "none",
+        file_path: Optional[str] = None,
+        histogram_window: int = 2048,
+    ):
+        self.enabled = enabled
+        self.exporter = exporter
+        self.histogram_window = histogram_window
+        self._histograms: Dict[tuple, deque] = {}
+        self._counts: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._json_sink = None
+        self._tracer = None
+        if exporter == "json" and file_path:
+            # 复用热路径日志的后台写入线程，不限流、不采样
+            self._json_sink = HotPathLogger(
+                per_device_rate=0, sink="jsonl", file_path=file_path
+            )
+        elif exporter == "otel":
+            self._tracer = self._create_otel_tracer()
+
+    @staticmethod
+    def _create_otel_tracer():
+        try:
+            from opentelemetry import trace as otel_trace
+        except ImportError:
+            logger.bind(tag=TAG).warning(
+                "未安装opentelemetry，链路追踪只在内存中统计，请执行 pip install opentelemetry-sdk"
+            )
+            return None
+        # 导出器由OpenTelemetry的环境变量或启动代码配置
+        return otel_trace.get_tracer("xiaozhi-server")
+
+    def start_turn(self, device_id=None, session_id=None) -> TurnTrace:
+        if not self.enabled:
+            return NULL_TRACE
+        return TurnTrace(self, device_id, session_id)
+
+    def record(self, trace: TurnTrace):
+        with self._lock:
+            for span in trace.spans:
+                key = (span["name"], span["provider"])
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = deque(maxlen=self.histogram_window)
+                    self._histograms[key] = histogram
+                histogram.append((span["end"] - span["start"]) * 1000)
+                self._counts[key] = self._counts.get(key, 0) + 1
+                STAGE_LATENCY.observe(
+                    span["end"] - span["start"],
+                    stage=span["name"],
+                    provider=span["provider"] or "",
+                )
+        TURNS_TOTAL.inc()
+        try:
+            if self._json_sink is not None:
+                record = trace.to_dict()
+                device_id = record.pop("device_id")
+                self._json_sink.event("turn_trace", device_id, **record)
+            if self._tracer is not None:
+                self._export_otel(trace)
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"导出链路追踪失败: {e}")
+
+    def _export_otel(self, trace: TurnTrace):
+        from opentelemetry import trace as otel_trace
+
+        def to_ns(monotonic_time):
+            wall_time = trace.start_wall_time + (monotonic_time - trace.start_time)
+            return int(wall_time * 1e9)
+
+        end_time = max([span["end"] for span in trace.spans] or [trace.start_time])
+        root = self._tracer.start_span(
+            "turn",
+            start_time=to_ns(trace.start_time),
+            attributes={
+                "device.id": trace.device_id or "",
+                "session.id": trace.session_id or "",
+            },
+        )
+        context = otel_trace.set_span_in_context(root)
+        for span in trace.spans:
+            attributes = {
+                key: value
+                for key, value in span["attrs"].items()
+                if isinstance(value, (str, bool, int, float))
+            }
+            if span["provider"]:
+                attributes["provider"] = span["provider"]
+            child = self._tracer.start_span(
+                span["name"],
+                context=context,
+                start_time=to_ns(span["start"]),
+                attributes=attributes,
+            )
+            child.end(end_time=to_ns(span["end"]))
+        root.end(end_time=to_ns(end_time))
+
+    @staticmethod
+    def _percentile(values: List[float], percent: float) -> float:
+        index = min(len(values) - 1, max(0, int(round(len(values) * percent)) - 1))
+        return values[index]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """按"阶段[提供者]"返回最近样本的p50/p95/p99（毫秒）"""
+        with self._lock:
+            snapshot = {key: list(values) for key, values in self._histograms.items()}
+            counts = dict(self._counts)
+        stats = {}
+        for (name, provider), values in snapshot.items():
+            if not values:
+                continue
+            values.sort()
+            label = f"{name}[{provider}]" if provider else name
+            stats[label] = {
+                "count": counts.get((name, provider), 0),
+                "p50": round(self._percentile(values, 0.50), 1),
+                "p95": round(self._percentile(values, 0.95), 1),
+                "p99": round(self._percentile(values, 0.99), 1),
+            }
+        return stats
+
+
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def get_trace_collector() -> TraceCollector:
+    """获取全局追踪汇总器，首次调用时按tracing配置创建"""
+    global _collector
+    if _collector is not None:
+        return _collector
+    with _collector_lock:
+        if _collector is None:
+            from config.config_loader import load_config
+
+            config = load_config()
+            tracing_config = config.get("tracing") or {}
+            file_path = os.path.join(
+                config.get("log", {}).get("log_dir", "tmp"),
+                tracing_config.get("file", "traces.jsonl"),
+            )
+            _collector = TraceCollector(
+                enabled=tracing_config.get("enabled", True),
+                exporter=tracing_config.get("exporter", "none"),
+                file_path=file_path,
+                histogram_window=int(tracing_config.get("histogram_window", 2048)),
+            )
+    return _collector
+
+
+def start_turn_trace(conn) -> TurnTrace:
+    """开始新一轮对话的追踪，上一轮未结束的追踪会被结束"""
+    previous = getattr(conn, "turn_trace", None)
+    if previous is not None:
+        previous.finish()
+    conn.turn_trace = get_trace_collector().start_turn(conn.device_id, conn.session_id)
+    return conn.turn_trace
+
+
+def get_turn_trace(conn) -> TurnTrace:
+    """获取连接当前的追踪，没有时返回不记录任何内容的空追踪"""
+    return getattr(conn, "turn_trace", None) or NULL_TRACE
+
+
+def provider_name(conn, module: str) -> Optional[str]:
+    """连接当前使用的某类模块名称，用作统计维度"""
+    return conn.config.get("selected_module", {}).get(module)
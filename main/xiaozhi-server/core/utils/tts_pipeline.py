@@ -0,0 +1,138 @@
+"""
+语音合成流水线
+非流式TTS按句合成时，同时保持多句在合成中，前一句还在请求时后一句已经开始；
+每句按提交顺序编号，结果按编号重新排序后再交给播放队列。
+打断时作废当前批次：尚未开始的任务直接取消，进行中的任务停止重试，结果被丢弃。
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from typing import Any, Callable, Dict, Optional
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+_thread_local = threading.local()
+
+
+def run_coroutine(coro):
+    """在当前线程常驻的事件循环中执行协程，避免每句话都新建和销毁事件循环"""
+    loop = getattr(_thread_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_local.loop = loop
+    return loop.run_until_complete(coro)
+
+
+class SynthesisPipeline:
+    def __init__(self, emit: Callable[[Any], None], depth: int = 3):
+        """
+        Args:
+            emit: 按顺序接收结果的回调，结果为None的句子会被跳过
+            depth: 同时进行中的合成任务数，为1时等同于逐句合成
+        """
+        self.emit = emit
+        self.depth = max(1, int(depth))
+        self._cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._generation = 0
+        # 下一个分配的序号和下一个应交出的序号
+        self._next_seq = 0
+        self._emit_seq = 0
+        self._results: Dict[int, Any] = {}
+        self._futures: Dict[int, Any] = {}
+        self.inflight = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # 打断后旧批次的任务可能仍占用线程，多留出一倍线程给新批次
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.depth * 2, thread_name_prefix="tts-synthesis"
+            )
+        return self._executor
+
+    def submit(self, fn: Callable, *args) -> bool:
+        """
+        提交合成任务，进行中的任务达到depth时阻塞等待
+        fn在线程池中以fn(is_cancelled, *args)调用，is_cancelled()返回本批次是否已被打断
+        Returns:
+            bool: 是否已提交，等待期间被打断时返回False
+        """
+        with self._cond:
+            generation = self._generation
+            while self.inflight >= self.depth and generation == self._generation:
+                self._cond.wait()
+            if generation != self._generation:
+                return False
+            seq = self._next_seq
+            self._next_seq += 1
+            self.inflight += 1
+            future = self._get_executor().submit(
+                fn, lambda: generation != self._generation, *args
+            )
+            self._futures[seq] = future
+        future.add_done_callback(lambda f: self._on_done(generation, seq, f))
+        return True
+
+    def put(self, item: Any):
+        """已就绪的条目，排在之前提交的句子之后交出"""
+        with self._cond:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._results[seq] = item
+            self._drain()
+
+    def wait_idle(self):
+        """等待已提交的句子全部交出，打断时立即返回"""
+        with self._cond:
+            generation = self._generation
+            while self._emit_seq < self._next_seq and generation == self._generation:
+                self._cond.wait()
+
+    def cancel(self):
+        """打断当前批次"""
+        with self._cond:
+            self._generation += 1
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+            self._results.clear()
+            self._emit_seq = self._next_seq
+            self.inflight = 0
+            self._cond.notify_all()
+
+    def shutdown(self):
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _on_done(self, generation, seq, future):
+        try:
+            result = future.result()
+        except CancelledError:
+            result = None
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"语音合成任务出错: {e}")
+            result = None
+        with self._cond:
+            if generation != self._generation:
+                return
+            self._futures.pop(seq, None)
+            self.inflight -= 1
+            self._results[seq] = result
+            self._drain()
+            self._cond.notify_all()
+
+    def _drain(self):
+        while self._emit_seq in self._results:
+            item = self._results.pop(self._emit_seq)
+            self._emit_seq += 1
+            if item is not None:
+                try:
+                    self.emit(item)
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"合成结果交付失败: {e}")
+        self._cond.notify_all()
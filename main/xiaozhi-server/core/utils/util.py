@@ -1,5 +1,6 @@
 import json
 import socket
+import asyncio
 import subprocess
 import re
 import os
@@ -250,6 +251,69 @@ def audio_bytes_to_data(audio_bytes, file_type, is_opus=True):
         return pcm_to_data(raw_data, is_opus), duration
 
 
+async def decode_audio_stream(chunks, file_type, sample_rate=None):
+    """
+    把分块到达的音频边到达边解码为16kHz单声道16位PCM，按到达顺序产出PCM分块
+    16kHz的pcm直接透传，其他格式通过ffmpeg管道增量解码
+    """
+    if file_type == "pcm" and sample_rate in (None, 16000):
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    if file_type == "pcm":
+        input_args = ["-f", "s16le", "-ar", str(sample_rate), "-ac", "1"]
+    else:
+        input_args = ["-f", file_type]
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-fflags",
+        "nobuffer",
+        *input_args,
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ar",
+        "16000",
+        "-ac",
+        "1",
+        "-flush_packets",
+        "1",
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    async def feed():
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            pcm = await process.stdout.read(4096)
+            if not pcm:
+                break
+            yield pcm
+        # 把上游下载中的异常抛给调用方
+        await feeder
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+
 def pcm_to_data(raw_data, is_opus=True):
     # 初始化Opus编码器
     encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
@@ -0,0 +1,159 @@
+"""
+视觉请求的图片预处理
+设备上传的图片只解码一次：按模型配置把长边缩小到max_image_edge以内，以jpeg_quality重新编码为JPEG后再上传给模型，
+同时计算画面的感知哈希。
+
+处理结果按图片内容哈希缓存，设备重复上传同一张图片时不必再次处理；
+开启回答缓存后，模型的回答按设备、图片内容哈希、问题和模型缓存一小段时间，同一设备对着同一张图片重复提问时直接返回。
+摄像头连拍同一场景时字节内容会有细微差别，可开启response_cache_near_duplicate改按感知哈希匹配，
+画面中的细小变化（例如文字或数字）可能因此被忽略。
+"""
+
+import base64
+import hashlib
+from io import BytesIO
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image
+from core.utils.cache.manager import cache_manager, CacheType
+
+# 感知哈希的边长，得到 HASH_SIZE * HASH_SIZE 位的哈希
+HASH_SIZE = 8
+
+
+@dataclass
+class ProcessedImage:
+    """预处理后的图片"""
+
+    base64: str
+    # 预处理后图片内容的哈希，用于回答缓存
+    digest: str
+    # 预处理后的画面感知哈希，开启近似匹配时用于回答缓存
+    phash: str
+    original_size: int
+    size: int
+    width: int
+    height: int
+
+
+class VisionImageProcessor:
+    def __init__(
+        self,
+        max_edge: int = 1024,
+        quality: int = 80,
+        response_cache_ttl: float = 0,
+        response_cache_near_duplicate: bool = False,
+    ):
+        self.max_edge = max_edge
+        self.quality = quality
+        self.response_cache_ttl = response_cache_ttl
+        self.response_cache_near_duplicate = response_cache_near_duplicate
+
+    @classmethod
+    def from_config(cls, vision_config: dict, model_config: dict) -> "VisionImageProcessor":
+        """vision中为默认值，VLLM模型配置中的同名字段优先"""
+
+        def option(name, default):
+            value = model_config.get(name)
+            if value in (None, ""):
+                value = vision_config.get(name, default)
+            return value
+
+        return cls(
+            max_edge=int(option("max_image_edge", 1024)),
+            quality=int(option("jpeg_quality", 80)),
+            response_cache_ttl=float(option("response_cache_ttl", 0)),
+            response_cache_near_duplicate=str(
+                option("response_cache_near_duplicate", False)
+            ).lower()
+            in ("true", "1", "yes"),
+        )
+
+    def process(self, image_data: bytes) -> ProcessedImage:
+        """缩放、重新编码并计算感知哈希，CPU密集，应在线程池中调用"""
+        digest = hashlib.sha256(image_data).hexdigest()
+        cache_key = f"{digest}:{self.max_edge}:{self.quality}"
+        processed = cache_manager.get(CacheType.VISION_IMAGE, cache_key)
+        if processed is not None:
+            return processed
+
+        with Image.open(BytesIO(image_data)) as image:
+            is_jpeg = image.format == "JPEG"
+            original_dims = image.size
+            if self.max_edge > 0 and max(original_dims) > self.max_edge:
+                # JPEG在解码时直接按比例缩小，不必先解出全尺寸画面
+                image.draft("RGB", (self.max_edge, self.max_edge))
+            image = image.convert("RGB")
+            if self.max_edge > 0 and max(image.size) > self.max_edge:
+                image.thumbnail((self.max_edge, self.max_edge), reducing_gap=2.0)
+            phash = self._difference_hash(image)
+
+            if is_jpeg and image.size == original_dims:
+                # 原图已经是尺寸合适的JPEG，直接上传
+                output_data = image_data
+            else:
+                output = BytesIO()
+                image.save(output, format="JPEG", quality=self.quality)
+                output_data = output.getvalue()
+
+            processed = ProcessedImage(
+                base64=base64.b64encode(output_data).decode("utf-8"),
+                digest=hashlib.sha256(output_data).hexdigest(),
+                phash=phash,
+                original_size=len(image_data),
+                size=len(output_data),
+                width=image.width,
+                height=image.height,
+            )
+        cache_manager.set(CacheType.VISION_IMAGE, cache_key, processed)
+        return processed
+
+    def get_cached_response(
+        self, processed: ProcessedImage, question: str, model_key: str, device_id: str
+    ) -> Optional[str]:
+        if self.response_cache_ttl <= 0:
+            return None
+        return cache_manager.get(
+            CacheType.VISION_RESPONSE,
+            self._response_key(processed, question, model_key, device_id),
+        )
+
+    def set_cached_response(
+        self,
+        processed: ProcessedImage,
+        question: str,
+        model_key: str,
+        device_id: str,
+        response: str,
+    ):
+        if self.response_cache_ttl <= 0 or not response:
+            return
+        cache_manager.set(
+            CacheType.VISION_RESPONSE,
+            self._response_key(processed, question, model_key, device_id),
+            response,
+            ttl=self.response_cache_ttl,
+        )
+
+    def _response_key(
+        self, processed: ProcessedImage, question: str, model_key: str, device_id: str
+    ) -> str:
+        # 回答只在同一设备内复用，默认要求图片内容完全相同
+        image_key = (
+            f"p:{processed.phash}"
+            if self.response_cache_near_duplicate
+            else processed.digest
+        )
+        return f"{model_key}:{device_id}:{image_key}:{question.strip()}"
+
+    @staticmethod
+    def _difference_hash(image: Image.Image) -> str:
+        """差值哈希：缩成(HASH_SIZE+1)*HASH_SIZE的灰度图，比较相邻像素的明暗"""
+        small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+        pixels = list(small.getdata())
+        bits = 0
+        for row in range(HASH_SIZE):
+            for col in range(HASH_SIZE):
+                offset = row * (HASH_SIZE + 1) + col
+                bits = (bits << 1) | (pixels[offset] > pixels[offset + 1])
+        return f"{bits:0{HASH_SIZE * HASH_SIZE // 4}x}"
@@ -7,10 +7,19 @@ project_root = os.path.abspath(os.path.join(current_dir, "..", ".."))
 sys.path.insert(0, project_root)
 
 from config.logger import setup_logging
+import json
+import hashlib
 import importlib
+import threading
+from collections import OrderedDict
 
 logger = setup_logging()
 
+# 按配置共享的VLLM实例：视觉接口每次请求不再重新创建客户端，相同配置复用同一个实例（及其HTTP连接池）
+MAX_SHARED_INSTANCES = 16
+_shared_instances = OrderedDict()
+_shared_lock = threading.Lock()
+
 
 def create_instance(class_name, *args, **kwargs):
     # 创建LLM实例
@@ -21,3 +30,29 @@ def create_instance(class_name, *args, **kwargs):
         return sys.modules[lib_name].VLLMProvider(*args, **kwargs)
 
     raise ValueError(f"不支持的VLLM类型: {class_name}，请检查该配置的type是否设置正确")
+
+
+def config_hash(class_name, config):
+    """计算配置块的哈希，作为共享实例和回答缓存的键"""
+    content = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{class_name}:{content}".encode("utf-8")).hexdigest()
+
+
+def get_shared_instance(class_name, config):
+    """获取相同配置共享的VLLM实例，不存在时创建"""
+    key = config_hash(class_name, config)
+    with _shared_lock:
+        instance = _shared_instances.get(key)
+        if instance is not None:
+            _shared_instances.move_to_end(key)
+            return instance
+
+    instance = create_instance(class_name, config)
+    with _shared_lock:
+        existing = _shared_instances.get(key)
+        if existing is not None:
+            return existing
+        _shared_instances[key] = instance
+        while len(_shared_instances) > MAX_SHARED_INSTANCES:
+            _shared_instances.popitem(last=False)
+    return instance
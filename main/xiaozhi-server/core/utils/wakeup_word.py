@@ -3,8 +3,19 @@ import re
 import yaml
 import time
 import hashlib
+import threading
 import portalocker
-from typing import Dict
+from typing import Dict, List, Tuple
+from core.utils import p3
+from core.utils.util import audio_to_data
+
+# 默认唤醒词回复
+DEFAULT_WAKEUP_RESPONSE = {
+    "voice": "default",
+    "file_path": "config/assets/wakeup_words.wav",
+    "time": 0,
+    "text": "哈啰啊，我是小智啦，声音好听的台湾女孩一枚，超开心认识你耶，最近在忙啥，别忘了给我来点有趣的料哦，我超爱听八卦的啦",
+}
 
 
 class FileLock:
@@ -35,8 +46,11 @@ class WakeupWordsConfig:
         self._ensure_directories()
         self._config_cache = None
         self._last_load_time = 0
-        self._cache_ttl = 1  # 缓存有效期（秒）
+        self._cache_ttl = 60  # 缓存有效期（秒），本进程写入时会同步更新缓存
         self._lock_timeout = 5  # 文件锁超时时间（秒）
+        # 已解码的Opus帧：文件路径 -> (修改时间, Opus帧列表)
+        self._audio_cache: Dict[str, Tuple[float, List[bytes]]] = {}
+        self._audio_lock = threading.Lock()
 
     def _ensure_directories(self):
         """确保必要的目录存在"""
@@ -93,13 +107,60 @@ class WakeupWordsConfig:
         if not config or voice not in config:
             return None
 
-        # 检查文件大小
+        # 检查文件大小，p3只保存Opus帧，体积比wav小得多
         file_path = config[voice]["file_path"]
-        if not os.path.exists(file_path) or os.stat(file_path).st_size < (15 * 1024):
+        min_size = 2 * 1024 if file_path.endswith(".p3") else 15 * 1024
+        if not os.path.exists(file_path) or os.stat(file_path).st_size < min_size:
             return None
 
         return config[voice]
 
+    def get_wakeup_audio(self, voice: str) -> Tuple[Dict, List[bytes]]:
+        """获取唤醒词回复及其Opus帧，音频只在首次使用或文件更新后解码一次"""
+        response = self.get_wakeup_response(voice) or DEFAULT_WAKEUP_RESPONSE
+        try:
+            return response, self._load_audio(response["file_path"])
+        except Exception as e:
+            print(f"加载唤醒词回复音频失败: {e}")
+            if response is DEFAULT_WAKEUP_RESPONSE:
+                raise
+            return DEFAULT_WAKEUP_RESPONSE, self._load_audio(
+                DEFAULT_WAKEUP_RESPONSE["file_path"]
+            )
+
+    def _load_audio(self, file_path: str) -> List[bytes]:
+        mtime = os.stat(file_path).st_mtime
+        cached = self._audio_cache.get(file_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with self._audio_lock:
+            cached = self._audio_cache.get(file_path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            if file_path.endswith(".p3"):
+                opus_datas, _ = p3.decode_opus_from_file(file_path)
+            else:
+                opus_datas, _ = audio_to_data(file_path)
+            self._audio_cache[file_path] = (mtime, opus_datas)
+            return opus_datas
+
+    def save_wakeup_audio(self, voice: str, opus_datas: List[bytes], text: str):
+        """以p3格式保存新的唤醒词回复，同时更新内存中的Opus帧"""
+        voice_hash = hashlib.md5(voice.encode()).hexdigest()
+        file_path = os.path.join(self.assets_dir, f"{voice_hash}.p3")
+        # 先写临时文件再替换，正在播放的连接不会读到不完整的文件
+        tmp_path = f"{file_path}.tmp"
+        p3.encode_opus_to_file(opus_datas, tmp_path)
+        os.replace(tmp_path, file_path)
+        with self._audio_lock:
+            self._audio_cache[file_path] = (os.stat(file_path).st_mtime, list(opus_datas))
+        self.update_wakeup_response(voice, file_path, text)
+        # 清理旧版本保存的wav文件
+        legacy_path = os.path.join(self.assets_dir, f"{voice_hash}.wav")
+        if os.path.exists(legacy_path):
+            os.remove(legacy_path)
+            self._audio_cache.pop(legacy_path, None)
+
     def update_wakeup_response(self, voice: str, file_path: str, text: str):
         """更新唤醒词回复配置"""
         try:
@@ -118,23 +179,3 @@ class WakeupWordsConfig:
         except Exception as e:
             print(f"更新唤醒词回复配置失败: {e}")
             raise
-
-    def generate_file_path(self, voice: str) -> str:
-        """生成音频文件路径，使用voice的哈希值作为文件名"""
-        try:
-            # 生成voice的哈希值
-            voice_hash = hashlib.md5(voice.encode()).hexdigest()
-            file_path = os.path.join(self.assets_dir, f"{voice_hash}.wav")
-
-            # 如果文件已存在，先删除
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"删除已存在的音频文件失败: {e}")
-                    raise
-
-            return file_path
-        except Exception as e:
-            print(f"生成音频文件路径失败: {e}")
-            raise
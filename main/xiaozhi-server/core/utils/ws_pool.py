@@ -0,0 +1,207 @@
+"""
+流式TTS/ASR WebSocket连接池
+同一服务商、同一套凭证的所有连接共享一个连接池，池中保留已完成握手的空闲连接，
+会话开始时直接取用，省去TLS+WebSocket握手；用户开始说话时可以提前预热连接。
+协议只允许在同一条连接上顺序进行多个会话，所以连接在设备之间是顺序复用而不是并发复用，
+一次会话后即被服务端关闭的连接（如流式ASR）只预热、不归还
+"""
+
+import time
+import asyncio
+import hashlib
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, Any
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+Connector = Callable[[], Awaitable[Any]]
+
+
+def is_ws_open(ws) -> bool:
+    """判断WebSocket连接是否仍可用"""
+    if ws is None:
+        return False
+    state = getattr(ws, "state", None)
+    if state is not None:
+        return getattr(state, "name", "") == "OPEN"
+    return not getattr(ws, "closed", False)
+
+
+async def close_ws_quietly(ws):
+    """关闭连接，忽略关闭过程中的错误"""
+    if ws is None:
+        return
+    try:
+        await ws.close()
+    except Exception:
+        pass
+
+
+class WebSocketPool:
+    """单个服务商+凭证维度的WebSocket连接池"""
+
+    def __init__(self, name: str, max_idle: int = 2, idle_timeout: float = 30):
+        """
+        Args:
+            name: 连接池名称，用于日志和指标
+            max_idle: 最多保留的空闲连接数
+            idle_timeout: 空闲连接的最长保留时间(秒)，超过后不再复用
+        """
+        self.name = name
+        self.max_idle = max(0, int(max_idle))
+        self.idle_timeout = max(0.0, float(idle_timeout))
+        # 空闲连接: (ws, 放入时间, 所属事件循环)
+        self._idle = deque()
+        self._prewarming = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "handshakes": 0,
+            "handshake_errors": 0,
+            "total_handshake_ms": 0.0,
+            "prewarms": 0,
+            "released": 0,
+            "expired": 0,
+            "discarded": 0,
+        }
+
+    def _pop_idle(self, loop):
+        """取出一条可用的空闲连接，顺带清理过期或已断开的连接"""
+        stale = []
+        ws = None
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                candidate, released_at, ws_loop = self._idle.pop()
+                if (
+                    ws_loop is loop
+                    and now - released_at < self.idle_timeout
+                    and is_ws_open(candidate)
+                ):
+                    ws = candidate
+                    break
+                stale.append((candidate, ws_loop))
+            self._stats["expired"] += len(stale)
+        for candidate, ws_loop in stale:
+            if ws_loop is loop:
+                loop.create_task(close_ws_quietly(candidate))
+        return ws
+
+    async def _connect(self, connect: Connector):
+        start_time = time.monotonic()
+        try:
+            ws = await connect()
+        except Exception:
+            with self._lock:
+                self._stats["handshake_errors"] += 1
+            raise
+        handshake_ms = (time.monotonic() - start_time) * 1000
+        with self._lock:
+            self._stats["handshakes"] += 1
+            self._stats["total_handshake_ms"] += handshake_ms
+        logger.bind(tag=TAG).debug(f"{self.name} 建立新连接，握手耗时{handshake_ms:.1f}ms")
+        return ws
+
+    def _avg_handshake_ms(self) -> float:
+        handshakes = self._stats["handshakes"]
+        return self._stats["total_handshake_ms"] / handshakes if handshakes else 0.0
+
+    async def acquire(self, connect: Connector):
+        """获取一条连接，优先复用空闲连接，否则通过connect新建"""
+        ws = self._pop_idle(asyncio.get_running_loop())
+        if ws is not None:
+            with self._lock:
+                self._stats["hits"] += 1
+                saved_ms = self._avg_handshake_ms()
+            logger.bind(tag=TAG).info(
+                f"{self.name} 复用预热连接，节省握手约{saved_ms:.0f}ms"
+            )
+            return ws
+        with self._lock:
+            self._stats["misses"] += 1
+        return await self._connect(connect)
+
+    async def release(self, ws, idle_for: float = 0):
+        """会话结束后归还连接，池已满或连接不可用时直接关闭
+
+        Args:
+            idle_for: 连接在归还前已经空闲的秒数，计入空闲保留时间
+        """
+        if not is_ws_open(ws) or idle_for >= self.idle_timeout:
+            await close_ws_quietly(ws)
+            return
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append((ws, time.monotonic() - idle_for, loop))
+                self._stats["released"] += 1
+                return
+        await close_ws_quietly(ws)
+
+    async def discard(self, ws):
+        """状态不确定的连接（会话中断、出错）不能归还，直接关闭"""
+        with self._lock:
+            self._stats["discarded"] += 1
+        await close_ws_quietly(ws)
+
+    def prewarm(self, connect: Connector):
+        """空闲连接（含正在预热的）不足max_idle时在后台预先建立一条，需在事件循环中调用"""
+        with self._lock:
+            if len(self._idle) + self._prewarming >= self.max_idle:
+                return
+            self._prewarming += 1
+            self._stats["prewarms"] += 1
+        asyncio.get_running_loop().create_task(self._prewarm(connect))
+
+    async def _prewarm(self, connect: Connector):
+        try:
+            ws = await self._connect(connect)
+            await self.release(ws)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"{self.name} 预热连接失败: {e}")
+        finally:
+            with self._lock:
+                self._prewarming -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中率和节省的握手时间"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["prewarming"] = self._prewarming
+            avg_handshake_ms = self._avg_handshake_ms()
+        acquires = stats["hits"] + stats["misses"]
+        stats["name"] = self.name
+        stats["hit_rate"] = stats["hits"] / acquires if acquires else 0.0
+        stats["avg_handshake_ms"] = avg_handshake_ms
+        stats["handshake_saved_ms"] = stats["hits"] * avg_handshake_ms
+        return stats
+
+
+_pools: Dict[str, WebSocketPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_ws_pool(provider: str, *credentials, max_idle=2, idle_timeout=30):
+    """按服务商和凭证获取共享连接池，凭证只以摘要形式出现在池名中"""
+    digest = hashlib.sha256(
+        "\x00".join(str(item) for item in credentials).encode("utf-8")
+    ).hexdigest()[:12]
+    key = f"{provider}:{digest}"
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = WebSocketPool(key, max_idle=max_idle, idle_timeout=idle_timeout)
+            _pools[key] = pool
+        return pool
+
+
+def get_ws_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """获取所有连接池的统计信息"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.get_stats() for pool in pools}
@@ -5,6 +5,10 @@ from core.connection import ConnectionHandler
 from config.config_loader import get_config_from_api
 from core.utils.modules_initialize import initialize_modules
 from core.utils.util import check_vad_update, check_asr_update
+from core.utils.model_worker import init_model_worker
+from core.utils.metrics import registry, gauge, CONNECTIONS_TOTAL
+from core.utils.timing_wheel import TimingWheel
+from core.utils.downlink_scheduler import DownlinkScheduler
 
 TAG = __name__
 
@@ -14,6 +18,8 @@ class WebSocketServer:
         self.config = config
         self.logger = setup_logging()
         self.config_lock = asyncio.Lock()
+        # 按配置启动本地模型工作进程，需在初始化模块之前完成
+        self.model_worker_pool = init_model_worker(self.config)
         modules = initialize_modules(
             self.logger,
             self.config,
@@ -31,11 +37,65 @@ class WebSocketServer:
         self._memory = modules["memory"] if "memory" in modules else None
 
         self.active_connections = set()
+        # 所有连接共用的空闲定时器时间轮
+        self.timing_wheel = TimingWheel()
+        # 所有连接共用的下行音频发送调度器
+        self.downlink_scheduler = DownlinkScheduler.from_config(self.config)
+        registry.register_collector(self._collect_metrics)
+
+    def _collect_metrics(self):
+        """活跃连接数和各连接队列积压，抓取指标时计算"""
+        connections = list(self.active_connections)
+        depths = {
+            "tts_text": [],
+            "tts_synthesis": [],
+            "tts_audio": [],
+            "asr_audio": [],
+        }
+        for conn in connections:
+            if conn.tts is not None:
+                depths["tts_text"].append(conn.tts.tts_text_queue.qsize())
+                if conn.tts.synthesis_pipeline is not None:
+                    depths["tts_synthesis"].append(
+                        conn.tts.synthesis_pipeline.inflight
+                    )
+                depths["tts_audio"].append(conn.tts.tts_audio_queue.qsize())
+            depths["asr_audio"].append(conn.asr_audio_queue.qsize())
+        return [
+            gauge("xiaozhi_active_connections", "当前活跃的设备连接数", len(connections)),
+            gauge(
+                "xiaozhi_timing_wheel_entries",
+                "时间轮中的定时器条目数",
+                self.timing_wheel.get_stats()["entries"],
+            ),
+            gauge(
+                "xiaozhi_downlink_streams",
+                "正在发送音频的连接数",
+                self.downlink_scheduler.get_stats()["streams"],
+            ),
+            (
+                "xiaozhi_queue_depth",
+                "gauge",
+                "所有连接的队列积压总数",
+                [("", {"queue": name}, sum(values)) for name, values in depths.items()],
+            ),
+            (
+                "xiaozhi_queue_depth_max",
+                "gauge",
+                "单个连接的最大队列积压",
+                [
+                    ("", {"queue": name}, max(values, default=0))
+                    for name, values in depths.items()
+                ],
+            ),
+        ]
 
     async def start(self):
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
         port = int(server_config.get("port", 8000))
+        self.timing_wheel.start()
+        self.downlink_scheduler.start()
 
         async with websockets.serve(
             self._handle_connection, host, port, process_request=self._http_response
@@ -55,6 +115,7 @@ class WebSocketServer:
             self,  # 传入server实例
         )
         self.active_connections.add(handler)
+        CONNECTIONS_TOTAL.inc()
         try:
             await handler.handle_connection(websocket)
         except Exception as e:
@@ -0,0 +1,100 @@
+import copy
+import time
+import statistics
+import tracemalloc
+from tabulate import tabulate
+from config.config_loader import get_project_dir, read_config
+from config.layered_config import LayeredConfig
+
+description = "连接配置初始化开销测试（deepcopy与分层配置对比）"
+
+
+class ConfigPerformanceTester:
+    def __init__(self, connections: int = 2000):
+        self.connections = connections
+        self.base_config = read_config(get_project_dir() + "config.yaml")
+        selected = self.base_config["selected_module"]
+        # 模拟智控台下发的私有配置：替换TTS/LLM配置块和选中的模块
+        self.private_config = {
+            "selected_module": {"TTS": selected["TTS"], "LLM": selected["LLM"]},
+            "TTS": {selected["TTS"]: dict(self.base_config["TTS"][selected["TTS"]])},
+            "LLM": {selected["LLM"]: dict(self.base_config["LLM"][selected["LLM"]])},
+            "prompt": "你是一个测试用的智能体",
+        }
+
+    def _setup_deepcopy(self):
+        """改造前：每个连接深拷贝整个配置后原地修改"""
+        config = copy.deepcopy(self.base_config)
+        for module in ("TTS", "LLM"):
+            config[module] = self.private_config[module]
+            config["selected_module"][module] = self.private_config["selected_module"][module]
+        config["prompt"] = self.private_config["prompt"]
+        return config
+
+    def _setup_layered(self):
+        """改造后：分层配置，只复制被覆盖的路径"""
+        config = LayeredConfig(self.base_config)
+        for module in ("TTS", "LLM"):
+            config[module] = self.private_config[module]
+            config.override(
+                "selected_module", module, value=self.private_config["selected_module"][module]
+            )
+        config["prompt"] = self.private_config["prompt"]
+        return config
+
+    def _measure(self, setup) -> dict:
+        durations = []
+        for _ in range(self.connections):
+            start = time.perf_counter()
+            setup()
+            durations.append((time.perf_counter() - start) * 1e6)
+        durations.sort()
+
+        # 同时保留全部连接的配置，统计每个连接额外占用的内存
+        tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+        configs = [setup() for _ in range(self.connections)]
+        snapshot_after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        allocated = sum(
+            stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, "filename")
+        )
+        del configs
+        return {
+            "avg_us": statistics.mean(durations),
+            "p95_us": durations[int(len(durations) * 0.95) - 1],
+            "kb_per_conn": allocated / self.connections / 1024,
+        }
+
+    def run(self):
+        rows = []
+        for name, setup in (
+            ("deepcopy", self._setup_deepcopy),
+            ("分层配置", self._setup_layered),
+        ):
+            result = self._measure(setup)
+            rows.append(
+                [
+                    name,
+                    self.connections,
+                    f"{result['avg_us']:.1f}",
+                    f"{result['p95_us']:.1f}",
+                    f"{result['kb_per_conn']:.2f}",
+                ]
+            )
+        print(
+            tabulate(
+                rows,
+                headers=["方式", "连接数", "平均耗时(us)", "P95耗时(us)", "每连接内存(KB)"],
+                tablefmt="grid",
+            )
+        )
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    ConfigPerformanceTester().run()
+
+
+if __name__ == "__main__":
+    main()
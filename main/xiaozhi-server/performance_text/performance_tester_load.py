@@ -0,0 +1,359 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+import psutil
+import websockets
+from tabulate import tabulate
+from core.utils.util import audio_to_data
+
+description = "整机压测工具：模拟大量设备通过WebSocket协议与服务端完整对话"
+
+FRAME_DURATION_MS = 60
+
+
+def percentile(values: List[float], percent: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(len(values) * percent)) - 1))
+    return values[index]
+
+
+class DeviceResult:
+    """单个模拟设备的测量结果"""
+
+    def __init__(self):
+        self.connect_ms: Optional[float] = None
+        self.hello_ms: Optional[float] = None
+        self.first_audio_ms: List[float] = []
+        self.jitter_ms: List[float] = []
+        self.turns_completed = 0
+        self.turns_timeout = 0
+        self.aborts = 0
+        self.audio_frames = 0
+        self.mcp_replies = 0
+        self.error: Optional[str] = None
+
+
+class SimulatedDevice:
+    """按设备固件的协议顺序发送消息：hello → listen start → Opus音频 → listen stop，并应答MCP请求"""
+
+    def __init__(self, index: int, args, audio_frames: List[bytes]):
+        self.index = index
+        self.args = args
+        self.audio_frames = audio_frames
+        self.device_id = "02:4c:%02x:%02x:%02x:%02x" % (
+            (index >> 24) & 0xFF,
+            (index >> 16) & 0xFF,
+            (index >> 8) & 0xFF,
+            index & 0xFF,
+        )
+        self.result = DeviceResult()
+        self.ws = None
+        self.session_id = None
+        self._hello_event = asyncio.Event()
+        self._first_audio_event = asyncio.Event()
+        self._tts_stop_event = asyncio.Event()
+        self._last_frame_time = None
+        self._frames_in_sentence = 0
+
+    def _url(self) -> str:
+        query = urlencode({"device-id": self.device_id, "client-id": f"load-{self.index}"})
+        separator = "&" if "?" in self.args.url else "?"
+        return f"{self.args.url}{separator}{query}"
+
+    async def run(self):
+        headers = {
+            "device-id": self.device_id,
+            "client-id": f"load-{self.index}",
+            "protocol-version": "1",
+        }
+        if self.args.token:
+            headers["authorization"] = f"Bearer {self.args.token}"
+        try:
+            start = time.perf_counter()
+            async with websockets.connect(
+                self._url(), additional_headers=headers, max_size=None
+            ) as ws:
+                self.ws = ws
+                self.result.connect_ms = (time.perf_counter() - start) * 1000
+                receiver = asyncio.create_task(self._receive_loop())
+                try:
+                    await self._hello()
+                    for turn in range(self.args.turns):
+                        await self._turn()
+                        await asyncio.sleep(self.args.think_time)
+                finally:
+                    receiver.cancel()
+        except Exception as e:
+            self.result.error = f"{type(e).__name__}: {e}"
+        return self.result
+
+    async def _hello(self):
+        start = time.perf_counter()
+        await self.ws.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    "features": {"mcp": True},
+                    "audio_params": {
+                        "format": "opus",
+                        "sample_rate": 16000,
+                        "channels": 1,
+                        "frame_duration": FRAME_DURATION_MS,
+                    },
+                }
+            )
+        )
+        await asyncio.wait_for(self._hello_event.wait(), self.args.timeout)
+        self.result.hello_ms = (time.perf_counter() - start) * 1000
+
+    async def _turn(self):
+        self._first_audio_event.clear()
+        self._tts_stop_event.clear()
+        await self.ws.send(
+            json.dumps({"session_id": self.session_id, "type": "listen", "state": "start", "mode": "manual"})
+        )
+        # 按60ms节奏实时发送录音
+        start = time.perf_counter()
+        for i, frame in enumerate(self.audio_frames):
+            delay = start + i * FRAME_DURATION_MS / 1000 - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.ws.send(frame)
+        await self.ws.send(
+            json.dumps({"session_id": self.session_id, "type": "listen", "state": "stop"})
+        )
+        speech_end = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._first_audio_event.wait(), self.args.timeout)
+        except asyncio.TimeoutError:
+            self.result.turns_timeout += 1
+            return
+        self.result.first_audio_ms.append((time.perf_counter() - speech_end) * 1000)
+
+        if random.random() < self.args.abort_ratio:
+            # 模拟用户在播放过程中打断
+            await asyncio.sleep(random.uniform(0.2, 1.0))
+            await self.ws.send(json.dumps({"session_id": self.session_id, "type": "abort"}))
+            self.result.aborts += 1
+        try:
+            await asyncio.wait_for(self._tts_stop_event.wait(), self.args.timeout)
+            self.result.turns_completed += 1
+        except asyncio.TimeoutError:
+            self.result.turns_timeout += 1
+
+    async def _receive_loop(self):
+        async for message in self.ws:
+            now = time.perf_counter()
+            if isinstance(message, bytes):
+                self.result.audio_frames += 1
+                self._frames_in_sentence += 1
+                self._first_audio_event.set()
+                # 服务端每句开头会突发发送预缓冲帧，之后按帧时长匀速下发
+                if self._last_frame_time is not None and self._frames_in_sentence > 4:
+                    gap_ms = (now - self._last_frame_time) * 1000
+                    self.result.jitter_ms.append(abs(gap_ms - FRAME_DURATION_MS))
+                self._last_frame_time = now
+                continue
+            try:
+                msg = json.loads(message)
+            except (TypeError, ValueError):
+                continue
+            msg_type = msg.get("type")
+            if msg_type == "hello":
+                self.session_id = msg.get("session_id")
+                self._hello_event.set()
+            elif msg_type == "tts":
+                state = msg.get("state")
+                if state == "sentence_start":
+                    self._frames_in_sentence = 0
+                    self._last_frame_time = None
+                elif state == "stop":
+                    self._tts_stop_event.set()
+            elif msg_type == "mcp":
+                await self._reply_mcp(msg.get("payload") or {})
+
+    async def _reply_mcp(self, payload: dict):
+        method = payload.get("method")
+        if method == "initialize":
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "load-tester", "version": "1.0.0"},
+            }
+        elif method == "tools/list":
+            result = {
+                "tools": [
+                    {
+                        "name": "self.audio_speaker.set_volume",
+                        "description": "设置音量",
+                        "inputSchema": {
+                            "type": "object",
+                            "properties": {"volume": {"type": "integer"}},
+                            "required": ["volume"],
+                        },
+                    }
+                ]
+            }
+        elif method == "tools/call":
+            result = {"content": [{"type": "text", "text": "true"}], "isError": False}
+        else:
+            return
+        await self.ws.send(
+            json.dumps(
+                {
+                    "session_id": self.session_id,
+                    "type": "mcp",
+                    "payload": {"jsonrpc": "2.0", "id": payload.get("id"), "result": result},
+                }
+            )
+        )
+        self.result.mcp_replies += 1
+
+
+class ResourceSampler:
+    """定期采样服务端进程的CPU、内存和线程数"""
+
+    def __init__(self, pid: Optional[int], interval: float = 1.0):
+        self.process = psutil.Process(pid) if pid else None
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+
+    async def run(self):
+        if self.process is None:
+            return
+        self.process.cpu_percent(None)
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                with self.process.oneshot():
+                    self.samples.append(
+                        {
+                            "cpu": self.process.cpu_percent(None),
+                            "rss_mb": self.process.memory_info().rss / 1024 / 1024,
+                            "threads": self.process.num_threads(),
+                        }
+                    )
+            except psutil.Error:
+                return
+
+    def summary(self) -> List[list]:
+        rows = []
+        for key, name in (("cpu", "CPU(%)"), ("rss_mb", "RSS(MB)"), ("threads", "线程数")):
+            values = [sample[key] for sample in self.samples]
+            if values:
+                rows.append([name, f"{statistics.mean(values):.1f}", f"{max(values):.1f}"])
+        return rows
+
+
+def find_server_pid(port: int) -> Optional[int]:
+    """根据监听端口查找服务端进程"""
+    try:
+        for conn in psutil.net_connections(kind="tcp"):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port:
+                return conn.pid
+    except (psutil.AccessDenied, PermissionError):
+        pass
+    return None
+
+
+class LoadTester:
+    def __init__(self, args):
+        self.args = args
+        self.audio_frames, duration = audio_to_data(args.audio)
+        print(f"录音: {args.audio}, 时长{duration:.2f}秒, {len(self.audio_frames)}帧")
+
+    async def _start_device(self, index: int) -> DeviceResult:
+        # 按设定速率逐步建立连接
+        await asyncio.sleep(index / self.args.ramp)
+        return await SimulatedDevice(index, self.args, self.audio_frames).run()
+
+    async def run(self):
+        pid = self.args.server_pid or find_server_pid(self.args.port)
+        sampler = ResourceSampler(pid)
+        sampler_task = asyncio.create_task(sampler.run())
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._start_device(i) for i in range(self.args.devices))
+        )
+        elapsed = time.perf_counter() - start
+        sampler_task.cancel()
+        self._print_results(results, sampler, elapsed, pid)
+
+    def _print_results(self, results: List[DeviceResult], sampler, elapsed, pid):
+        def fmt(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        errors = [result.error for result in results if result.error]
+        metrics = {
+            "建立连接(ms)": [r.connect_ms for r in results if r.connect_ms is not None],
+            "hello往返(ms)": [r.hello_ms for r in results if r.hello_ms is not None],
+            "首包音频(ms)": [v for r in results for v in r.first_audio_ms],
+            "下行抖动(ms)": [v for r in results for v in r.jitter_ms],
+        }
+        rows = [
+            [name, len(values), fmt(percentile(values, 0.5)), fmt(percentile(values, 0.95)), fmt(percentile(values, 0.99)), fmt(max(values) if values else None)]
+            for name, values in metrics.items()
+        ]
+        print(
+            tabulate(
+                rows,
+                headers=["指标", "样本数", "P50", "P95", "P99", "最大"],
+                tablefmt="grid",
+            )
+        )
+        print(
+            tabulate(
+                [
+                    ["设备数", len(results)],
+                    ["连接失败", len(errors)],
+                    ["完成轮数", sum(r.turns_completed for r in results)],
+                    ["超时轮数", sum(r.turns_timeout for r in results)],
+                    ["打断次数", sum(r.aborts for r in results)],
+                    ["收到音频帧", sum(r.audio_frames for r in results)],
+                    ["MCP应答", sum(r.mcp_replies for r in results)],
+                    ["总耗时(秒)", f"{elapsed:.1f}"],
+                ],
+                tablefmt="grid",
+            )
+        )
+        if pid:
+            print(f"服务端进程资源（pid={pid}）")
+            print(tabulate(sampler.summary(), headers=["资源", "平均", "最大"], tablefmt="grid"))
+        else:
+            print("未找到服务端进程，跳过资源采样，可通过--server-pid指定")
+        for error in sorted(set(errors))[:10]:
+            print(f"连接错误: {error}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000/xiaozhi/v1/", help="服务端WebSocket地址")
+    parser.add_argument("--port", type=int, default=8000, help="服务端监听端口，用于查找服务端进程")
+    parser.add_argument("--server-pid", type=int, default=None, help="服务端进程pid，用于采样CPU/内存/线程数")
+    parser.add_argument("--devices", type=int, default=100, help="模拟设备数")
+    parser.add_argument("--ramp", type=float, default=20, help="每秒新建的连接数")
+    parser.add_argument("--turns", type=int, default=3, help="每个设备的对话轮数")
+    parser.add_argument("--think-time", type=float, default=1.0, help="每轮对话结束后的等待秒数")
+    parser.add_argument("--abort-ratio", type=float, default=0.1, help="在播放中打断的对话比例")
+    parser.add_argument("--timeout", type=float, default=30, help="等待服务端响应的超时秒数")
+    parser.add_argument("--audio", default="config/assets/wakeup_words.wav", help="用于发送的录音文件")
+    parser.add_argument("--token", default=None, help="开启认证时使用的token")
+    return parser.parse_args(argv)
+
+
+# 为了performance_tester.py的调用需求
+async def main(argv=None):
+    await LoadTester(parse_args(argv)).run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+import os
+import time
+import tempfile
+import statistics
+from loguru import logger
+from tabulate import tabulate
+from core.utils.hot_path_log import HotPathLogger
+
+description = "热路径日志开销测试（每帧/每分片日志的调用方耗时）"
+
+
+class FakeChunk:
+    """模拟LLM流式响应分片，转成字符串的开销与真实对象相当"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.choices = [{"delta": {"content": "今天天气不错，适合出门散步。"}}]
+
+    def __repr__(self):
+        return f"ChatCompletionChunk(id=chatcmpl-{self.index}, choices={self.choices!r})"
+
+
+class LoggingPerformanceTester:
+    def __init__(self, events: int = 20000, devices: int = 50):
+        self.events = events
+        self.devices = [f"aa:bb:cc:dd:{i // 256:02x}:{i % 256:02x}" for i in range(devices)]
+        self.text = "今天天气不错，适合出门散步。要不要我帮你查一下附近的公园？"
+        self.tmp_dir = tempfile.mkdtemp(prefix="hot_path_")
+        # 与线上一致：文件日志异步写入，日志级别INFO
+        logger.remove()
+        logger.add(
+            os.path.join(self.tmp_dir, "server.log"),
+            level="INFO",
+            enqueue=True,
+            format="{time:YYYY-MM-DD HH:mm:ss} - {extra[tag]} - {level} - {message}",
+        )
+        self.log = logger.bind(tag="benchmark")
+
+    def _measure(self, emit) -> dict:
+        durations = []
+        for i in range(self.events):
+            device_id = self.devices[i % len(self.devices)]
+            start = time.perf_counter()
+            emit(i, device_id)
+            durations.append((time.perf_counter() - start) * 1e6)
+        durations.sort()
+        return {
+            "avg_us": statistics.mean(durations),
+            "p99_us": durations[int(len(durations) * 0.99) - 1],
+        }
+
+    def run(self):
+        hot_all = HotPathLogger(
+            per_device_rate=0,
+            sink="jsonl",
+            file_path=os.path.join(self.tmp_dir, "hot_all.jsonl"),
+        )
+        hot_limited = HotPathLogger(
+            per_device_rate=20,
+            sink="jsonl",
+            file_path=os.path.join(self.tmp_dir, "hot_limited.jsonl"),
+        )
+        hot_sampled = HotPathLogger(
+            sample_rate=0.1,
+            per_device_rate=0,
+            sink="jsonl",
+            file_path=os.path.join(self.tmp_dir, "hot_sampled.jsonl"),
+        )
+        chunks = [FakeChunk(i) for i in range(self.events)]
+
+        cases = [
+            (
+                "每句音频",
+                "INFO即时格式化（原实现）",
+                lambda i, d: self.log.info(f"发送音频消息: SentenceType.MIDDLE, {self.text}"),
+            ),
+            (
+                "每句音频",
+                "热路径JSONL",
+                lambda i, d: hot_all.event("send_audio", d, sentence_type="MIDDLE", text=self.text),
+            ),
+            (
+                "每句音频",
+                "热路径JSONL+每设备20条/秒",
+                lambda i, d: hot_limited.event("send_audio", d, sentence_type="MIDDLE", text=self.text),
+            ),
+            (
+                "每句音频",
+                "热路径JSONL+10%采样",
+                lambda i, d: hot_sampled.event("send_audio", d, sentence_type="MIDDLE", text=self.text),
+            ),
+            (
+                "每个LLM分片",
+                "DEBUG即时格式化（原实现）",
+                lambda i, d: self.log.debug(f"LLM响应chunk #{i} - 时间: {0.123:.3f}s: {chunks[i]}"),
+            ),
+            (
+                "每个LLM分片",
+                "DEBUG延迟格式化",
+                lambda i, d: self.log.debug("LLM响应chunk #{} - 时间: {:.3f}s: {}", i, 0.123, chunks[i]),
+            ),
+        ]
+
+        rows = []
+        for scene, impl, emit in cases:
+            result = self._measure(emit)
+            rows.append(
+                [scene, impl, self.events, f"{result['avg_us']:.2f}", f"{result['p99_us']:.2f}"]
+            )
+        logger.complete()
+
+        print(
+            tabulate(
+                rows,
+                headers=["场景", "实现", "事件数", "平均耗时(us)", "P99耗时(us)"],
+                tablefmt="grid",
+            )
+        )
+        print("说明：耗时为调用方线程上每条日志的开销，后台写文件的耗时不计入")
+        for name, hot_logger in (
+            ("全部输出", hot_all),
+            ("每设备限流", hot_limited),
+            ("10%采样", hot_sampled),
+        ):
+            print(f"热路径日志统计（{name}）: {hot_logger.get_stats()}")
+        print(f"日志文件目录: {self.tmp_dir}")
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    LoggingPerformanceTester().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import time
+import random
+import logging
+import statistics
+import numpy as np
+from tabulate import tabulate
+from opuslib_next import Encoder, constants
+from core.utils.opus_encoder_utils import OpusEncoderUtils
+
+# 设置全局日志级别为WARNING，抑制INFO级别日志
+logging.basicConfig(level=logging.WARNING)
+
+description = "流式TTS音频Opus编码性能测试"
+
+
+class LegacyOpusEncoder:
+    """改造前的实现：每个分片np.append整块缓冲区，逐帧切片"""
+
+    def __init__(self, sample_rate: int, channels: int, frame_size_ms: int):
+        self.frame_size = (sample_rate * frame_size_ms) // 1000
+        self.total_frame_size = self.frame_size * channels
+        self.buffer = np.array([], dtype=np.int16)
+        self.encoder = Encoder(sample_rate, channels, constants.APPLICATION_AUDIO)
+        self.encoder.bitrate = 24000
+        self.encoder.complexity = 10
+        self.encoder.signal = constants.SIGNAL_VOICE
+
+    def encode_pcm_to_opus(self, pcm_data: bytes, end_of_stream: bool) -> list:
+        new_samples = np.frombuffer(pcm_data, dtype=np.int16)
+        # 原实现中对int16做的范围校验
+        if np.any((new_samples < -32768) | (new_samples > 32767)):
+            pass
+        self.buffer = np.append(self.buffer, new_samples)
+        opus_packets = []
+        offset = 0
+        while offset <= len(self.buffer) - self.total_frame_size:
+            frame = self.buffer[offset : offset + self.total_frame_size]
+            opus_packets.append(self.encoder.encode(frame.tobytes(), self.frame_size))
+            offset += self.total_frame_size
+        self.buffer = self.buffer[offset:]
+        if end_of_stream and len(self.buffer) > 0:
+            last_frame = np.zeros(self.total_frame_size, dtype=np.int16)
+            last_frame[: len(self.buffer)] = self.buffer
+            opus_packets.append(self.encoder.encode(last_frame.tobytes(), self.frame_size))
+            self.buffer = np.array([], dtype=np.int16)
+        return opus_packets
+
+
+class OpusPerformanceTester:
+    def __init__(self, duration_s: int = 30, vendor_rate: int = 24000):
+        self.vendor_rate = vendor_rate
+        # 模拟服务商推送的音频：长度不固定、不按帧对齐的PCM分片
+        rng = random.Random(42)
+        t = np.arange(vendor_rate * duration_s) / vendor_rate
+        wave = (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16).tobytes()
+        self.chunks = []
+        offset = 0
+        while offset < len(wave):
+            size = rng.randrange(400, 6400, 2)
+            self.chunks.append(wave[offset : offset + size])
+            offset += size
+
+    @staticmethod
+    def _resample(pcm_data: bytes, src_rate: int, dst_rate: int) -> bytes:
+        """线性插值重采样"""
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
+        dst_len = len(samples) * dst_rate // src_rate
+        if dst_len == 0:
+            return b""
+        positions = np.linspace(0, len(samples) - 1, dst_len)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16).tobytes()
+
+    def _run_case(self, encoder, resample_to: int = None) -> dict:
+        per_chunk_us = []
+        packets = 0
+        for i, chunk in enumerate(self.chunks):
+            start = time.perf_counter()
+            if resample_to:
+                chunk = self._resample(chunk, self.vendor_rate, resample_to)
+            packets += len(
+                encoder.encode_pcm_to_opus(chunk, i == len(self.chunks) - 1)
+            )
+            per_chunk_us.append((time.perf_counter() - start) * 1e6)
+        per_chunk_us.sort()
+        return {
+            "chunks": len(per_chunk_us),
+            "packets": packets,
+            "avg_us": statistics.mean(per_chunk_us),
+            "p95_us": per_chunk_us[int(len(per_chunk_us) * 0.95) - 1],
+            "total_ms": sum(per_chunk_us) / 1000,
+        }
+
+    def run(self):
+        cases = [
+            ("原实现", f"{self.vendor_rate}Hz直接编码", LegacyOpusEncoder, self.vendor_rate, None),
+            ("新实现", f"{self.vendor_rate}Hz直接编码", OpusEncoderUtils, self.vendor_rate, None),
+            ("原实现", f"{self.vendor_rate}Hz重采样到16000Hz", LegacyOpusEncoder, 16000, 16000),
+            ("新实现", f"{self.vendor_rate}Hz重采样到16000Hz", OpusEncoderUtils, 16000, 16000),
+        ]
+        rows = []
+        for impl, scene, encoder_cls, rate, resample_to in cases:
+            result = self._run_case(encoder_cls(rate, 1, 60), resample_to)
+            rows.append(
+                [
+                    impl,
+                    scene,
+                    result["chunks"],
+                    result["packets"],
+                    f"{result['avg_us']:.1f}",
+                    f"{result['p95_us']:.1f}",
+                    f"{result['total_ms']:.1f}",
+                ]
+            )
+        print(
+            tabulate(
+                rows,
+                headers=["实现", "场景", "分片数", "Opus包数", "平均每片(us)", "P95每片(us)", "总耗时(ms)"],
+                tablefmt="grid",
+            )
+        )
+        print("说明：每片耗时包含缓冲、分帧和Opus编码，重采样场景额外包含重采样耗时")
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    OpusPerformanceTester().run()
+
+
+if __name__ == "__main__":
+    main()
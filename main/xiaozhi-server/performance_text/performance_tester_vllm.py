@@ -1,3 +1,4 @@
+import os
 import time
 import asyncio
 import logging
@@ -7,11 +8,12 @@ import yaml
 from typing import Dict
 from tabulate import tabulate
 from core.utils.vllm import create_instance
+from core.utils.vision_image import VisionImageProcessor
 
 # 设置全局日志级别为WARNING，抑制INFO级别日志
 logging.basicConfig(level=logging.WARNING)
 
-description = "视觉识别模型性能测试"
+description = "视觉识别模型性能测试（对比原图与预处理后的上传大小和响应耗时）"
 class AsyncVisionPerformanceTester:
     def __init__(self):
         # 从data/.config.yaml读取配置
@@ -31,6 +33,9 @@ class AsyncVisionPerformanceTester:
             "请详细描述这张图片的内容",
         ]
 
+        # 图片预处理的默认参数，与视觉分析接口一致
+        self.vision_config = self.config.get("vision") or {}
+
         # 加载测试图片
         self.results = {"vllm": {}}
 
@@ -47,6 +52,7 @@ class AsyncVisionPerformanceTester:
             # 获取实际类型（兼容旧配置）
             module_type = config.get("type", vllm_name)
             vllm = create_instance(module_type, config)
+            processor = VisionImageProcessor.from_config(self.vision_config, config)
 
             print(f"🖼️ 测试 VLLM: {vllm_name}")
 
@@ -55,7 +61,9 @@ class AsyncVisionPerformanceTester:
             for question in self.test_questions:
                 for image in self.test_images:
                     test_tasks.append(
-                        self._test_single_vision(vllm_name, vllm, question, image)
+                        self._test_single_vision(
+                            vllm_name, vllm, processor, question, image
+                        )
                     )
 
             # 并发执行所有测试
@@ -68,6 +76,7 @@ class AsyncVisionPerformanceTester:
                 return {"name": vllm_name, "type": "vllm", "errors": 1}
 
             response_times = [r["response_time"] for r in valid_results]
+            raw_times = [r["raw_time"] for r in valid_results]
 
             # 过滤异常数据
             mean = statistics.mean(response_times)
@@ -85,6 +94,9 @@ class AsyncVisionPerformanceTester:
                 "std_response": (
                     statistics.stdev(response_times) if len(response_times) > 1 else 0
                 ),
+                "avg_raw_response": sum(raw_times) / len(raw_times),
+                "avg_raw_bytes": statistics.mean(r["raw_bytes"] for r in valid_results),
+                "avg_bytes": statistics.mean(r["bytes"] for r in valid_results),
                 "errors": 0,
             }
 
@@ -93,27 +105,36 @@ class AsyncVisionPerformanceTester:
             return {"name": vllm_name, "type": "vllm", "errors": 1}
 
     async def _test_single_vision(
-        self, vllm_name: str, vllm, question: str, image: str
+        self, vllm_name: str, vllm, processor, question: str, image: str
     ) -> Dict:
-        """测试单个视觉问题的性能"""
+        """测试单个视觉问题的性能，先上传原图，再上传预处理后的图片"""
         try:
             print(f"📝 {vllm_name} 开始测试: {question[:20]}...")
-            start_time = time.time()
-
-            # 读取图片并转换为base64
             with open(image, "rb") as image_file:
                 image_data = image_file.read()
-                image_base64 = base64.b64encode(image_data).decode("utf-8")
 
-            # 直接获取响应
-            response = vllm.response(question, image_base64)
+            # 原图直接转换为base64上传
+            start_time = time.time()
+            raw_base64 = base64.b64encode(image_data).decode("utf-8")
+            await vllm.response_async(question, raw_base64)
+            raw_time = time.time() - start_time
+
+            # 预处理（缩放、重新编码）后上传，耗时包含预处理
+            start_time = time.time()
+            processed = await asyncio.to_thread(processor.process, image_data)
+            await vllm.response_async(question, processed.base64)
             response_time = time.time() - start_time
-            print(f"✓ {vllm_name} 完成响应: {response_time:.3f}s")
+            print(
+                f"✓ {vllm_name} 完成响应: 原图 {raw_time:.3f}s，预处理后 {response_time:.3f}s"
+            )
 
             return {
                 "name": vllm_name,
                 "type": "vllm",
+                "raw_time": raw_time,
                 "response_time": response_time,
+                "raw_bytes": len(raw_base64),
+                "bytes": len(processed.base64),
             }
         except Exception as e:
             print(f"⚠️ {vllm_name} 测试失败: {str(e)}")
@@ -128,6 +149,9 @@ class AsyncVisionPerformanceTester:
                 vllm_table.append(
                     [
                         name,
+                        f"{data['avg_raw_bytes'] / 1024:.1f}KB",
+                        f"{data['avg_bytes'] / 1024:.1f}KB",
+                        f"{data['avg_raw_response']:.3f}秒",
                         f"{data['avg_response']:.3f}秒",
                         f"{stability:.3f}",
                     ]
@@ -138,9 +162,16 @@ class AsyncVisionPerformanceTester:
             print(
                 tabulate(
                     vllm_table,
-                    headers=["模型名称", "响应耗时", "稳定性"],
+                    headers=[
+                        "模型名称",
+                        "原图上传",
+                        "预处理后上传",
+                        "原图耗时",
+                        "预处理后耗时",
+                        "稳定性",
+                    ],
                     tablefmt="github",
-                    colalign=("left", "right", "right"),
+                    colalign=("left", "right", "right", "right", "right", "right"),
                     disable_numparse=True,
                 )
             )